@@ -23,12 +23,20 @@ class Settings:
     BASE_DIR: Path = Path(__file__).parent.parent
     STATIC_DIR: Path = BASE_DIR / "static"
     UPLOADS_DIR: Path = STATIC_DIR / "uploads"
+    WORKSHEETS_DIR: Path = STATIC_DIR / "worksheets"  # 生成的试卷 PDF (受 TTL 管理)
+    DERIVATIVES_DIR: Path = STATIC_DIR / "derivatives"  # 图库缩略图 (小图/中图)
+    INGEST_SPOOL_DIR: Path = BASE_DIR / "ingest_spool"  # 等待后台导入的 ZIP 包
 
     # =========================================================================
     # 数据库配置
     # =========================================================================
     DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite:///./sql_app.db")
 
+    @property
+    def SQLITE_BUSY_TIMEOUT(self) -> float:
+        """SQLite 被其他连接 (并发导入的线程/进程) 锁住时等待的秒数"""
+        return float(os.getenv("SQLITE_BUSY_TIMEOUT", "30"))
+
     # =========================================================================
     # 安全配置
     # =========================================================================
@@ -62,10 +70,106 @@ class Settings:
         types_str = os.getenv("ALLOWED_IMAGE_TYPES", "image/jpeg,image/png,image/webp")
         return [t.strip() for t in types_str.split(",")]
 
+    @property
+    def MAX_IMAGE_PIXELS(self) -> int:
+        """单张图片 / 拼接结果的最大像素数 (防解压炸弹)"""
+        return int(os.getenv("MAX_IMAGE_PIXELS", str(60_000_000)))
+
+    @property
+    def STITCH_MAX_WIDTH(self) -> int:
+        """拼接结果最大宽度 (像素，A4 300dpi 约 2480)，超出时等比缩小；0 表示不缩放"""
+        return int(os.getenv("STITCH_MAX_WIDTH", "0"))
+
+    @property
+    def STRIP_JPEG_METADATA(self) -> bool:
+        """直通存储的 JPEG 是否去除 EXIF/XMP/IPTC/注释 (无损)"""
+        return os.getenv("STRIP_JPEG_METADATA", "true").lower() in ("1", "true", "yes")
+
+    # =========================================================================
+    # 生成文件 (Artifact) 配置
+    # =========================================================================
+    @property
+    def ARTIFACT_TTL_SECONDS(self) -> int:
+        """生成文件默认保留时间 (秒)"""
+        return int(os.getenv("ARTIFACT_TTL_SECONDS", str(24 * 3600)))
+
+    @property
+    def ARTIFACT_MAX_BYTES(self) -> int:
+        """生成文件总大小上限 (字节)，超出后按 LRU 淘汰"""
+        mb = float(os.getenv("ARTIFACT_MAX_MB", "1024"))
+        return int(mb * 1024 * 1024)
+
+    @property
+    def ARTIFACT_SWEEP_INTERVAL_SECONDS(self) -> int:
+        """后台清理间隔 (秒)"""
+        return int(os.getenv("ARTIFACT_SWEEP_INTERVAL_SECONDS", "600"))
+
+    # =========================================================================
+    # 图库缩略图配置
+    # =========================================================================
+    @property
+    def DERIVATIVE_WORKERS(self) -> int:
+        """缩略图生成线程数"""
+        return int(os.getenv("DERIVATIVE_WORKERS", "2"))
+
+    # =========================================================================
+    # 图片处理执行器配置 (拼接 / 编码不在事件循环中执行)
+    # =========================================================================
+    @property
+    def IMAGE_EXECUTOR(self) -> str:
+        """执行器类型: thread / process"""
+        return os.getenv("IMAGE_EXECUTOR", "thread").strip().lower()
+
+    @property
+    def IMAGE_WORKERS(self) -> int:
+        """图片处理并发数"""
+        return int(os.getenv("IMAGE_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+    @property
+    def IMAGE_MAX_PENDING(self) -> int:
+        """执行中 + 排队中的任务上限 (背压)"""
+        return int(os.getenv("IMAGE_MAX_PENDING", str(self.IMAGE_WORKERS * 4)))
+
+    @property
+    def IMAGE_QUEUE_TIMEOUT_SECONDS(self) -> float:
+        """排队已满时的最长等待时间，超时返回 503"""
+        return float(os.getenv("IMAGE_QUEUE_TIMEOUT_SECONDS", "10"))
+
+    # =========================================================================
+    # ZIP 导入配置
+    # =========================================================================
+    @property
+    def INGEST_WORKERS(self) -> int:
+        """每个 ZIP 包内并发读取 / 校验 / 存储题目的线程数 (数据库写入仍按顺序)"""
+        return int(os.getenv("INGEST_WORKERS", str(min(8, (os.cpu_count() or 1) * 2))))
+
+    @property
+    def INGEST_BATCH_PACKAGES(self) -> int:
+        """批量导入时同时导入的 ZIP 包数 (各包共用 INGEST_WORKERS 个题目处理线程)"""
+        return int(os.getenv("INGEST_BATCH_PACKAGES", "3"))
+
+    @property
+    def INGEST_NORMALIZE_IMAGES(self) -> bool:
+        """导入时规范化图片 (EXIF 方向、RGB、限制尺寸、去除元数据、优化编码)；关闭时原样存储"""
+        return os.getenv("INGEST_NORMALIZE_IMAGES", "false").lower() in ("1", "true", "yes")
+
+    @property
+    def INGEST_MAX_IMAGE_DIMENSION(self) -> int:
+        """规范化时图片长边上限 (像素)，超出时等比缩小；0 表示不缩放"""
+        return int(os.getenv("INGEST_MAX_IMAGE_DIMENSION", "2480"))
+
+    @property
+    def INGEST_JPEG_QUALITY(self) -> int:
+        """规范化时重新编码的 JPEG 质量"""
+        return int(os.getenv("INGEST_JPEG_QUALITY", "90"))
+
     def __init__(self):
         """确保必要的目录存在"""
         self.STATIC_DIR.mkdir(exist_ok=True)
         self.UPLOADS_DIR.mkdir(exist_ok=True)
+        self.WORKSHEETS_DIR.mkdir(exist_ok=True)
+        self.DERIVATIVES_DIR.mkdir(exist_ok=True)
+        self.INGEST_SPOOL_DIR.mkdir(exist_ok=True)
 
 
 # 创建全局配置实例
@@ -2,7 +2,6 @@
 # CRUD 操作模块 - Database Operations
 # =============================================================================
 import json
-import os
 import traceback
 from typing import List, Optional, Union
 
@@ -12,12 +11,8 @@ from sqlalchemy.orm import Session, joinedload
 
 from . import models, schemas
 from .config import logger
-
-# =============================================================================
-# 路径配置
-# =============================================================================
-BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-
+from .services.image_store import get_image_store
+from .services.ingest_ledger import IngestLedger
 
 # =============================================================================
 # Question CRUD
@@ -222,6 +217,7 @@ def update_question(db: Session, question_id: int, question_update: schemas.Ques
     if not db_question:
         return None
 
+    old_paths = [db_question.question_image_path, db_question.answer_image_path]
     update_data = question_update.model_dump(exclude_unset=True)
 
     # 单独处理标签更新
@@ -264,6 +260,11 @@ def update_question(db: Session, question_id: int, question_update: schemas.Ques
     db.commit()
     db.refresh(db_question)
 
+    # 回收被替换且不再被引用的图片
+    replaced = [p for p in old_paths if p not in (db_question.question_image_path, db_question.answer_image_path)]
+    if replaced:
+        get_image_store().release(db, replaced)
+
     return db.query(models.Question).options(
         joinedload(models.Question.tags)
     ).filter(models.Question.id == db_question.id).first()
@@ -278,18 +279,14 @@ def delete_question(db: Session, question_id: int):
     if not db_question:
         return False
 
-    # 删除图片文件
-    for path in [db_question.question_image_path, db_question.answer_image_path]:
-        if path:
-            full_path = os.path.join(BACKEND_DIR, path)
-            if os.path.exists(full_path):
-                try:
-                    os.remove(full_path)
-                except OSError as e:
-                    logger.warning(f"Error deleting image: {e}")
+    paths = [db_question.question_image_path, db_question.answer_image_path]
 
+    IngestLedger(db).forget([db_question.id])
     db.delete(db_question)
     db.commit()
+
+    # 删除不再被任何题目引用的图片文件 (内容寻址存储可能被多题共享)
+    get_image_store().release(db, paths)
     return True
 
 
@@ -304,21 +301,17 @@ def delete_questions_by_source(db: Session, source_filename: str) -> int:
     ).all()
 
     count = 0
+    paths = []
+    IngestLedger(db).forget(q.id for q in questions)
     for q in questions:
-        # 删除图片文件
-        for path in [q.question_image_path, q.answer_image_path]:
-            if path:
-                full_path = os.path.join(BACKEND_DIR, path)
-                if os.path.exists(full_path):
-                    try:
-                        os.remove(full_path)
-                    except OSError as e:
-                        logger.warning(f"Error deleting image: {e}")
-
+        paths.extend([q.question_image_path, q.answer_image_path])
         db.delete(q)
         count += 1
 
     db.commit()
+
+    # 删除不再被任何题目引用的图片文件
+    get_image_store().release(db, paths)
     return count
 
 
@@ -1,16 +1,43 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
-from .config import settings
+from .config import logger, settings
 
 engine = create_engine(
-    settings.DATABASE_URL, connect_args={"check_same_thread": False}
+    settings.DATABASE_URL,
+    connect_args={"check_same_thread": False, "timeout": settings.SQLITE_BUSY_TIMEOUT}
 )
+
+
+@event.listens_for(engine, "connect")
+def _set_sqlite_pragma(dbapi_connection, connection_record):
+    # WAL: 读不阻塞写；并发导入 (批量/多进程) 的写事务按 busy timeout 排队
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.close()
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
+def ensure_indexes():
+    """
+    补建模型中声明、但已有数据库中缺少的索引 (create_all 不会给已存在的表加索引)
+
+    索引列在旧数据库中还不存在时跳过 (先运行 scripts/migrate_db.py)。
+    """
+    with engine.connect() as conn:
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                try:
+                    with conn.begin():
+                        index.create(conn, checkfirst=True)
+                except OperationalError as e:
+                    logger.warning(f"Index {index.name} not created: {e.orig}")
+
+
 def get_db():
     db = SessionLocal()
     try:
@@ -0,0 +1,374 @@
+import math
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type
+
+from reportlab.lib.pagesizes import A4
+
+# A page plan is a list of pages, each a list of drawing ops in PDF
+# coordinates (origin bottom-left, points):
+#   {"op": "text",  "x", "y", "text", "size", "gray", "font"}
+#   {"op": "line",  "x1", "y1", "x2", "y2", "gray"}
+#   {"op": "rect",  "x", "y", "w", "h", "gray", "fill"}
+#   {"op": "image", "path", "x", "y", "w", "h"}
+# pdf_engine executes a plan on a canvas, preview_engine composes thumbnails from it.
+Page = List[Dict[str, Any]]
+
+
+@dataclass
+class PageGeometry:
+    width: float = A4[0]    # 595.27 points
+    height: float = A4[1]   # 841.89 points
+    margin: float = 40
+    label_height: float = 20  # Height for question label
+    separator_height: float = 25
+    spacing: float = 20
+
+    @property
+    def inner_width(self) -> float:
+        return self.width - 2 * self.margin
+
+    @property
+    def inner_height(self) -> float:
+        return self.height - 2 * self.margin
+
+
+@dataclass
+class LayoutElement:
+    """
+    One drawable part of a question block.
+
+    kind: "image" | "text" | "placeholder"
+    label: question label drawn above an image (or before a text answer)
+    separator: draw the "Answer" separator above the element
+    size: source image size in pixels (read from the header, never decoded)
+    """
+    kind: str
+    label: Optional[str] = None
+    separator: bool = False
+    path: Optional[str] = None
+    size: Tuple[int, int] = (0, 0)
+    text: Optional[str] = None
+
+
+@dataclass
+class LayoutBlock:
+    """All elements of one question; blocks are laid out in order."""
+    elements: List[LayoutElement] = field(default_factory=list)
+
+
+# =============================================================================
+# Op helpers
+# =============================================================================
+def text_op(x, y, text, font="Helvetica", size=12, gray=0.0) -> Dict[str, Any]:
+    return {"op": "text", "x": x, "y": y, "text": text, "font": font, "size": size, "gray": gray}
+
+
+def line_op(x1, y1, x2, y2, gray=0.0) -> Dict[str, Any]:
+    return {"op": "line", "x1": x1, "y1": y1, "x2": x2, "y2": y2, "gray": gray}
+
+
+def rect_op(x, y, w, h, gray, fill) -> Dict[str, Any]:
+    return {"op": "rect", "x": x, "y": y, "w": w, "h": h, "gray": gray, "fill": fill}
+
+
+def image_op(path, x, y, w, h) -> Dict[str, Any]:
+    return {"op": "image", "path": path, "x": x, "y": y, "w": w, "h": h}
+
+
+# =============================================================================
+# Layout engines
+# =============================================================================
+class LayoutEngine:
+    """
+    Base planner: measures elements at a given width and emits their ops.
+    Subclasses decide where each block goes.
+    """
+
+    name = "base"
+
+    def __init__(self, geometry: PageGeometry = None):
+        self.g = geometry or PageGeometry()
+
+    def plan(self, blocks: List[LayoutBlock]) -> List[Page]:
+        raise NotImplementedError
+
+    # -------------------------------------------------------------------------
+    # Measuring
+    # -------------------------------------------------------------------------
+    def _header_height(self, el: LayoutElement) -> float:
+        if el.separator:
+            return self.g.separator_height
+        if el.label:
+            return self.g.label_height
+        return 0
+
+    def image_size(self, el: LayoutElement, width: float, scale: float = 1.0) -> Tuple[float, float]:
+        """Display size of an image element fitted to width (and max page height)."""
+        img_w, img_h = el.size
+        aspect = img_h / float(img_w)
+
+        # Scale to fit width first
+        display_w = width
+        display_h = display_w * aspect
+
+        # If image is too tall, scale down to fit available height
+        max_h = self.g.inner_height - self.g.label_height
+        if el.separator:
+            max_h -= self.g.separator_height
+        if display_h > max_h:
+            display_h = max_h
+            display_w = display_h / aspect
+        return display_w * scale, display_h * scale
+
+    def needed(self, el: LayoutElement, width: float) -> float:
+        """Space that must remain on the page before drawing the element."""
+        if el.kind == "image":
+            return self._header_height(el) + self.image_size(el, width)[1] + self.g.spacing
+        if el.kind == "text":
+            if el.separator:
+                return self.g.separator_height + self.g.label_height + self.g.spacing
+            return self.g.label_height + self.g.spacing
+        return 0  # placeholders never force a page break
+
+    def block_height(self, block: LayoutBlock, width: float) -> float:
+        return sum(self._advance(el, width) for el in block.elements)
+
+    def _advance(self, el: LayoutElement, width: float, scale: float = 1.0) -> float:
+        if el.kind == "image":
+            return self._header_height(el) + self.image_size(el, width, scale)[1] + self.g.spacing
+        if el.kind == "text":
+            if el.separator:
+                return self.g.separator_height + self.g.label_height + self.g.spacing
+            return self.g.label_height + self.g.spacing / 2
+        return 40
+
+    # -------------------------------------------------------------------------
+    # Emitting
+    # -------------------------------------------------------------------------
+    def emit(self, el: LayoutElement, x: float, y: float, width: float, page: Page, scale: float = 1.0) -> float:
+        """Append the element's ops to page at cursor y; returns the new cursor."""
+        g = self.g
+        if el.kind == "placeholder":
+            page.append(text_op(x, y - 20, el.text))
+            return y - 40
+
+        if el.separator:
+            line_y = y - 12
+            page.append(line_op(x, line_y, x + 60, line_y, gray=0.4))
+            page.append(text_op(x + 65, line_y - 4, "Answer", font="Helvetica-Bold", size=10, gray=0.4))
+            page.append(line_op(x + 110, line_y, x + width, line_y, gray=0.4))
+            y -= g.separator_height
+
+        if el.kind == "text":
+            if el.label:
+                page.append(text_op(x, y - 15, f"{el.label}:  {el.text}"))
+                return y - (g.label_height + g.spacing / 2)
+            page.append(text_op(x, y - 15, el.text, font="Helvetica-Bold"))
+            return y - (g.label_height + g.spacing)
+
+        # image
+        if el.label and not el.separator:
+            page.append(text_op(x, y - 15, el.label))
+            y -= g.label_height
+        display_w, display_h = self.image_size(el, width, scale)
+        page.append(image_op(el.path, x, y - display_h, display_w, display_h))
+        return y - (display_h + g.spacing)
+
+
+_LAYOUTS: Dict[str, Type[LayoutEngine]] = {}
+
+
+def register_layout(name: str) -> Callable[[Type[LayoutEngine]], Type[LayoutEngine]]:
+    """Class decorator: make a LayoutEngine selectable by name."""
+    def decorator(cls: Type[LayoutEngine]) -> Type[LayoutEngine]:
+        cls.name = name
+        _LAYOUTS[name] = cls
+        return cls
+    return decorator
+
+
+def available_layouts() -> List[str]:
+    return list(_LAYOUTS.keys())
+
+
+def get_layout(name: str = "flow", **options) -> LayoutEngine:
+    if name not in _LAYOUTS:
+        raise ValueError(f"Unknown layout '{name}'. Available layouts: {available_layouts()}")
+    return _LAYOUTS[name](**options)
+
+
+@register_layout("flow")
+class FlowLayout(LayoutEngine):
+    """One question after another, full width; new page when the next part doesn't fit."""
+
+    def plan(self, blocks: List[LayoutBlock]) -> List[Page]:
+        g = self.g
+        pages: List[Page] = [[]]
+        y = g.height - g.margin
+        page_has_content = False
+
+        for block in blocks:
+            for el in block.elements:
+                needed = self.needed(el, g.inner_width)
+                if needed and y - needed < g.margin and page_has_content:
+                    pages.append([])
+                    y = g.height - g.margin
+                    page_has_content = False
+                y = self.emit(el, g.margin, y, g.inner_width, pages[-1])
+                page_has_content = True
+        return pages
+
+
+@register_layout("two_column")
+class TwoColumnLayout(LayoutEngine):
+    """
+    Short questions (e.g. MCQs) are packed two per row at half width;
+    tall questions keep the full-width flow.
+    """
+
+    def __init__(self, geometry: PageGeometry = None, column_gap: float = 20, short_max_height: float = 260):
+        super().__init__(geometry)
+        self.column_gap = column_gap
+        self.short_max_height = short_max_height
+
+    @property
+    def column_width(self) -> float:
+        return (self.g.inner_width - self.column_gap) / 2
+
+    def _is_short(self, block: LayoutBlock) -> bool:
+        return self.block_height(block, self.column_width) <= self.short_max_height
+
+    def plan(self, blocks: List[LayoutBlock]) -> List[Page]:
+        g = self.g
+        pages: List[Page] = [[]]
+        state = {"y": g.height - g.margin, "has_content": False}
+
+        def ensure(needed: float):
+            if state["y"] - needed < g.margin and state["has_content"]:
+                pages.append([])
+                state["y"] = g.height - g.margin
+                state["has_content"] = False
+
+        i = 0
+        while i < len(blocks):
+            block = blocks[i]
+            if not self._is_short(block):
+                for el in block.elements:
+                    ensure(self.needed(el, g.inner_width))
+                    state["y"] = self.emit(el, g.margin, state["y"], g.inner_width, pages[-1])
+                    state["has_content"] = True
+                i += 1
+                continue
+
+            # Row of up to two short blocks
+            row = [block]
+            if i + 1 < len(blocks) and self._is_short(blocks[i + 1]):
+                row.append(blocks[i + 1])
+            ensure(max(self.block_height(b, self.column_width) for b in row))
+
+            row_top = state["y"]
+            row_bottom = row_top
+            for col, row_block in enumerate(row):
+                x = g.margin + col * (self.column_width + self.column_gap)
+                y = row_top
+                for el in row_block.elements:
+                    y = self.emit(el, x, y, self.column_width, pages[-1])
+                row_bottom = min(row_bottom, y)
+            state["y"] = row_bottom
+            state["has_content"] = True
+            i += len(row)
+        return pages
+
+
+@register_layout("compact")
+class CompactLayout(LayoutEngine):
+    """
+    Minimal-page flow: tighter spacing, and an image that would otherwise
+    start a new page is shrunk (down to min_scale) to fit the remaining space.
+    """
+
+    def __init__(self, geometry: PageGeometry = None, min_scale: float = 0.75):
+        super().__init__(geometry or PageGeometry(spacing=10))
+        self.min_scale = min_scale
+
+    def plan(self, blocks: List[LayoutBlock]) -> List[Page]:
+        g = self.g
+        pages: List[Page] = [[]]
+        y = g.height - g.margin
+        page_has_content = False
+
+        for block in blocks:
+            for el in block.elements:
+                scale = 1.0
+                needed = self.needed(el, g.inner_width)
+                if needed and y - needed < g.margin and page_has_content:
+                    if el.kind == "image":
+                        image_h = self.image_size(el, g.inner_width)[1]
+                        room = (y - g.margin) - self._header_height(el) - g.spacing
+                        if room > 0 and room / image_h >= self.min_scale:
+                            scale = room / image_h
+                    if scale == 1.0:
+                        pages.append([])
+                        y = g.height - g.margin
+                        page_has_content = False
+                y = self.emit(el, g.margin, y, g.inner_width, pages[-1], scale=scale)
+                page_has_content = True
+        return pages
+
+
+# =============================================================================
+# Answer key table
+# =============================================================================
+def plan_answer_key(rows: List[Tuple[str, Optional[str]]], geometry: PageGeometry = None) -> List[Page]:
+    """
+    Lays out (label, answer) rows as a numbered table, column-major, four
+    column groups per page. Rows without a text answer show "(see marked version)".
+    """
+    g = geometry or PageGeometry()
+    title_height = 40
+    row_height = 18
+    col_gap = 12
+    cols = 4
+
+    rows_per_page = int((g.inner_height - title_height - row_height) // row_height)
+    per_page = rows_per_page * cols
+    col_width = (g.inner_width - (cols - 1) * col_gap) / cols
+
+    pages: List[Page] = []
+    for page_start in range(0, max(len(rows), 1), per_page):
+        page: Page = []
+        pages.append(page)
+        page_items = rows[page_start:page_start + per_page]
+        rows_in_col = max(1, min(rows_per_page, math.ceil(len(page_items) / cols)))
+
+        page.append(text_op(g.margin, g.height - g.margin - 15, "Answer Key", font="Helvetica-Bold", size=14))
+        top = g.height - g.margin - title_height
+
+        for col in range(cols):
+            x = g.margin + col * (col_width + col_gap)
+            answer_x = x + col_width * 0.45
+            col_items = page_items[col * rows_in_col:(col + 1) * rows_in_col]
+            if not col_items:
+                break
+
+            # Header row
+            page.append(rect_op(x, top - row_height, col_width, row_height, gray=0.9, fill=True))
+            page.append(text_op(x + 4, top - 13, "No.", font="Helvetica-Bold", size=10))
+            page.append(text_op(answer_x, top - 13, "Answer", font="Helvetica-Bold", size=10))
+
+            for r, (label, answer) in enumerate(col_items, start=1):
+                y = top - (r + 1) * row_height
+                page.append(text_op(x + 4, y + 5, label, size=10))
+                if answer:
+                    page.append(text_op(answer_x, y + 5, answer[:12], font="Helvetica-Bold", size=11))
+                else:
+                    page.append(text_op(answer_x, y + 5, "(see marked version)", font="Helvetica-Oblique", size=7))
+
+            # Grid lines
+            bottom = top - (len(col_items) + 1) * row_height
+            page.append(rect_op(x, bottom, col_width, top - bottom, gray=0.6, fill=False))
+            page.append(line_op(answer_x - 4, top, answer_x - 4, bottom, gray=0.6))
+            for r in range(1, len(col_items) + 1):
+                page.append(line_op(x, top - r * row_height, x + col_width, top - r * row_height, gray=0.6))
+
+    return pages
@@ -1,7 +1,9 @@
 # =============================================================================
 # 导入语句 - 标准库
 # =============================================================================
+import asyncio
 import html
+import json
 import os
 import re
 import shutil
@@ -16,12 +18,14 @@ from urllib.parse import quote
 # 导入语句 - 第三方库
 # =============================================================================
 from fastapi import (
+    BackgroundTasks,
     Depends,
     FastAPI,
     File,
     Form,
     HTTPException,
     Query,
+    Request,
     Response,
     UploadFile,
     status
@@ -29,16 +33,22 @@ from fastapi import (
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
 from fastapi.security import OAuth2PasswordRequestForm
-from fastapi.staticfiles import StaticFiles
+from PIL import UnidentifiedImageError
 from sqlalchemy.orm import Session
 
 # =============================================================================
 # 导入语句 - 本地模块
 # =============================================================================
-from . import auth, crud, models, pdf_engine, schemas, utils
+from . import auth, crud, layout, models, pdf_engine, preview_engine, schemas, utils
 from .config import logger, settings
-from .database import SessionLocal, engine, get_db
+from .database import SessionLocal, engine, ensure_indexes, get_db
+from .static_files import CachedStaticFiles
 from .zip_ingest import ZipIngestor
+from .services.artifacts import get_artifact_store
+from .services.derivatives import get_derivative_worker
+from .services.image_executor import ImageExecutorBusy, get_image_executor
+from .services.ingest_batch import batch_spool_path
+from .services.ingest_jobs import get_ingest_job_manager, job_to_dict
 from .services.generator import (
     SmartExamGenerator,
     GeneratorRequest,
@@ -60,6 +70,7 @@ def sanitize_input(text: str) -> str:
     return text[:200].strip()
 
 models.Base.metadata.create_all(bind=engine)
+ensure_indexes()
 
 app = FastAPI()
 
@@ -109,11 +120,48 @@ def init_default_users():
         db.close()
 
 
+def _is_uuid(name: str) -> bool:
+    try:
+        uuid.UUID(name)
+    except ValueError:
+        return False
+    return True
+
+
 # 应用启动时初始化默认用户
 @app.on_event("startup")
 async def startup_event():
     init_default_users()
 
+    # 接管已有的生成文件并启动后台清理
+    store = get_artifact_store()
+    adopted = store.adopt(settings.WORKSHEETS_DIR, patterns=("*.pdf",))
+    # 旧版本遗留: static/<uuid>.pdf 与 static/downloads/<uuid>/<name>.pdf
+    # (只接管按 UUID 命名的生成文件，static/ 下手动放置的 PDF 不受清理影响)
+    adopted += store.adopt(settings.STATIC_DIR, patterns=("*.pdf",), match=lambda p: _is_uuid(p.stem))
+    adopted += store.adopt(
+        settings.STATIC_DIR / "downloads", patterns=("*.pdf",), recursive=True,
+        match=lambda p: _is_uuid(p.parent.name)
+    )
+    adopted += store.adopt(
+        settings.WORKSHEETS_DIR / "previews", patterns=("*.png", preview_engine.MANIFEST_NAME), recursive=True
+    )
+    logger.info(f"Artifact store: adopted {adopted} existing file(s)")
+    store.start_sweeper(settings.ARTIFACT_SWEEP_INTERVAL_SECONDS)
+
+    # 上次未完成的导入任务
+    requeued = get_ingest_job_manager().recover()
+    if requeued:
+        logger.info(f"Ingest jobs: re-queued {requeued} unfinished job(s)")
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    get_artifact_store().stop_sweeper()
+    get_derivative_worker().shutdown(wait=False)
+    get_image_executor().shutdown(wait=False)
+    get_ingest_job_manager().shutdown(wait=False)
+
 
 # CORS Configuration - 从配置文件读取
 app.add_middleware(
@@ -126,8 +174,11 @@ app.add_middleware(
 
 # 静态文件目录 - 从配置文件读取
 STATIC_DIR = str(settings.STATIC_DIR)
+WORKSHEETS_DIR = str(settings.WORKSHEETS_DIR)
+PREVIEWS_DIR = os.path.join(WORKSHEETS_DIR, "previews")
 
-app.mount("/static", StaticFiles(directory=STATIC_DIR), name="static")
+# 内容寻址图片长期缓存 (immutable + ETag)，缩略图按 Accept 协商 WebP
+app.mount("/static", CachedStaticFiles(directory=STATIC_DIR), name="static")
 # app.mount("/", StaticFiles(directory=os.path.join(BASE_DIR, "../frontend"), html=True), name="frontend")
 
 # Dependency
@@ -164,28 +215,68 @@ def delete_tag(tag_id: int, db: Session = Depends(get_db)):
     return {"status": "success"}
 
 # --- 图片上传验证 ---
-async def validate_image(file: UploadFile) -> tuple[bool, str]:
-    """验证图片文件类型和大小"""
-    if file.content_type not in settings.ALLOWED_IMAGE_TYPES:
-        return False, f"不支持的文件类型: {file.content_type}。只允许 JPG/PNG 格式。"
+UPLOAD_CHUNK_SIZE = 64 * 1024
 
-    content = await file.read()
-    await file.seek(0)
 
-    if len(content) > settings.MAX_IMAGE_SIZE:
-        size_mb = len(content) / (1024 * 1024)
-        max_mb = settings.MAX_IMAGE_SIZE / (1024 * 1024)
-        return False, f"文件过大: {size_mb:.2f}MB。最大允许 {max_mb:.0f}MB。"
-
-    return True, ""
+async def read_image_upload(file: UploadFile) -> tuple[Optional[bytearray], str]:
+    """
+    流式读取并验证上传图片，返回 (内容, 错误信息)
 
-async def validate_images(files: List[UploadFile]) -> tuple[bool, str]:
-    """验证多个图片文件"""
+    - 按块读取，超过 MAX_IMAGE_SIZE 立即中止
+    - 按文件头 (magic bytes) 识别真实格式，不信任客户端的 content_type
+    - 只读取一次，返回的缓冲区直接交给拼接/存储代码
+    """
+    max_size = settings.MAX_IMAGE_SIZE
+    max_mb = max_size / (1024 * 1024)
+    if file.size is not None and file.size > max_size:
+        return None, f"文件过大: {file.size / (1024 * 1024):.2f}MB。最大允许 {max_mb:.0f}MB。"
+
+    buffer = bytearray()
+    while True:
+        chunk = await file.read(UPLOAD_CHUNK_SIZE)
+        if not chunk:
+            break
+        buffer += chunk
+        if len(buffer) > max_size:
+            return None, f"文件过大: 超过 {max_mb:.0f}MB 上限。"
+        if len(buffer) == len(chunk):
+            # 第一块: 先识别格式，非图片文件不必读完
+            kind = utils.sniff_image_type(bytes(buffer[:16]))
+            if kind is None:
+                return None, f"无法识别的图片格式 (声明为 {file.content_type})。只允许 JPG/PNG 格式。"
+            if kind not in settings.ALLOWED_IMAGE_TYPES:
+                return None, f"不支持的文件类型: {kind}。只允许 JPG/PNG 格式。"
+
+    if not buffer:
+        return None, "文件为空"
+    return buffer, ""
+
+
+async def read_image_uploads(files: List[UploadFile]) -> tuple[Optional[List[bytearray]], str]:
+    """依次读取并验证多个图片文件"""
+    contents = []
     for file in files:
-        valid, error = await validate_image(file)
-        if not valid:
-            return False, error
-    return True, ""
+        content, error = await read_image_upload(file)
+        if content is None:
+            return None, f"{file.filename}: {error}"
+        contents.append(content)
+    return contents, ""
+
+
+async def run_image_task(fn, *args):
+    """在图片执行器中运行 CPU 任务 (不阻塞事件循环)；排队已满时返回 503"""
+    try:
+        return await get_image_executor().run(fn, *args)
+    except utils.ImageTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except UnidentifiedImageError:
+        raise HTTPException(status_code=400, detail="Cannot decode image")
+    except ImageExecutorBusy:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Image processing is busy, please retry shortly",
+            headers={"Retry-After": "5"},
+        )
 
 # --- Questions API ---
 
@@ -217,39 +308,18 @@ async def create_question(
     tag_name: str = Form(None),     # Level 2
     db: Session = Depends(get_db)
 ):
-    # 0. 验证图片文件
-    valid, error = await validate_images(question_images)
-    if not valid:
+    # 0. 读取并验证图片文件
+    question_bytes, error = await read_image_uploads(question_images)
+    if question_bytes is None:
         raise HTTPException(status_code=400, detail=f"题目图片验证失败: {error}")
 
-    valid, error = await validate_images(answer_images)
-    if not valid:
+    answer_bytes, error = await read_image_uploads(answer_images)
+    if answer_bytes is None:
         raise HTTPException(status_code=400, detail=f"答案图片验证失败: {error}")
 
-    # 1. Save Images
-    # Ensure uploads directory exists
-    uploads_dir = os.path.join(STATIC_DIR, "uploads")
-    os.makedirs(uploads_dir, exist_ok=True)
-
-    def save_stitched_image(files: List[UploadFile]) -> str:
-        # Stitch images
-        stitched_img = utils.stitch_images(files)
-
-        if not stitched_img:
-            return None
-
-        # Generate unique filename (JPEG format)
-        filename = f"{uuid.uuid4()}.jpg"
-        file_path = os.path.join(uploads_dir, filename)
-
-        # Save as JPEG with good quality
-        stitched_img.save(file_path, format="JPEG", quality=92)
-
-        # Return relative path for DB
-        return f"static/uploads/{filename}"
-
-    q_path = save_stitched_image(question_images)
-    a_path = save_stitched_image(answer_images)
+    # 1. Save Images (stitched JPEG, content-addressed, off the event loop)
+    q_path = await run_image_task(utils.stitch_and_store, question_bytes)
+    a_path = await run_image_task(utils.stitch_and_store, answer_bytes)
 
     if not q_path or not a_path:
         raise HTTPException(status_code=400, detail="Failed to process images")
@@ -269,7 +339,11 @@ async def create_question(
     if tag_name:
         tags.append(schemas.TagCreate(name=tag_name, category=tag_category))
 
-    return crud.create_question(db=db, question=question_data, question_image_path=q_path, answer_image_path=a_path, tags=tags)
+    db_question = crud.create_question(db=db, question=question_data, question_image_path=q_path, answer_image_path=a_path, tags=tags)
+
+    # 3. 后台生成图库缩略图
+    get_derivative_worker().submit([q_path, a_path])
+    return db_question
 
 @app.exception_handler(Exception)
 async def debug_exception_handler(request, exc):
@@ -451,33 +525,15 @@ async def upload_single_image(
             detail="Only admins can upload images"
         )
 
-    # 验证图片
-    valid, error = await validate_image(file)
-    if not valid:
+    # 读取并验证图片
+    content, error = await read_image_upload(file)
+    if content is None:
         raise HTTPException(status_code=400, detail=error)
 
-    # 保存图片
-    uploads_dir = os.path.join(STATIC_DIR, "uploads")
-    os.makedirs(uploads_dir, exist_ok=True)
-
-    # 读取内容
-    content = await file.read()
-
-    # 转换为 JPEG 格式
-    from PIL import Image
-    import io
-    img = Image.open(io.BytesIO(content))
-    img = utils._convert_to_rgb(img)
-
-    # 生成唯一文件名
-    filename = f"{uuid.uuid4()}.jpg"
-    file_path = os.path.join(uploads_dir, filename)
-
-    # 保存为 JPEG
-    img.save(file_path, format="JPEG", quality=92)
-
-    relative_path = f"static/uploads/{filename}"
-    return {"filename": filename, "path": relative_path}
+    # 转换为 JPEG 格式并保存 (按内容寻址，重复上传不会重复存储)
+    relative_path = await run_image_task(utils.convert_and_store, content)
+    get_derivative_worker().submit([relative_path])
+    return {"filename": os.path.basename(relative_path), "path": relative_path}
 
 
 @app.post("/api/upload/images")
@@ -501,34 +557,17 @@ async def upload_multiple_images(
     if not files or len(files) == 0:
         raise HTTPException(status_code=400, detail="No files uploaded")
 
-    # 验证所有图片
-    valid, error = await validate_images(files)
-    if not valid:
+    # 读取并验证所有图片
+    image_bytes_list, error = await read_image_uploads(files)
+    if image_bytes_list is None:
         raise HTTPException(status_code=400, detail=error)
 
-    # 读取所有图片内容
-    image_bytes_list = []
-    for file in files:
-        content = await file.read()
-        image_bytes_list.append(content)
-
-    # 拼接图片
-    stitched_img = utils.stitch_images_from_bytes(image_bytes_list)
-    if not stitched_img:
+    # 拼接并保存图片 (JPEG，按内容寻址)
+    relative_path = await run_image_task(utils.stitch_and_store, image_bytes_list)
+    if not relative_path:
         raise HTTPException(status_code=400, detail="Failed to stitch images")
-
-    # 保存拼接后的图片
-    uploads_dir = os.path.join(STATIC_DIR, "uploads")
-    os.makedirs(uploads_dir, exist_ok=True)
-
-    filename = f"{uuid.uuid4()}.jpg"
-    file_path = os.path.join(uploads_dir, filename)
-
-    # 保存为 JPEG
-    stitched_img.save(file_path, format="JPEG", quality=92)
-
-    relative_path = f"static/uploads/{filename}"
-    return {"filename": filename, "path": relative_path}
+    get_derivative_worker().submit([relative_path])
+    return {"filename": os.path.basename(relative_path), "path": relative_path}
 
 
 @app.post("/api/questions/studio", response_model=schemas.Question)
@@ -603,23 +642,64 @@ async def create_question_from_studio(
 
 # --- ZIP Ingestion API ---
 
+def check_zip_upload(files: List[UploadFile], current_user: models.User) -> None:
+    """校验上传权限与文件类型"""
+    # 权限检查：只有 admin 可以上传
+    if current_user.role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only admins can upload ZIP files"
+        )
+
+    # 文件类型检查
+    for file in files:
+        if not file.filename or not file.filename.endswith('.zip'):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="File must be a ZIP archive (.zip)"
+            )
+
+
+def spool_zip_upload(file: UploadFile, current_user: models.User) -> str:
+    """
+    校验权限与文件类型，把上传的 ZIP 写入 spool 目录，返回文件路径
+    (由导入任务在完成后删除)
+    """
+    check_zip_upload([file], current_user)
+
+    with tempfile.NamedTemporaryFile(
+        delete=False, suffix='.zip', prefix='upload_', dir=settings.INGEST_SPOOL_DIR
+    ) as spool_file:
+        # 分块写入，支持大文件
+        shutil.copyfileobj(file.file, spool_file)
+
+    logger.info(f"ZIP Upload: {file.filename} by {current_user.username}")
+    return spool_file.name
+
+
 @app.post("/api/upload")
 async def upload_zip_file(
     file: UploadFile = File(...),
-    db: Session = Depends(get_db),
+    delete_removed: bool = False,
     current_user: models.User = Depends(auth.get_current_user)
 ):
     """
-    上传并处理 ExamSlicer 生成的 ZIP 包
+    上传并处理 ExamSlicer 生成的 ZIP 包 (同步等待导入完成)
+
+    大文件请使用 POST /api/ingest/jobs (立即返回任务 ID，通过 SSE 获取进度)；
+    本接口内部同样经过导入任务队列，只是等待任务完成后再返回结果。
 
     处理流程:
     1. 接收 ZIP 文件
-    2. 解压并读取 config.json 和各题目 JSON
+    2. 直接从 ZIP 读取 config.json 和各题目 JSON (不解压到临时目录)
     3. 校验 Topic/Subtopic 是否在 Syllabus 中存在
     4. 保存图片到 static/uploads 目录
-    5. 写入数据库
+    5. 写入数据库 (按导入台账: 内容未变的包/题目跳过，变化的题目原地更新)
     6. 返回处理结果
 
+    Query 参数:
+    - delete_removed: 重新导入时，删除包中已不存在的题目
+
     响应格式:
     {
         "success": true,
@@ -628,59 +708,38 @@ async def upload_zip_file(
         "errors": [
             {"question": "Q3", "reason": "Topic 'Algbra' not found in syllabus"},
             {"question": "Q5", "reason": "Missing answer image"}
-        ]
+        ],
+        "unchanged_package": false,
+        "inserted_count": 10,
+        "updated_count": 5,
+        "unchanged_count": 0,
+        "deleted_count": 0
     }
     """
-    # 1. 权限检查：只有 admin 可以上传
-    if current_user.role != "admin":
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Only admins can upload ZIP files"
-        )
+    spool_path = spool_zip_upload(file, current_user)
 
-    # 2. 文件类型检查
-    if not file.filename or not file.filename.endswith('.zip'):
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="File must be a ZIP archive (.zip)"
-        )
-
-    # 3. 保存上传的文件到临时目录
-    temp_zip = None
     try:
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.zip') as temp_file:
-            temp_zip = temp_file.name
-            # 分块写入，支持大文件
-            shutil.copyfileobj(file.file, temp_file)
-
-        logger.info(f"ZIP Upload: {file.filename} by {current_user.username}")
-
-        # 4. 处理 ZIP 文件
-        ingestor = ZipIngestor(db=db)
-        result = ingestor.ingest_zip(
-            zip_file_path=temp_zip,
-            original_filename=file.filename
+        job_id, future = get_ingest_job_manager().submit(
+            spool_path,
+            filename=file.filename,
+            created_by=current_user.username,
+            delete_removed=delete_removed
         )
+        result = await asyncio.wrap_future(future)
 
-        # 5. 记录日志
         logger.info(
-            f"Ingestion complete - "
+            f"Ingestion complete (job {job_id}) - "
             f"Processed: {result['processed_count']}, "
             f"Skipped: {result['skipped_count']}, "
             f"Errors: {len(result['errors'])}"
         )
-
-        # 6. 返回结果
-        return {
-            "success": result['success'],
-            "processed_count": result['processed_count'],
-            "skipped_count": result['skipped_count'],
-            "errors": result['errors']
-        }
+        return result
 
     except Exception as e:
         error_msg = str(e)
         logger.error(f"ZIP upload failed: {error_msg}", exc_info=True)
+        if os.path.exists(spool_path):
+            os.unlink(spool_path)
 
         # 返回错误响应（而不是抛出异常，以便前端能获取部分结果）
         return JSONResponse(
@@ -693,24 +752,206 @@ async def upload_zip_file(
             }
         )
 
-    finally:
-        # 清理临时文件
-        if temp_zip and os.path.exists(temp_zip):
-            try:
-                os.unlink(temp_zip)
-            except Exception:
-                pass
+
+@app.post("/api/upload/validate")
+def validate_zip_file(
+    file: UploadFile = File(...),
+    current_user: models.User = Depends(auth.get_current_user)
+):
+    """
+    预检 ExamSlicer ZIP 包 (dry run，不导入)
+
+    只读取 config.json 与 questions/*.json，图片是否存在只查 ZIP 中央目录，
+    对所有题目执行 SyllabusValidator 严格校验；不解压图片，不写数据库和 static/。
+
+    返回与 /api/upload 相同格式的错误报告，另加 dry_run / valid / question_count /
+    source_filename / warnings / elapsed_ms。
+    """
+    check_zip_upload([file], current_user)
+    result = ZipIngestor(db=None).validate_zip(file.file, original_filename=file.filename)
+    logger.info(
+        f"ZIP validation: {file.filename} by {current_user.username} - "
+        f"{result['processed_count']}/{result['question_count']} valid in {result['elapsed_ms']}ms"
+    )
+    return result
 
 
 # 保留旧的端点路径以兼容
 @app.post("/api/v1/ingest/zip")
 async def ingest_zip_file_legacy(
     file: UploadFile = File(...),
-    db: Session = Depends(get_db),
+    delete_removed: bool = False,
     current_user: models.User = Depends(auth.get_current_user)
 ):
     """Legacy endpoint - redirects to /api/upload"""
-    return await upload_zip_file(file=file, db=db, current_user=current_user)
+    return await upload_zip_file(file=file, delete_removed=delete_removed, current_user=current_user)
+
+
+# =============================================================================
+# Ingest Jobs API - 后台导入任务
+# =============================================================================
+
+# SSE: 无新事件时的轮询间隔 / 心跳间隔 (秒)
+SSE_POLL_INTERVAL = 0.25
+SSE_KEEPALIVE_INTERVAL = 15.0
+
+
+@app.post("/api/ingest/jobs", status_code=status.HTTP_202_ACCEPTED)
+async def create_ingest_job(
+    file: UploadFile = File(...),
+    delete_removed: bool = False,
+    current_user: models.User = Depends(auth.get_current_user)
+):
+    """
+    上传 ZIP 包并创建后台导入任务，立即返回任务信息
+
+    进度: GET /api/ingest/jobs/{id}/events (SSE)
+    结果: GET /api/ingest/jobs/{id}
+    """
+    spool_path = spool_zip_upload(file, current_user)
+    job_id, _ = get_ingest_job_manager().submit(
+        spool_path,
+        filename=file.filename,
+        created_by=current_user.username,
+        delete_removed=delete_removed
+    )
+    return {"id": job_id, "filename": file.filename, "status": "queued"}
+
+
+@app.post("/api/ingest/batch", status_code=status.HTTP_202_ACCEPTED)
+async def create_ingest_batch(
+    files: List[UploadFile] = File(...),
+    delete_removed: bool = False,
+    current_user: models.User = Depends(auth.get_current_user)
+):
+    """
+    批量导入: 多个 ZIP 题目包，或包含多个 ZIP 的归档 (如整个考季)
+
+    所有文件作为一个后台任务，多个包并发导入 (INGEST_BATCH_PACKAGES)；
+    进度与结果接口同单个任务，事件带有 "package" 字段，最终结果为按包汇总的报告。
+    """
+    check_zip_upload(files, current_user)
+    names = [os.path.basename(file.filename) for file in files]
+    if len(set(names)) != len(names):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Duplicate file names in batch"
+        )
+
+    spool_dir = tempfile.mkdtemp(prefix='batch_', dir=settings.INGEST_SPOOL_DIR)
+    for index, file in enumerate(files):
+        with open(batch_spool_path(spool_dir, index, file.filename), 'wb') as spool_file:
+            shutil.copyfileobj(file.file, spool_file)
+    logger.info(f"ZIP batch upload: {len(files)} file(s) by {current_user.username}")
+
+    label = names[0] if len(names) == 1 else f"{names[0]} (+{len(names) - 1} more)"
+    job_id, _ = get_ingest_job_manager().submit(
+        spool_dir,
+        filename=label,
+        created_by=current_user.username,
+        delete_removed=delete_removed
+    )
+    return {"id": job_id, "filename": label, "status": "queued", "files": names}
+
+
+@app.get("/api/ingest/jobs")
+def list_ingest_jobs(
+    limit: int = Query(20, ge=1, le=200),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth.get_current_user)
+):
+    """最近的导入任务 (新的在前)"""
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Not authorized")
+    jobs = db.query(models.IngestJob).order_by(models.IngestJob.id.desc()).limit(limit).all()
+    return [job_to_dict(job) for job in jobs]
+
+
+@app.get("/api/ingest/jobs/{job_id}")
+def get_ingest_job(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth.get_current_user)
+):
+    """任务状态与最终结果"""
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Not authorized")
+    job = db.get(models.IngestJob, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Ingest job not found")
+    return job_to_dict(job)
+
+
+@app.get("/api/ingest/jobs/{job_id}/events")
+async def stream_ingest_job_events(
+    job_id: int,
+    request: Request,
+    token: str = Depends(auth.oauth2_scheme)
+):
+    """
+    任务进度 (Server-Sent Events)
+
+    事件: queued, started, progress, error, rows_written, finished (之后关闭连接)；
+    批量任务另有 batch_started, package_finished，各包的事件带有 "package" 字段
+    支持 Last-Event-ID 断线续传。任务的内存事件已清理 (很早的任务或服务重启后) 时，
+    只推送一个包含最终结果的 finished 事件。
+
+    连接可能保持很久: 鉴权和任务快照使用短会话，推送事件前关闭
+    (不用 Depends(get_db)，否则会话会一直占用到连接结束)。
+    """
+    db = SessionLocal()
+    try:
+        current_user = auth.user_from_token(db, token)
+        if current_user.role != "admin":
+            raise HTTPException(status_code=403, detail="Not authorized")
+        job = db.get(models.IngestJob, job_id)
+        if not job:
+            raise HTTPException(status_code=404, detail="Ingest job not found")
+        snapshot = job_to_dict(job)
+    finally:
+        db.close()
+
+    log = get_ingest_job_manager().events(job_id)
+    last_event_id = request.headers.get("last-event-id", "")
+    start = int(last_event_id) + 1 if last_event_id.isdigit() else 0
+
+    def format_event(event_id, event: str, data) -> str:
+        payload = json.dumps(data, ensure_ascii=False)
+        prefix = f"id: {event_id}\n" if event_id is not None else ""
+        return f"{prefix}event: {event}\ndata: {payload}\n\n"
+
+    async def event_stream():
+        if log is None:
+            yield format_event(None, "finished", {
+                "job_id": job_id, "status": snapshot["status"], "result": snapshot["result"]
+            })
+            return
+
+        index = start
+        idle = 0.0
+        while True:
+            events = log.since(index)
+            for event in events:
+                yield format_event(event["id"], event["event"], event["data"])
+                index = event["id"] + 1
+            if log.finished and not log.since(index):
+                return
+            if events:
+                idle = 0.0
+                continue
+            if await request.is_disconnected():
+                return
+            await asyncio.sleep(SSE_POLL_INTERVAL)
+            idle += SSE_POLL_INTERVAL
+            if idle >= SSE_KEEPALIVE_INTERVAL:
+                idle = 0.0
+                yield ": keep-alive\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 # =============================================================================
@@ -827,12 +1068,30 @@ async def reroll_question_endpoint(
 # Worksheet API - 试卷生成
 # =============================================================================
 
+def _render_previews(file_uuid: str, pages) -> None:
+    """后台任务: 根据记录的页面布局生成每页缩略图 (不光栅化 PDF)"""
+    try:
+        paths = preview_engine.render_page_thumbnails(pages, os.path.join(PREVIEWS_DIR, file_uuid))
+        store = get_artifact_store()
+        for path in paths:
+            store.register(path)
+    except Exception as e:
+        logger.error(f"Preview rendering failed for {file_uuid}: {e}", exc_info=True)
+
+
 @app.post("/worksheet/generate")
 async def generate_worksheet_endpoint(
     request: schemas.WorksheetGenerateRequest,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(auth.require_teacher_or_admin)
 ):
+    if request.layout not in layout.available_layouts():
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid layout: {request.layout}. Valid layouts: {layout.available_layouts()}"
+        )
+
     # 1. Fetch questions
     questions = db.query(models.Question).filter(models.Question.id.in_(request.question_ids)).all()
     
@@ -843,44 +1102,105 @@ async def generate_worksheet_endpoint(
     # 2. Generate to unique server file
     file_uuid = str(uuid.uuid4())
     file_id = f"{file_uuid}.pdf"  # File on disk still has .pdf
-    output_path = os.path.join(STATIC_DIR, file_id)
+    output_path = os.path.join(WORKSHEETS_DIR, file_id)
     
-    pdf_engine.generate_worksheet(ordered_questions, output_path, include_answers=request.include_answers)
+    if request.answer_key:
+        pages = pdf_engine.generate_answer_key(ordered_questions, output_path)
+    else:
+        pages = pdf_engine.generate_worksheet(
+            ordered_questions,
+            output_path,
+            include_answers=request.include_answers,
+            layout=request.layout
+        )
+    get_artifact_store().register(output_path)
+    background_tasks.add_task(_render_previews, file_uuid, pages)
     
     # 3. Return ID WITHOUT .pdf suffix (to avoid StaticFiles routing conflict)
     return {"status": "success", "file_id": file_uuid}
 
+@app.post("/worksheet/generate-bundle")
+async def generate_worksheet_bundle_endpoint(
+    request: schemas.WorksheetBundleRequest,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth.require_teacher_or_admin)
+):
+    """
+    一次渲染生成多个版本的试卷 (共享图片解码)
+
+    返回: {"status": "success", "files": {"questions": "<uuid>", "with_answers": "<uuid>", "answers": "<uuid>"}}
+    每个 file_id 均可用于 /worksheet/prepare-download/{file_id}
+    """
+    invalid = [v for v in request.variants if v not in pdf_engine.BUNDLE_VARIANTS]
+    if invalid or not request.variants:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid variants: {invalid}. Valid variants: {list(pdf_engine.BUNDLE_VARIANTS)}"
+        )
+    if request.layout not in layout.available_layouts():
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid layout: {request.layout}. Valid layouts: {layout.available_layouts()}"
+        )
+
+    # 1. Fetch questions
+    questions = db.query(models.Question).filter(models.Question.id.in_(request.question_ids)).all()
+    question_map = {q.id: q for q in questions}
+    ordered_questions = [question_map[qid] for qid in request.question_ids if qid in question_map]
+
+    # 2. One output file per variant
+    file_ids = {variant: str(uuid.uuid4()) for variant in request.variants}
+    outputs = {
+        variant: os.path.join(WORKSHEETS_DIR, f"{file_uuid}.pdf")
+        for variant, file_uuid in file_ids.items()
+    }
+
+    rendered = pdf_engine.generate_worksheet_bundle(ordered_questions, outputs, layout=request.layout)
+    store = get_artifact_store()
+    for variant, pages in rendered.items():
+        store.register(outputs[variant])
+        background_tasks.add_task(_render_previews, file_ids[variant], pages)
+
+    return {"status": "success", "files": file_ids}
+
+def _worksheet_path(file_id: str) -> Optional[str]:
+    """
+    根据 file_id 定位生成的 PDF (兼容旧版本直接存放在 static/ 下的文件)
+    file_id 必须是 UUID，防止路径穿越
+    """
+    file_id = file_id[:-4] if file_id.endswith('.pdf') else file_id
+    try:
+        uuid.UUID(file_id)
+    except ValueError:
+        return None
+
+    for directory in (WORKSHEETS_DIR, STATIC_DIR):
+        path = os.path.join(directory, f"{file_id}.pdf")
+        if os.path.exists(path):
+            return path
+    return None
+
+
 @app.get("/worksheet/prepare-download/{file_id}")
 async def prepare_download_link(file_id: str, name: str = "worksheet.pdf"):
     """
-    Physical rename strategy: copies the file to a new path with the user-friendly filename.
-    Returns a download URL that will serve the file with Content-Disposition header.
+    Returns a download URL that serves the generated file with a user-friendly
+    filename (Content-Disposition header). No copy is made on disk.
     """
-    # Add .pdf extension if missing (file_id is now UUID without .pdf)
-    if not file_id.endswith('.pdf'):
-        file_id = file_id + '.pdf'
-    
-    src_path = os.path.join(STATIC_DIR, file_id)
-    if not os.path.exists(src_path):
+    src_path = _worksheet_path(file_id)
+    if not src_path:
         raise HTTPException(status_code=404, detail="File not found or expired")
+    get_artifact_store().touch(src_path)
     
     # Ensure filename has .pdf extension
     if not name.endswith('.pdf'):
         name = name + '.pdf'
     
-    # Create specific folder for this file to avoid name collisions
-    # Structure: static/downloads/<uuid>/<RealName.pdf>
-    download_dir = os.path.join(STATIC_DIR, "downloads", file_id.replace('.pdf', ''))
-    os.makedirs(download_dir, exist_ok=True)
-    
-    dest_path = os.path.join(download_dir, name)
-    
-    # Copy file (using copy2 to preserve metadata)
-    shutil.copy2(src_path, dest_path)
-    
     # Return URL to the download endpoint (not static files)
     url_name = quote(name)
-    download_url = f"/download-file/{file_id.replace('.pdf', '')}/{url_name}"
+    file_uuid = os.path.basename(src_path).replace('.pdf', '')
+    download_url = f"/download-file/{file_uuid}/{url_name}"
     
     return {"status": "success", "url": download_url}
 
@@ -889,10 +1209,17 @@ async def download_file(uuid: str, filename: str):
     """
     Serve file with Content-Disposition: attachment header to force download.
     """
-    file_path = os.path.join(STATIC_DIR, "downloads", uuid, filename)
-    
-    if not os.path.exists(file_path):
+    file_path = _worksheet_path(uuid)
+
+    # 旧版本: prepare-download 复制到 static/downloads/<uuid>/<filename>
+    if not file_path:
+        legacy_path = os.path.join(STATIC_DIR, "downloads", os.path.basename(uuid), os.path.basename(filename))
+        if os.path.exists(legacy_path):
+            file_path = legacy_path
+
+    if not file_path:
         raise HTTPException(status_code=404, detail="File not found")
+    get_artifact_store().touch(file_path)
     
     return FileResponse(
         path=file_path,
@@ -900,6 +1227,58 @@ async def download_file(uuid: str, filename: str):
         media_type='application/pdf'
     )
 
+
+@app.get("/worksheet/{file_id}/preview")
+async def get_worksheet_preview(file_id: str):
+    """
+    获取试卷的页面缩略图列表
+
+    缩略图在生成 PDF 后由后台任务生成，全部页面写完 (pages.json 存在) 之前 status 为 "pending"
+    返回: {"status": "ready", "pages": 3, "urls": ["/worksheet/<id>/preview/1", ...]}
+    """
+    pdf_path = _worksheet_path(file_id)
+    if not pdf_path:
+        raise HTTPException(status_code=404, detail="File not found or expired")
+    file_uuid = os.path.basename(pdf_path).replace('.pdf', '')
+
+    preview_dir = os.path.join(PREVIEWS_DIR, file_uuid)
+    page_count = preview_engine.read_manifest(preview_dir)
+    if not page_count:
+        return {"status": "pending", "pages": 0, "urls": []}
+    get_artifact_store().touch(os.path.join(preview_dir, preview_engine.MANIFEST_NAME))
+
+    return {
+        "status": "ready",
+        "pages": page_count,
+        "urls": [f"/worksheet/{file_uuid}/preview/{n}" for n in range(1, page_count + 1)]
+    }
+
+
+@app.get("/worksheet/{file_id}/preview/{page}")
+async def get_worksheet_preview_page(file_id: str, page: int):
+    """返回单页缩略图 (PNG)。内容对同一 file_id 不变，允许浏览器长期缓存"""
+    try:
+        uuid.UUID(file_id)
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Preview not found")
+
+    path = os.path.join(PREVIEWS_DIR, file_id, f"page-{page}.png")
+    if not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="Preview not found")
+    get_artifact_store().touch(path)
+
+    return FileResponse(
+        path=path,
+        media_type='image/png',
+        headers={"Cache-Control": f"public, max-age={settings.ARTIFACT_TTL_SECONDS}, immutable"}
+    )
+
+
+@app.get("/api/admin/artifacts")
+async def get_artifact_stats(current_user: models.User = Depends(auth.require_admin)):
+    """生成文件仓库状态: 当前文件数/字节数、过期/淘汰数、回收字节数"""
+    return get_artifact_store().stats()
+
 # Mount frontend at root (must be last to avoid shadowing API routes)
 # 开发模式: 前端由 Vite dev server (port 3000) 单独服务，注释掉下面这行
 # 生产模式: 取消注释并指向 frontend/dist 目录
@@ -1,7 +1,7 @@
 # =============================================================================
 # HaoExam 数据库模型 - Database Models
 # =============================================================================
-from sqlalchemy import Column, ForeignKey, Integer, String, Table, Enum, UniqueConstraint
+from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Integer, String, Table, Enum, UniqueConstraint
 from sqlalchemy.orm import relationship
 from .database import Base
 import enum
@@ -68,8 +68,9 @@ class Question(Base):
     # -------------------------------------------------------------------------
     # 图片路径 (相对于 static 目录)
     # -------------------------------------------------------------------------
-    question_image_path = Column(String, nullable=False)  # 题目图片
-    answer_image_path = Column(String, nullable=False)    # 答案图片
+    # 索引用于图片引用计数 (内容寻址存储中多题可共享同一文件)
+    question_image_path = Column(String, nullable=False, index=True)  # 题目图片
+    answer_image_path = Column(String, nullable=False, index=True)    # 答案图片
 
     # -------------------------------------------------------------------------
     # 数据溯源 (关键字段)
@@ -135,3 +136,64 @@ class Tag(Base):
     category = Column(String, default="custom")          # 分类: "system", "custom", "topic"
 
     questions = relationship("Question", secondary=question_tags, back_populates="tags")
+
+
+# =============================================================================
+# 导入台账 - Ingest Ledger
+# =============================================================================
+class IngestPackage(Base):
+    """
+    已导入的 ZIP 包 (每个 source_filename 一行)
+
+    package_hash 由 ZIP 中央目录 (成员名 / CRC32 / 大小) 计算，无需解压；
+    重新上传内容未变的包时直接跳过。
+    """
+    __tablename__ = "ingest_packages"
+
+    id = Column(Integer, primary_key=True, index=True)
+    source_filename = Column(String, unique=True, index=True, nullable=False)
+    package_hash = Column(String, nullable=False)
+    question_count = Column(Integer, default=0)   # 台账中的题目数 (导入成功的)
+    ingested_at = Column(DateTime, nullable=False)
+
+    questions = relationship("IngestQuestion", back_populates="package", cascade="all, delete-orphan")
+
+
+class IngestQuestion(Base):
+    """包内单个题目的内容哈希 -> 对应的题目行 (用于增量更新)"""
+    __tablename__ = "ingest_questions"
+    __table_args__ = (
+        UniqueConstraint('package_id', 'question_key', name='uq_ingest_question_key'),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    package_id = Column(Integer, ForeignKey('ingest_packages.id', ondelete="CASCADE"), nullable=False)
+    question_key = Column(String, nullable=False)   # 包内题号: "Q1", "Q2"
+    content_hash = Column(String, nullable=False)   # config.json + 题目 JSON + 图片
+    question_id = Column(Integer, ForeignKey('questions.id', ondelete="SET NULL"), index=True)
+
+    package = relationship("IngestPackage", back_populates="questions")
+
+
+# =============================================================================
+# 导入任务 - Ingest Jobs
+# =============================================================================
+class IngestJob(Base):
+    """
+    ZIP 导入任务 (后台执行)
+
+    status: queued -> running -> succeeded / failed
+    result: 完成后的导入结果 (JSON 字符串，格式同 /api/upload 的响应)
+    """
+    __tablename__ = "ingest_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    filename = Column(String, nullable=False)                 # 上传的文件名
+    spool_path = Column(String)                               # 待处理的 ZIP (完成后删除)
+    delete_removed = Column(Boolean, default=False)           # 导入选项
+    status = Column(String, index=True, default="queued")
+    created_by = Column(String)
+    created_at = Column(DateTime, nullable=False)
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
+    result = Column(String)
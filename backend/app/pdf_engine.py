@@ -1,12 +1,13 @@
 import hashlib
 import os
+from typing import Any, Dict, List, Optional
 
-from PIL import Image
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.utils import ImageReader
 from reportlab.pdfgen import canvas
 
 from .config import logger
+from .layout import LayoutBlock, LayoutElement, Page, PageGeometry, get_layout, plan_answer_key
 
 # Monkey-patch hashlib.md5 to support 'usedforsecurity' kwarg ignored in Python 3.7 but used by ReportLab
 if hasattr(hashlib, 'md5'):
@@ -16,150 +17,222 @@ if hasattr(hashlib, 'md5'):
         return _original_md5(*args, **kwargs)
     hashlib.md5 = _patched_md5
 
-def generate_worksheet(questions, output, include_answers: bool = False):
+
+# Bundle variants: questions only / questions + answers / answers only
+VARIANT_QUESTIONS = "questions"
+VARIANT_WITH_ANSWERS = "with_answers"
+VARIANT_ANSWERS = "answers"
+VARIANT_ANSWER_KEY = "answer_key"  # Text answers (MCQ) as a compact table
+BUNDLE_VARIANTS = (VARIANT_QUESTIONS, VARIANT_WITH_ANSWERS, VARIANT_ANSWERS, VARIANT_ANSWER_KEY)
+
+# Placeholder answer_image_path values that never point at a file
+NON_IMAGE_ANSWER_PATHS = ("", "text_answer", "hidden")
+
+
+def _text_answer(q) -> Optional[str]:
+    """Return the MCQ text answer if the question has no answer image."""
+    if (q.answer_image_path or "") in NON_IMAGE_ANSWER_PATHS and getattr(q, "answer_text", None):
+        return q.answer_text
+    return None
+
+
+def _resolve_image_path(img_path: str) -> str:
+    """Resolve a DB image path (relative to backend/) to an absolute path."""
+    if not os.path.isabs(img_path):
+        # Assuming running from backend/
+        # Check if exists relative to CWD
+        if not os.path.exists(img_path):
+            # Try relative to parent (if running from app/)
+            alt_path = os.path.join("..", img_path)
+            if os.path.exists(alt_path):
+                img_path = alt_path
+
+    # Convert to absolute for safety
+    return os.path.abspath(img_path)
+
+
+class ImageCache:
     """
-    Generates a PDF worksheet from a list of Question objects.
-    output: Filename (str) or file-like object (BytesIO)
+    Per-render image cache.
+
+    Each image is opened once and wrapped in a single ImageReader. ReportLab
+    keeps the decoded pixel data on the reader, so every canvas that draws the
+    same reader (e.g. the three PDFs of a bundle) shares one decode.
     """
-    c = canvas.Canvas(output, pagesize=A4)
-    width, height = A4 # 595.27, 841.89 points
 
-    margin = 40
-    label_height = 20  # Height for question label
-    current_y = height - margin
-    available_width = width - 2 * margin
-    available_height = height - 2 * margin - label_height  # Max height for image on a single page
-    page_has_content = False  # Track if current page has any content
+    def __init__(self):
+        self._readers: Dict[str, Optional[ImageReader]] = {}
 
-    for i, q in enumerate(questions):
-        # 1. Process Question Image
-        img_path = q.question_image_path
-
-        # Resolve to absolute path
-        if not os.path.isabs(img_path):
-             # Assuming running from backend/
-             # Check if exists relative to CWD
-             if not os.path.exists(img_path):
-                 # Try relative to parent (if running from app/)
-                 alt_path = os.path.join("..", img_path)
-                 if os.path.exists(alt_path):
-                     img_path = alt_path
-
-        # Convert to absolute for safety
-        img_path = os.path.abspath(img_path)
+    def get(self, img_path: str) -> Optional[ImageReader]:
+        """Return the shared ImageReader for a DB path, or None if missing."""
+        abs_path = _resolve_image_path(img_path)
+        if abs_path not in self._readers:
+            if not os.path.exists(abs_path):
+                logger.warning(f"Image not found: {abs_path}")
+                self._readers[abs_path] = None
+            else:
+                self._readers[abs_path] = ImageReader(abs_path)
+        return self._readers[abs_path]
+
+
+def _question_label(index: int, q) -> str:
+    label = f"Q{index} [ID: {q.id}]"
+    if q.question_number:
+        label += f" ({q.question_number})"
+    return label
+
+
+def _image_element(images: ImageCache, path: str, **kwargs) -> Optional[LayoutElement]:
+    """Image element sized from the file header (no decoding); None if missing."""
+    reader = images.get(path)
+    if reader is None:
+        return None
+    return LayoutElement(kind="image", path=reader.fileName, size=reader.getSize(), **kwargs)
 
-        if not os.path.exists(img_path):
-            logger.warning(f"Image not found: {img_path}")
-            # Draw placeholder text
-            c.drawString(margin, current_y - 20, f"Q{i+1}: Image not found")
-            current_y -= 40
-            page_has_content = True
-            continue
 
+def build_blocks(questions, images: ImageCache, variant: str) -> List[LayoutBlock]:
+    """Turn questions into layout blocks for one variant."""
+    show_questions = variant in (VARIANT_QUESTIONS, VARIANT_WITH_ANSWERS)
+    show_answers = variant in (VARIANT_WITH_ANSWERS, VARIANT_ANSWERS)
+    blocks = []
+
+    for i, q in enumerate(questions):
+        block = LayoutBlock()
+        blocks.append(block)
+        label = _question_label(i + 1, q)
         try:
-            # Open with PIL first to verify and handle format
-            with Image.open(img_path) as pil_img:
-                img_w, img_h = pil_img.size
-                aspect = img_h / float(img_w)
-
-                # Scale to fit width first
-                display_w = available_width
-                display_h = display_w * aspect
-
-                # If image is too tall, scale down to fit available height
-                if display_h > available_height:
-                    display_h = available_height
-                    display_w = display_h / aspect
-
-                # Calculate total space needed (label + image + spacing)
-                total_needed = label_height + display_h + 20
-
-                # Check if it fits on current page
-                if current_y - total_needed < margin:
-                    # Only create new page if current page has content
-                    if page_has_content:
-                        c.showPage()
-                        current_y = height - margin
-                        page_has_content = False
-
-                # Add Question Number/Label
-                label = f"Q{i+1} [ID: {q.id}]"
-                if q.question_number:
-                    label += f" ({q.question_number})"
-                c.drawString(margin, current_y - 15, label)
-                current_y -= label_height
-
-                # Use ImageReader for ReportLab
-                # This isolates ReportLab from file I/O issues
-                img_reader = ImageReader(pil_img)
-
-                # Draw Image
-                c.drawImage(img_reader, margin, current_y - display_h, width=display_w, height=display_h)
-
-                current_y -= (display_h + 20) # Add spacing
-                page_has_content = True
-            
+            # 1. Process Question Image
+            if show_questions:
+                element = _image_element(images, q.question_image_path, label=label)
+                if element is None:
+                    # Draw placeholder text
+                    block.elements.append(LayoutElement(kind="placeholder", text=f"Q{i+1}: Image not found"))
+                    continue
+                block.elements.append(element)
+
             # 2. Process Answer (if requested)
-            if include_answers and q.answer_image_path:
-                ans_path = q.answer_image_path
-
-                # Resolve path
-                if not os.path.isabs(ans_path):
-                    if not os.path.exists(ans_path):
-                        alt_path = os.path.join("..", ans_path)
-                        if os.path.exists(alt_path):
-                            ans_path = alt_path
-
-                ans_path = os.path.abspath(ans_path)
-
-                if os.path.exists(ans_path):
-                    # Draw "--- Answer ---" separator
-                    separator_height = 25
-
-                    with Image.open(ans_path) as ans_pil:
-                        ans_w, ans_h = ans_pil.size
-                        ans_aspect = ans_h / float(ans_w)
-
-                        ans_display_w = available_width
-                        ans_display_h = ans_display_w * ans_aspect
-
-                        # If answer image is too tall, scale down to fit
-                        if ans_display_h > available_height - separator_height:
-                            ans_display_h = available_height - separator_height
-                            ans_display_w = ans_display_h / ans_aspect
-
-                        # Check if separator + answer fits
-                        total_ans_needed = separator_height + ans_display_h + 20
-                        if current_y - total_ans_needed < margin:
-                            if page_has_content:
-                                c.showPage()
-                                current_y = height - margin
-                                page_has_content = False
-
-                        # Draw separator line and text
-                        c.setStrokeColorRGB(0.4, 0.4, 0.4)
-                        c.setFillColorRGB(0.4, 0.4, 0.4)
-                        line_y = current_y - 12
-                        c.line(margin, line_y, margin + 60, line_y)
-                        c.setFont("Helvetica-Bold", 10)
-                        c.drawString(margin + 65, line_y - 4, "Answer")
-                        c.line(margin + 110, line_y, width - margin, line_y)
-                        c.setFont("Helvetica", 12)  # Reset font
-                        c.setFillColorRGB(0, 0, 0)  # Reset color
-                        current_y -= separator_height
-
-                        ans_reader = ImageReader(ans_pil)
-                        c.drawImage(ans_reader, margin, current_y - ans_display_h, width=ans_display_w, height=ans_display_h)
-                        current_y -= (ans_display_h + 20)
-                        page_has_content = True
+            text_answer = _text_answer(q) if show_answers else None
+            if text_answer:
+                # MCQ: no image lookup for text answers
+                if show_questions:
+                    block.elements.append(LayoutElement(kind="text", text=text_answer, separator=True))
+                else:
+                    block.elements.append(LayoutElement(kind="text", text=text_answer, label=label))
+            elif show_answers and q.answer_image_path and q.answer_image_path not in NON_IMAGE_ANSWER_PATHS:
+                if show_questions:
+                    element = _image_element(images, q.answer_image_path, separator=True)
+                else:
+                    element = _image_element(images, q.answer_image_path, label=label)
+                if element is not None:
+                    block.elements.append(element)
+                elif not show_questions:
+                    block.elements.append(LayoutElement(kind="placeholder", text=f"Q{i+1}: Answer not found"))
 
         except Exception as e:
             logger.error(f"Error processing image for Q{q.id}: {e}")
-            c.drawString(margin, current_y - 20, f"Error loading Q{i+1}")
-            current_y -= 40
+            block.elements = [LayoutElement(kind="placeholder", text=f"Error loading Q{i+1}")]
+
+    return blocks
+
+
+def plan_worksheet(questions, variant: str, images: ImageCache = None, layout: str = "flow") -> List[Page]:
+    """Compute the page plan for one variant from image dimensions alone."""
+    if variant == VARIANT_ANSWER_KEY:
+        rows = [(f"Q{i}", getattr(q, "answer_text", None)) for i, q in enumerate(questions, start=1)]
+        return plan_answer_key(rows)
+    blocks = build_blocks(questions, images or ImageCache(), variant)
+    return get_layout(layout).plan(blocks)
+
+
+def _draw_pages(output, pages: List[Page], images: ImageCache):
+    """Execute a page plan on a new canvas and save it."""
+    c = canvas.Canvas(output, pagesize=(PageGeometry.width, PageGeometry.height))
+
+    for page_no, ops in enumerate(pages):
+        if page_no:
+            c.showPage()
+        for op in ops:
+            kind = op["op"]
+            if kind == "text":
+                c.setFont(op["font"], op["size"])
+                c.setFillColorRGB(op["gray"], op["gray"], op["gray"])
+                c.drawString(op["x"], op["y"], op["text"])
+                c.setFillColorRGB(0, 0, 0)
+            elif kind == "line":
+                c.setStrokeColorRGB(op["gray"], op["gray"], op["gray"])
+                c.line(op["x1"], op["y1"], op["x2"], op["y2"])
+                c.setStrokeColorRGB(0, 0, 0)
+            elif kind == "rect":
+                if op["fill"]:
+                    c.setFillColorRGB(op["gray"], op["gray"], op["gray"])
+                else:
+                    c.setStrokeColorRGB(op["gray"], op["gray"], op["gray"])
+                c.rect(op["x"], op["y"], op["w"], op["h"], stroke=0 if op["fill"] else 1, fill=1 if op["fill"] else 0)
+                c.setFillColorRGB(0, 0, 0)
+                c.setStrokeColorRGB(0, 0, 0)
+            elif kind == "image":
+                try:
+                    c.drawImage(images.get(op["path"]), op["x"], op["y"], width=op["w"], height=op["h"])
+                except Exception as e:
+                    logger.error(f"Error drawing image {op['path']}: {e}")
+                    c.setFont("Helvetica", 12)
+                    c.drawString(op["x"], op["y"] + op["h"] - 20, "Error loading image")
 
     try:
         c.save()
     except Exception as e:
         logger.error(f"PDF Save Error: {e}", exc_info=True)
         raise e
+
+
+def generate_worksheet(
+    questions,
+    output,
+    include_answers: bool = False,
+    images: ImageCache = None,
+    layout: str = "flow"
+) -> List[Page]:
+    """
+    Generates a PDF worksheet from a list of Question objects.
+    output: Filename (str) or file-like object (BytesIO)
+    images: optional ImageCache shared with other renders of the same questions
+    layout: layout engine name (see layout.available_layouts())
+    Returns the page plan (see preview_engine.render_page_thumbnails).
+    """
+    images = images or ImageCache()
+    variant = VARIANT_WITH_ANSWERS if include_answers else VARIANT_QUESTIONS
+    pages = plan_worksheet(questions, variant, images, layout)
+    _draw_pages(output, pages, images)
+    return pages
+
+
+def generate_answer_key(questions, output) -> List[Page]:
+    """
+    Generates a compact answer-key PDF: all answers in a numbered table.
+    Text answers (MCQ) need no image lookups, so this is cheap to render.
+    """
+    pages = plan_worksheet(questions, VARIANT_ANSWER_KEY)
+    _draw_pages(output, pages, ImageCache())
+    return pages
+
+
+def generate_worksheet_bundle(questions, outputs: Dict[str, Any], layout: str = "flow") -> Dict[str, List[Page]]:
+    """
+    Renders several worksheet variants in one pass with a shared ImageCache.
+
+    outputs: {variant: filename or file-like}, variant in BUNDLE_VARIANTS
+    Returns {variant: page plan} for the rendered variants (in BUNDLE_VARIANTS order).
+    """
+    unknown = set(outputs) - set(BUNDLE_VARIANTS)
+    if unknown:
+        raise ValueError(f"Unknown worksheet variant(s): {sorted(unknown)}")
+
+    images = ImageCache()
+    rendered = {}
+    for variant in BUNDLE_VARIANTS:
+        if variant not in outputs:
+            continue
+        pages = plan_worksheet(questions, variant, images, layout)
+        _draw_pages(outputs[variant], pages, images)
+        rendered[variant] = pages
+    return rendered
@@ -0,0 +1,120 @@
+import json
+import os
+from typing import Any, Dict, List, Tuple
+
+from PIL import Image, ImageDraw
+from reportlab.lib.pagesizes import A4
+
+from .config import logger
+
+# Thumbnail width in pixels (A4 aspect ratio is kept)
+THUMBNAIL_WIDTH = 240
+
+# Written after the last page: {"pages": N}. Previews are complete only once it exists.
+MANIFEST_NAME = "pages.json"
+
+
+class _ScaledImageCache:
+    """
+    Pre-scaled source images for one thumbnail run.
+
+    JPEGs are decoded at reduced size via Image.draft() (DCT scaling), so a
+    full-resolution decode never happens for a thumbnail.
+    """
+
+    def __init__(self):
+        self._images: Dict[Tuple[str, int, int], Image.Image] = {}
+
+    def get(self, path: str, size: Tuple[int, int]) -> Image.Image:
+        key = (path, size[0], size[1])
+        if key not in self._images:
+            with Image.open(path) as img:
+                img.draft("RGB", size)
+                if img.mode not in ("RGB", "L"):
+                    img = img.convert("RGB")
+                self._images[key] = img.resize(size, Image.BILINEAR)
+        return self._images[key]
+
+
+def render_page_thumbnails(
+    pages: List[List[Dict[str, Any]]],
+    output_dir: str,
+    width: int = THUMBNAIL_WIDTH
+) -> List[str]:
+    """
+    Composes one low-resolution PNG per page from a layout page plan (the
+    same plan pdf_engine draws), without rasterizing the PDF.
+
+    Each file is written under a temporary name and moved into place, and
+    pages.json (the page count) is written last, so readers never see a
+    partial page or an incomplete set.
+
+    Returns the list of written file paths (page-1.png, page-2.png, ...,
+    pages.json).
+    """
+    page_w, page_h = A4
+    scale = width / page_w
+    height = int(round(page_h * scale))
+
+    os.makedirs(output_dir, exist_ok=True)
+    images = _ScaledImageCache()
+    written = []
+
+    def to_px(x: float, y: float) -> Tuple[int, int]:
+        # PDF origin is bottom-left, PIL origin is top-left
+        return int(round(x * scale)), int(round((page_h - y) * scale))
+
+    def shade(gray: float) -> Tuple[int, int, int]:
+        v = int(gray * 255)
+        return (v, v, v)
+
+    for page_no, ops in enumerate(pages, start=1):
+        thumb = Image.new("RGB", (width, height), (255, 255, 255))
+        draw = ImageDraw.Draw(thumb)
+
+        for op in ops:
+            kind = op["op"]
+            try:
+                if kind == "image":
+                    left, top = to_px(op["x"], op["y"] + op["h"])
+                    size = (max(1, int(round(op["w"] * scale))), max(1, int(round(op["h"] * scale))))
+                    thumb.paste(images.get(op["path"], size), (left, top))
+                elif kind == "text":
+                    # Text is unreadable at this size: draw a bar of the same extent
+                    left, baseline = to_px(op["x"], op["y"])
+                    bar_h = max(1, int(op["size"] * scale * 0.6))
+                    bar_w = max(1, int(len(op["text"]) * op["size"] * 0.5 * scale))
+                    draw.rectangle([left, baseline - bar_h, left + bar_w, baseline], fill=shade(max(op["gray"], 0.35)))
+                elif kind == "line":
+                    draw.line([to_px(op["x1"], op["y1"]), to_px(op["x2"], op["y2"])], fill=shade(op["gray"]))
+                elif kind == "rect":
+                    left, top = to_px(op["x"], op["y"] + op["h"])
+                    right, bottom = to_px(op["x"] + op["w"], op["y"])
+                    if op["fill"]:
+                        draw.rectangle([left, top, right, bottom], fill=shade(op["gray"]))
+                    else:
+                        draw.rectangle([left, top, right, bottom], outline=shade(op["gray"]))
+            except Exception as e:
+                logger.warning(f"Thumbnail op failed on page {page_no}: {e}")
+
+        path = os.path.join(output_dir, f"page-{page_no}.png")
+        thumb.save(path + ".tmp", format="PNG", optimize=True)
+        os.replace(path + ".tmp", path)
+        written.append(path)
+
+    manifest = os.path.join(output_dir, MANIFEST_NAME)
+    with open(manifest + ".tmp", "w") as f:
+        json.dump({"pages": len(written)}, f)
+    os.replace(manifest + ".tmp", manifest)
+    written.append(manifest)
+
+    return written
+
+
+def read_manifest(output_dir: str) -> int:
+    """Page count of a finished preview set, 0 while rendering (or if missing)."""
+    try:
+        with open(os.path.join(output_dir, MANIFEST_NAME)) as f:
+            return int(json.load(f)["pages"])
+    except (OSError, ValueError, KeyError, TypeError):
+        return 0
@@ -1,9 +1,10 @@
 # =============================================================================
 # Pydantic Schemas - API 请求/响应模型
 # =============================================================================
-from typing import Any, List, Optional, Union
-from pydantic import BaseModel, field_validator
+from typing import Any, Dict, List, Optional, Union
+from pydantic import BaseModel, computed_field, field_validator
 from .models import DifficultyLevel
+from .services.derivatives import derivative_urls
 
 
 # =============================================================================
@@ -88,6 +89,12 @@ class Question(QuestionBase):
     class Config:
         from_attributes = True
 
+    @computed_field
+    @property
+    def question_image_derivatives(self) -> Dict[str, Dict[str, str]]:
+        """图库缩略图 URL: {"small": {"webp": ..., "jpeg": ...}, "medium": {...}} (按路径计算，不访问文件系统)"""
+        return derivative_urls(self.question_image_path)
+
     @field_validator('subtopic', mode='before')
     @classmethod
     def parse_subtopic(cls, v):
@@ -127,6 +134,15 @@ class Question(QuestionBase):
 class WorksheetGenerateRequest(BaseModel):
     question_ids: List[int]
     include_answers: bool = False
+    answer_key: bool = False  # 仅生成答案表 (选择题文本答案)
+    layout: str = "flow"      # 排版方式: flow / two_column / compact
+
+
+class WorksheetBundleRequest(BaseModel):
+    """一次渲染多个版本 (题目卷 / 带答案卷 / 答案卷)"""
+    question_ids: List[int]
+    variants: List[str] = ["questions", "with_answers", "answers"]
+    layout: str = "flow"
 
 
 # =============================================================================
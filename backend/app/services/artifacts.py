@@ -0,0 +1,252 @@
+# =============================================================================
+# Artifact Store - 生成文件管理服务
+# =============================================================================
+"""
+管理生成的临时文件 (试卷 PDF、预览图等)
+
+- 每个文件有独立 TTL，过期后由后台清理线程删除
+- 总大小超过上限时按 LRU (最近最少访问) 淘汰
+- 记录清理指标 (删除文件数、回收字节数)
+"""
+
+import os
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from ..config import logger, settings
+
+
+@dataclass
+class Artifact:
+    """单个受管文件"""
+    path: str
+    size: int
+    expires_at: float
+    last_access: float
+
+
+class ArtifactStore:
+    """
+    带 TTL 和容量上限的生成文件仓库
+
+    文件本身仍放在 static 目录下，仓库只维护元数据 (内存索引)。
+    启动时通过 adopt() 接管磁盘上已有的文件，以其 mtime 作为创建时间。
+    """
+
+    def __init__(self, default_ttl: float, max_bytes: int):
+        self.default_ttl = default_ttl
+        self.max_bytes = max_bytes
+
+        self._lock = threading.Lock()
+        self._artifacts: Dict[str, Artifact] = {}
+        self._total_bytes = 0
+
+        self._sweeper: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+
+        # 清理指标
+        self.metrics: Dict[str, Any] = {
+            "files_registered": 0,
+            "files_expired": 0,
+            "files_evicted": 0,
+            "bytes_reclaimed": 0,
+            "sweeps": 0,
+            "last_sweep_at": None,
+        }
+
+    # -------------------------------------------------------------------------
+    # 注册 / 访问
+    # -------------------------------------------------------------------------
+    def register(self, path: str, ttl: float = None) -> None:
+        """登记一个新生成的文件，超出容量上限时立即淘汰旧文件"""
+        path = os.path.abspath(path)
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            logger.warning(f"Artifact not found on register: {path}")
+            return
+
+        if size > self.max_bytes:
+            logger.warning(f"Artifact larger than the store cap ARTIFACT_MAX_MB ({size} > {self.max_bytes} bytes): {path}")
+
+        now = time.time()
+        with self._lock:
+            self._put(Artifact(
+                path=path,
+                size=size,
+                expires_at=now + (ttl if ttl is not None else self.default_ttl),
+                last_access=now,
+            ))
+            self.metrics["files_registered"] += 1
+            if self._total_bytes > self.max_bytes:
+                # 刚登记的文件不参与淘汰 (调用方马上要返回它)
+                self._evict_lru(keep=path)
+
+    def touch(self, path: str) -> bool:
+        """记录一次访问 (用于 LRU)，返回文件是否仍受管"""
+        path = os.path.abspath(path)
+        with self._lock:
+            artifact = self._artifacts.get(path)
+            if artifact is None:
+                return False
+            artifact.last_access = time.time()
+            return True
+
+    def adopt(
+        self,
+        directory: Path,
+        patterns: Iterable[str] = ("*",),
+        recursive: bool = False,
+        match: Optional[Callable[[Path], bool]] = None
+    ) -> int:
+        """
+        接管目录中已存在的文件 (进程重启后恢复索引)，返回接管数量
+
+        match: 给出时只接管其返回 True 的文件 (接管的文件会被过期清理删除)
+        """
+        directory = Path(directory)
+        if not directory.exists():
+            return 0
+
+        count = 0
+        with self._lock:
+            for pattern in patterns:
+                matches = directory.rglob(pattern) if recursive else directory.glob(pattern)
+                for file_path in matches:
+                    if not file_path.is_file() or (match and not match(file_path)):
+                        continue
+                    path = str(file_path.resolve())
+                    if path in self._artifacts:
+                        continue
+                    stat = file_path.stat()
+                    self._put(Artifact(
+                        path=path,
+                        size=stat.st_size,
+                        expires_at=stat.st_mtime + self.default_ttl,
+                        last_access=stat.st_mtime,
+                    ))
+                    count += 1
+        return count
+
+    # -------------------------------------------------------------------------
+    # 清理
+    # -------------------------------------------------------------------------
+    def sweep(self, now: float = None) -> Dict[str, int]:
+        """删除过期文件，再按 LRU 淘汰到容量上限以内"""
+        now = now or time.time()
+        with self._lock:
+            expired = [a for a in self._artifacts.values() if a.expires_at <= now]
+            reclaimed = 0
+            for artifact in expired:
+                reclaimed += self._remove(artifact)
+            self.metrics["files_expired"] += len(expired)
+
+            evicted, evicted_bytes = self._evict_lru()
+
+            self.metrics["bytes_reclaimed"] += reclaimed
+            self.metrics["sweeps"] += 1
+            self.metrics["last_sweep_at"] = now
+
+        if expired or evicted:
+            logger.info(
+                f"Artifact sweep: {len(expired)} expired, {evicted} evicted, "
+                f"{reclaimed + evicted_bytes} bytes reclaimed"
+            )
+        return {"expired": len(expired), "evicted": evicted, "bytes_reclaimed": reclaimed + evicted_bytes}
+
+    def start_sweeper(self, interval: float) -> None:
+        """启动后台清理线程 (守护线程)"""
+        if self._sweeper and self._sweeper.is_alive():
+            return
+        self._stop_event.clear()
+
+        def _loop():
+            while not self._stop_event.wait(interval):
+                try:
+                    self.sweep()
+                except Exception as e:
+                    logger.error(f"Artifact sweep failed: {e}", exc_info=True)
+
+        self._sweeper = threading.Thread(target=_loop, name="artifact-sweeper", daemon=True)
+        self._sweeper.start()
+
+    def stop_sweeper(self) -> None:
+        self._stop_event.set()
+        if self._sweeper:
+            self._sweeper.join(timeout=5)
+            self._sweeper = None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self.metrics,
+                "current_files": len(self._artifacts),
+                "current_bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "default_ttl": self.default_ttl,
+            }
+
+    # -------------------------------------------------------------------------
+    # 内部方法 (调用方需持有锁)
+    # -------------------------------------------------------------------------
+    def _put(self, artifact: Artifact) -> None:
+        previous = self._artifacts.get(artifact.path)
+        if previous:
+            self._total_bytes -= previous.size
+        self._artifacts[artifact.path] = artifact
+        self._total_bytes += artifact.size
+
+    def _evict_lru(self, keep: Optional[str] = None) -> tuple:
+        if self._total_bytes <= self.max_bytes:
+            return 0, 0
+        evicted = 0
+        reclaimed = 0
+        candidates: List[Artifact] = sorted(self._artifacts.values(), key=lambda a: a.last_access)
+        for artifact in candidates:
+            if self._total_bytes <= self.max_bytes:
+                break
+            if artifact.path == keep:
+                continue
+            reclaimed += self._remove(artifact)
+            evicted += 1
+        self.metrics["files_evicted"] += evicted
+        self.metrics["bytes_reclaimed"] += reclaimed
+        return evicted, reclaimed
+
+    def _remove(self, artifact: Artifact) -> int:
+        self._artifacts.pop(artifact.path, None)
+        self._total_bytes -= artifact.size
+        try:
+            os.remove(artifact.path)
+        except FileNotFoundError:
+            return 0
+        except OSError as e:
+            logger.warning(f"Failed to remove artifact {artifact.path}: {e}")
+            return 0
+
+        # 删除空的父目录 (如 downloads/<uuid>/、previews/<uuid>/)
+        parent = os.path.dirname(artifact.path)
+        if os.path.basename(os.path.dirname(parent)) in ("downloads", "previews"):
+            try:
+                os.rmdir(parent)
+            except OSError:
+                pass
+        return artifact.size
+
+
+# 全局单例 (延迟初始化)
+_store_instance: Optional[ArtifactStore] = None
+
+
+def get_artifact_store() -> ArtifactStore:
+    """获取全局 ArtifactStore 单例"""
+    global _store_instance
+    if _store_instance is None:
+        _store_instance = ArtifactStore(
+            default_ttl=settings.ARTIFACT_TTL_SECONDS,
+            max_bytes=settings.ARTIFACT_MAX_BYTES,
+        )
+    return _store_instance
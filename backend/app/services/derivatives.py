@@ -0,0 +1,210 @@
+# =============================================================================
+# Image Derivatives - 图库缩略图 (小图 / 中图, WebP + JPEG)
+# =============================================================================
+"""
+为题目图片生成用于图库展示的缩小版本
+
+- 路径: static/derivatives/<size>/<key[0:2]>/<key[2:4]>/<key>.<webp|jpg>
+- key: 内容寻址图片直接使用文件名中的 SHA-256；旧路径使用路径字符串的哈希
+  (不读文件即可算出 URL)
+- 原图只解码一次 (JPEG 使用 draft 按比例缩小解码)，再依次缩放输出各尺寸
+- 由后台线程池生成，不阻塞上传请求
+"""
+
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from PIL import Image
+
+from ..config import logger, settings
+
+# 尺寸名 -> 最大宽度 (像素)，按从大到小生成
+DERIVATIVE_SIZES: Dict[str, int] = {
+    "medium": 800,
+    "small": 320,
+}
+
+# 格式名 -> (文件扩展名, PIL 格式, 保存参数)
+DERIVATIVE_FORMATS = {
+    "webp": (".webp", "WEBP", {"quality": 75, "method": 4}),
+    "jpeg": (".jpg", "JPEG", {"quality": 80, "optimize": True, "progressive": True}),
+}
+
+_SHA256_RE = re.compile(r"^[0-9a-f]{64}$")
+
+
+# =============================================================================
+# 路径
+# =============================================================================
+def derivative_key(relative_path: str) -> str:
+    """原图路径 -> 派生图 key"""
+    stem = Path(relative_path).stem
+    if _SHA256_RE.match(stem):
+        return stem
+    return hashlib.sha256(relative_path.encode("utf-8")).hexdigest()
+
+
+def derivative_path(relative_path: str, size: str, fmt: str) -> str:
+    """派生图相对路径 (相对于 backend/)"""
+    key = derivative_key(relative_path)
+    ext = DERIVATIVE_FORMATS[fmt][0]
+    full = settings.DERIVATIVES_DIR / size / key[0:2] / key[2:4] / f"{key}{ext}"
+    return full.relative_to(settings.BASE_DIR).as_posix()
+
+
+def derivative_urls(relative_path: Optional[str]) -> Dict[str, Dict[str, str]]:
+    """
+    派生图 URL: {"small": {"webp": "/static/...", "jpeg": ...}, "medium": {...}}
+
+    只根据路径计算，不检查文件是否已生成 (列表接口每题都会调用，不做文件系统访问)；
+    尚未生成时请求返回 404，前端回退到原图。非图片路径返回空字典。
+    """
+    if not relative_path or not relative_path.startswith("static/"):
+        return {}
+    return {
+        size: {fmt: "/" + derivative_path(relative_path, size, fmt) for fmt in DERIVATIVE_FORMATS}
+        for size in DERIVATIVE_SIZES
+    }
+
+
+# =============================================================================
+# 生成 / 删除
+# =============================================================================
+def _save_atomic(img: Image.Image, dest: Path, pil_format: str, save_kwargs: dict) -> int:
+    """写入同目录临时文件后原子重命名，返回文件大小"""
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=dest.parent, prefix=".incoming_")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            img.save(out, format=pil_format, **save_kwargs)
+        os.replace(temp_path, dest)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return dest.stat().st_size
+
+
+def generate_derivatives(relative_path: str, overwrite: bool = False) -> int:
+    """
+    为一张原图生成所有尺寸/格式的派生图
+
+    已存在的派生图默认跳过；原图不比目标尺寸大时不放大。
+    返回新写入的字节数。
+    """
+    source = settings.BASE_DIR / relative_path
+    targets = {
+        (size, fmt): settings.BASE_DIR / derivative_path(relative_path, size, fmt)
+        for size in DERIVATIVE_SIZES
+        for fmt in DERIVATIVE_FORMATS
+    }
+    if not overwrite and all(p.exists() for p in targets.values()):
+        return 0
+
+    # utils 导入 image_store，后者导入本模块: 在此处导入以避免循环
+    from ..utils import _convert_to_rgb
+
+    written = 0
+    with Image.open(source) as img:
+        # JPEG: 直接按最大目标尺寸缩小解码
+        largest = max(DERIVATIVE_SIZES.values())
+        img.draft("RGB", (largest, largest * img.height // max(img.width, 1)))
+        # 透明区域合成到白底 (与上传存储一致)
+        current = _convert_to_rgb(img)
+        if current is img:
+            current = img.copy()
+
+    for size, max_width in DERIVATIVE_SIZES.items():
+        if current.width > max_width:
+            height = max(1, round(current.height * max_width / current.width))
+            current = current.resize((max_width, height), Image.LANCZOS)
+        for fmt, (_, pil_format, save_kwargs) in DERIVATIVE_FORMATS.items():
+            dest = targets[(size, fmt)]
+            if dest.exists() and not overwrite:
+                continue
+            written += _save_atomic(current, dest, pil_format, save_kwargs)
+
+    return written
+
+
+def link_derivatives(old_path: str, new_path: str) -> None:
+    """原图换了路径但画面不变时 (迁移/重新压缩)，沿用已有派生图 (硬链接，失败则复制)"""
+    for size in DERIVATIVE_SIZES:
+        for fmt in DERIVATIVE_FORMATS:
+            src = settings.BASE_DIR / derivative_path(old_path, size, fmt)
+            dest = settings.BASE_DIR / derivative_path(new_path, size, fmt)
+            if not src.exists() or dest.exists():
+                continue
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            try:
+                os.link(src, dest)
+            except OSError:
+                shutil.copy2(src, dest)
+
+
+def remove_derivatives(relative_path: str) -> None:
+    """删除一张原图的所有派生图 (原图被回收时调用)"""
+    for size in DERIVATIVE_SIZES:
+        for fmt in DERIVATIVE_FORMATS:
+            full = settings.BASE_DIR / derivative_path(relative_path, size, fmt)
+            try:
+                os.remove(full)
+            except FileNotFoundError:
+                continue
+            except OSError as e:
+                logger.warning(f"Error deleting derivative {full}: {e}")
+                continue
+            # 删除空的分片目录
+            for directory in (full.parent, full.parent.parent):
+                try:
+                    directory.rmdir()
+                except OSError:
+                    break
+
+
+# =============================================================================
+# 后台生成
+# =============================================================================
+class DerivativeWorker:
+    """派生图生成线程池 (PIL 解码/编码期间释放 GIL)"""
+
+    def __init__(self, max_workers: int):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="derivatives")
+
+    def submit(self, relative_paths: Iterable[Optional[str]]) -> List[Future]:
+        """提交原图路径 (忽略占位符与重复路径)"""
+        futures = []
+        for path in sorted({p for p in relative_paths if p and p.startswith("static/")}):
+            futures.append(self._executor.submit(self._run, path))
+        return futures
+
+    @staticmethod
+    def _run(relative_path: str) -> int:
+        try:
+            return generate_derivatives(relative_path)
+        except FileNotFoundError:
+            logger.warning(f"Derivatives skipped, source missing: {relative_path}")
+        except Exception as e:
+            logger.error(f"Derivative generation failed for {relative_path}: {e}", exc_info=True)
+        return 0
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait)
+
+
+# 全局单例 (延迟初始化)
+_worker_instance: Optional[DerivativeWorker] = None
+
+
+def get_derivative_worker() -> DerivativeWorker:
+    """获取全局 DerivativeWorker 单例"""
+    global _worker_instance
+    if _worker_instance is None:
+        _worker_instance = DerivativeWorker(max_workers=settings.DERIVATIVE_WORKERS)
+    return _worker_instance
@@ -0,0 +1,132 @@
+# =============================================================================
+# Image Executor - 图片 CPU 任务执行器
+# =============================================================================
+"""
+把 PIL 拼接 / 解码 / JPEG 编码移出事件循环
+
+- 线程池或进程池 (IMAGE_EXECUTOR=thread|process)，大小可配置
+- 背压: 同时在执行和排队的任务数有上限，超出后等待一段时间仍无空位则拒绝
+  (由调用方返回 503)，避免上传高峰时内存中堆积大量图片
+- 进程池模式下任务函数及参数须可 pickle (模块级函数 + bytes)
+"""
+
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, Optional
+
+from ..config import logger, settings
+
+
+class ImageExecutorBusy(Exception):
+    """排队已满且等待超时"""
+    pass
+
+
+class ImageExecutor:
+    """带并发上限的图片任务执行器"""
+
+    def __init__(self, kind: str, max_workers: int, max_pending: int, queue_timeout: float):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown image executor kind: {kind}")
+        self.kind = kind
+        self.max_workers = max_workers
+        self.max_pending = max(max_pending, max_workers)
+        self.queue_timeout = queue_timeout
+
+        self._executor: Optional[Executor] = None
+        self._executor_lock = threading.Lock()
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+        self.metrics: Dict[str, int] = {
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "rejected": 0,
+            "in_flight": 0,
+        }
+
+    def _get_executor(self) -> Executor:
+        with self._executor_lock:
+            if self._executor is None:
+                if self.kind == "process":
+                    # spawn: 父进程中有后台线程 (清理、缩略图)，fork 不安全
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.max_workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                    )
+                else:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers,
+                        thread_name_prefix="image-cpu",
+                    )
+            return self._executor
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_pending)
+            self._loop = loop
+        return self._semaphore
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        在执行器中运行 fn(*args, **kwargs) 并等待结果
+
+        排队名额已满时最多等待 queue_timeout 秒，仍无空位则抛出 ImageExecutorBusy。
+        """
+        semaphore = self._get_semaphore()
+        try:
+            await asyncio.wait_for(semaphore.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.metrics["rejected"] += 1
+            logger.warning(f"Image executor busy: {self.metrics['in_flight']} task(s) in flight")
+            raise ImageExecutorBusy()
+
+        self.metrics["submitted"] += 1
+        self.metrics["in_flight"] += 1
+        try:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(self._get_executor(), partial(fn, *args, **kwargs))
+            self.metrics["completed"] += 1
+            return result
+        except Exception:
+            self.metrics["failed"] += 1
+            raise
+        finally:
+            self.metrics["in_flight"] -= 1
+            semaphore.release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.metrics,
+            "kind": self.kind,
+            "max_workers": self.max_workers,
+            "max_pending": self.max_pending,
+        }
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=wait)
+                self._executor = None
+
+
+# 全局单例 (延迟初始化)
+_executor_instance: Optional[ImageExecutor] = None
+
+
+def get_image_executor() -> ImageExecutor:
+    """获取全局 ImageExecutor 单例"""
+    global _executor_instance
+    if _executor_instance is None:
+        _executor_instance = ImageExecutor(
+            kind=settings.IMAGE_EXECUTOR,
+            max_workers=settings.IMAGE_WORKERS,
+            max_pending=settings.IMAGE_MAX_PENDING,
+            queue_timeout=settings.IMAGE_QUEUE_TIMEOUT_SECONDS,
+        )
+    return _executor_instance
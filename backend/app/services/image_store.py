@@ -0,0 +1,221 @@
+# =============================================================================
+# Image Store - 内容寻址图片存储
+# =============================================================================
+"""
+按内容 SHA-256 命名的图片存储
+
+- 路径: static/uploads/<sha[0:2]>/<sha[2:4]>/<sha>.<ext>
+- 写入时去重: 相同内容只存一份
+- 引用计数: 以 questions 表中引用该路径的行数为准 (不单独维护计数器)
+- 垃圾回收: 删除题目并提交后，对不再被引用的文件调用 release()
+"""
+
+import hashlib
+import io
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import BinaryIO, Iterable, List, Optional
+
+from PIL import Image
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session
+
+from .. import models
+from ..config import logger, settings
+from .derivatives import remove_derivatives
+
+# 流式读取块大小
+CHUNK_SIZE = 1024 * 1024
+
+# 去重命中后的保护期 (秒)：期间不回收，避免与尚未提交的新引用竞争
+GC_GRACE_SECONDS = 300
+
+
+class ImageStore:
+    """内容寻址图片存储 (单进程内线程安全)"""
+
+    def __init__(self, root: Path = None, base_dir: Path = None):
+        self.base_dir = Path(base_dir or settings.BASE_DIR)
+        self.root = Path(root or settings.UPLOADS_DIR)
+        self._lock = threading.Lock()
+
+    # -------------------------------------------------------------------------
+    # 路径
+    # -------------------------------------------------------------------------
+    def relative_path(self, digest: str, ext: str) -> str:
+        """数据库中存储的相对路径 (相对于 backend/)"""
+        full = self.root / digest[0:2] / digest[2:4] / f"{digest}{ext}"
+        return full.relative_to(self.base_dir).as_posix()
+
+    def full_path(self, relative_path: str) -> Path:
+        return self.base_dir / relative_path
+
+    def is_managed(self, relative_path: str) -> bool:
+        """路径是否属于本存储 (内容寻址布局)"""
+        if not relative_path:
+            return False
+        parts = Path(relative_path).parts
+        root_parts = self.root.relative_to(self.base_dir).parts
+        if len(parts) != len(root_parts) + 3 or parts[:len(root_parts)] != root_parts:
+            return False
+        digest = Path(parts[-1]).stem
+        return len(digest) == 64 and parts[-3] == digest[0:2] and parts[-2] == digest[2:4]
+
+    # -------------------------------------------------------------------------
+    # 写入
+    # -------------------------------------------------------------------------
+    def put_bytes(self, data: bytes, ext: str = ".jpg") -> str:
+        """存储字节内容，返回相对路径 (内容已存在时不重复写入)"""
+        return self.put_stream(io.BytesIO(data), ext)
+
+    def put_file(self, src_path: str, ext: str = None) -> str:
+        """存储磁盘上的文件 (如解压出的图片)"""
+        ext = ext or os.path.splitext(src_path)[1] or ".jpg"
+        with open(src_path, 'rb') as f:
+            return self.put_stream(f, ext)
+
+    def put_image(self, img: Image.Image, format: str = "JPEG", **save_kwargs) -> str:
+        """编码 PIL 图片后存储"""
+        buffer = io.BytesIO()
+        img.save(buffer, format=format, **save_kwargs)
+        ext = ".jpg" if format.upper() == "JPEG" else f".{format.lower()}"
+        return self.put_bytes(buffer.getvalue(), ext)
+
+    def put_stream(self, stream: BinaryIO, ext: str = ".jpg") -> str:
+        """
+        流式写入: 边读边计算哈希并写入同目录临时文件，完成后原子重命名。
+        内容已存在时丢弃临时文件，只刷新已有文件的 mtime (GC 保护期)。
+        """
+        ext = ext.lower()
+        self.root.mkdir(parents=True, exist_ok=True)
+
+        hasher = hashlib.sha256()
+        fd, temp_path = tempfile.mkstemp(dir=self.root, prefix=".incoming_")
+        try:
+            with os.fdopen(fd, 'wb') as out:
+                while True:
+                    chunk = stream.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    hasher.update(chunk)
+                    out.write(chunk)
+
+            digest = hasher.hexdigest()
+            relative = self.relative_path(digest, ext)
+            dest = self.full_path(relative)
+
+            with self._lock:
+                if dest.exists():
+                    os.utime(dest)
+                    os.remove(temp_path)
+                    logger.debug(f"Image store dedupe hit: {relative}")
+                else:
+                    dest.parent.mkdir(parents=True, exist_ok=True)
+                    os.replace(temp_path, dest)
+            return relative
+
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def adopt_file(self, src_path: str, ext: str = None) -> str:
+        """
+        把已有文件纳入存储 (迁移旧布局用): 只读一遍计算哈希，
+        目标不存在时用硬链接 (同一文件系统不复制数据)，失败再复制。
+        原文件保持不动，由调用方在数据库更新后删除。
+        """
+        ext = (ext or os.path.splitext(src_path)[1] or ".jpg").lower()
+        hasher = hashlib.sha256()
+        with open(src_path, 'rb') as f:
+            while True:
+                chunk = f.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                hasher.update(chunk)
+
+        relative = self.relative_path(hasher.hexdigest(), ext)
+        dest = self.full_path(relative)
+        with self._lock:
+            if dest.exists():
+                os.utime(dest)
+                return relative
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            try:
+                os.link(src_path, dest)
+                return relative
+            except OSError:
+                pass
+        return self.put_file(src_path, ext)
+
+    # -------------------------------------------------------------------------
+    # 引用计数 / 回收
+    # -------------------------------------------------------------------------
+    def count_references(self, db: Session, relative_path: str) -> int:
+        """questions 表中引用该路径的行数"""
+        return db.query(func.count(models.Question.id)).filter(
+            or_(
+                models.Question.question_image_path == relative_path,
+                models.Question.answer_image_path == relative_path,
+            )
+        ).scalar()
+
+    def release(self, db: Session, relative_paths: Iterable[Optional[str]]) -> List[str]:
+        """
+        回收不再被引用的图片文件 (须在删除/更新题目并提交之后调用)
+
+        只处理 static/ 下的文件；保护期内刚被去重命中的文件保留，交给孤儿扫描处理。
+        返回已删除的相对路径列表。
+        """
+        removed = []
+        for relative in sorted({p for p in relative_paths if p}):
+            if not relative.startswith("static/"):
+                continue  # 占位符 ("text_answer"、"hidden") 等
+            full = self.full_path(relative)
+
+            with self._lock:
+                if not full.exists():
+                    continue
+                if self.count_references(db, relative) > 0:
+                    continue
+                if self.is_managed(relative) and time.time() - full.stat().st_mtime < GC_GRACE_SECONDS:
+                    logger.debug(f"Image store: {relative} in grace period, not collected")
+                    continue
+                try:
+                    os.remove(full)
+                    removed.append(relative)
+                except OSError as e:
+                    logger.warning(f"Error deleting image: {e}")
+                    continue
+                remove_derivatives(relative)
+
+            if self.is_managed(relative):
+                self.prune_empty_dirs(full.parent)
+
+        return removed
+
+    def prune_empty_dirs(self, directory: Path):
+        """删除空的分片目录 (最多两级)"""
+        for _ in range(2):
+            if directory == self.root:
+                return
+            try:
+                directory.rmdir()
+            except OSError:
+                return
+            directory = directory.parent
+
+
+# 全局单例 (延迟初始化)
+_store_instance: Optional[ImageStore] = None
+
+
+def get_image_store() -> ImageStore:
+    """获取全局 ImageStore 单例"""
+    global _store_instance
+    if _store_instance is None:
+        _store_instance = ImageStore()
+    return _store_instance
@@ -0,0 +1,277 @@
+# =============================================================================
+# Batch Ingest - 多个 ZIP 包批量导入
+# =============================================================================
+"""
+一次导入多个题目包 (如整个考季，每份试卷一个 ZIP)
+
+- 输入: 多个 ZIP 题目包，或包含多个 ZIP 的归档 (归档内的 ZIP 解出到工作目录)
+- 多个包并发导入 (上限 INGEST_BATCH_PACKAGES)，每个包使用独立的数据库会话和事务；
+  所有包共用一个题目处理线程池 (INGEST_WORKERS) 和同一个 SyllabusValidator
+- 对应同一份试卷 (source_filename 或内容哈希相同) 的包在同一组内按输入顺序导入，
+  避免同一条台账记录被并发写入
+- 返回汇总报告: 合计数量 + 每个包的导入结果 (按输入顺序)
+"""
+
+import os
+import posixpath
+import shutil
+import threading
+import time
+import zipfile
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from ..config import logger, settings
+from ..database import SessionLocal
+from ..zip_ingest import ZipIngestor
+
+# (ZIP 路径, 原始文件名)
+PackageFile = Tuple[str, str]
+
+# 汇总报告中累加的计数字段 (与 ZipIngestor 的结果相同)
+COUNT_FIELDS = (
+    "processed_count", "skipped_count", "inserted_count",
+    "updated_count", "unchanged_count", "deleted_count",
+    "image_bytes_before", "image_bytes_after", "images_normalized",
+)
+
+
+# =============================================================================
+# 输入: spool 目录 / 包含多个题目包的归档
+# =============================================================================
+def batch_spool_path(directory: str, index: int, filename: str) -> str:
+    """批量上传的第 index 个文件在 spool 目录中的路径 (序号前缀保留上传顺序)"""
+    return os.path.join(directory, f"{index:03d}_{os.path.basename(filename)}")
+
+
+def spooled_packages(directory: str) -> List[PackageFile]:
+    """按上传顺序列出 spool 目录中的 ZIP (不含归档解出的子目录)"""
+    return [
+        (os.path.join(directory, name), name.split('_', 1)[1])
+        for name in sorted(os.listdir(directory))
+        if name.lower().endswith('.zip') and os.path.isfile(os.path.join(directory, name))
+    ]
+
+
+def is_package_archive(zip_path: str) -> bool:
+    """ZIP 内是多个题目包 (*.zip)，而不是单个题目包 (config.json / questions/)"""
+    try:
+        with zipfile.ZipFile(zip_path) as zf:
+            names = [posixpath.normpath(n) for n in zf.namelist() if not n.endswith('/')]
+    except zipfile.BadZipFile:
+        return False  # 导入时再报告错误
+    if any(n == 'config.json' or n.startswith('questions/') for n in names):
+        return False
+    return any(n.lower().endswith('.zip') for n in names)
+
+
+def expand_packages(packages: List[PackageFile], work_dir: str) -> List[PackageFile]:
+    """
+    展开包含多个题目包的归档 (解出到 work_dir 下的子目录)，其余 ZIP 原样保留
+
+    归档内的 ZIP 按成员路径排序，只取文件名 (忽略归档内目录结构)。
+    """
+    expanded: List[PackageFile] = []
+    for index, (path, filename) in enumerate(packages):
+        if not is_package_archive(path):
+            expanded.append((path, filename))
+            continue
+
+        target = os.path.join(work_dir, f"{index:03d}_{os.path.splitext(os.path.basename(filename))[0]}.d")
+        os.makedirs(target, exist_ok=True)
+        with zipfile.ZipFile(path) as zf:
+            members = sorted(
+                (info for info in zf.infolist()
+                 if not info.is_dir()
+                 and info.filename.lower().endswith('.zip')
+                 and not info.filename.startswith('__MACOSX/')),
+                key=lambda info: info.filename
+            )
+            for n, info in enumerate(members):
+                name = posixpath.basename(info.filename)
+                dest = batch_spool_path(target, n, name)
+                with zf.open(info) as src, open(dest, 'wb') as dst:
+                    shutil.copyfileobj(src, dst)
+                expanded.append((dest, name))
+        logger.info(f"Expanded {len(members)} package(s) from {filename}")
+    return expanded
+
+
+# =============================================================================
+# 按试卷分组
+# =============================================================================
+def package_identity(path: str, filename: str) -> Optional[Tuple[str, str]]:
+    """(source_filename, 包内容哈希)；无法读取的包返回 None (导入时报告错误)"""
+    try:
+        return ZipIngestor.package_identity(path, filename)
+    except Exception:
+        return None
+
+
+def group_packages(identities: List[Optional[Tuple[str, str]]]) -> List[List[int]]:
+    """
+    按试卷分组: source_filename 或内容哈希相同的包在同一组 (组内保持输入顺序)
+
+    不同组可以并发导入；同一组须按顺序导入 (同一条台账记录)。
+    identities 为 None 的包单独成组。
+    """
+    groups: List[List[int]] = []
+    group_of: Dict[str, int] = {}
+    for index, identity in enumerate(identities):
+        if identity is None:
+            groups.append([index])
+            continue
+        source_filename, package_hash = identity
+        keys = [f"source:{source_filename}", f"hash:{package_hash}"]
+
+        group = next((group_of[key] for key in keys if key in group_of), None)
+        if group is None:
+            group = len(groups)
+            groups.append([])
+        groups[group].append(index)
+        for key in keys:
+            group_of.setdefault(key, group)
+    return groups
+
+
+# =============================================================================
+# 批量导入器
+# =============================================================================
+class BatchIngestor:
+    """
+    并发导入多个 ZIP 包
+
+    progress 回调 (事件名, 数据) 会在多个导入线程中同时调用，须线程安全；
+    各包的事件数据带有 "package" 字段 (原始文件名)。
+    """
+
+    def __init__(
+        self,
+        max_packages: Optional[int] = None,
+        max_workers: Optional[int] = None,
+        progress: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+        session_factory: Callable = SessionLocal,
+        normalize_images: Optional[bool] = None
+    ):
+        self.max_packages = max_packages or settings.INGEST_BATCH_PACKAGES
+        self.max_workers = max_workers or settings.INGEST_WORKERS
+        self.progress = progress
+        self.session_factory = session_factory
+        self.normalize_images = normalize_images  # None: 使用 INGEST_NORMALIZE_IMAGES
+        self.stored_paths: List[str] = []  # 所有包写入的图片 (用于生成缩略图)
+        self._lock = threading.Lock()
+
+    def ingest(self, packages: List[PackageFile], delete_removed: bool = False) -> Dict[str, Any]:
+        """
+        导入所有包，返回汇总报告
+
+        Returns:
+            {
+                "success": True/False (所有包都成功),
+                "package_count": 12, "succeeded_packages": 11, "failed_packages": 1,
+                "unchanged_packages": 3,
+                "processed_count": ..., "skipped_count": ..., (各包合计)
+                "errors": [{"package": "9709_s24_qp_12.zip", "question": "Q3", "reason": "..."}],
+                "elapsed_seconds": 8.4,
+                "packages": [{"filename": "...", "success": ..., ...}]  (按输入顺序)
+            }
+        """
+        start = time.perf_counter()
+        if not packages:
+            report = self._report([], [], 0.0)
+            report["errors"] = [{"question": "GLOBAL", "reason": "No ZIP packages found"}]
+            return report
+
+        results: List[Optional[Dict[str, Any]]] = [None] * len(packages)
+        groups = group_packages([package_identity(path, filename) for path, filename in packages])
+        logger.info(
+            f"Batch ingest: {len(packages)} package(s) in {len(groups)} group(s), "
+            f"{self.max_packages} at a time"
+        )
+        self._emit("batch_started", {"total": len(packages), "packages": [name for _, name in packages]})
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="ingest") as question_pool:
+            with ThreadPoolExecutor(max_workers=self.max_packages, thread_name_prefix="ingest-package") as package_pool:
+                futures = [
+                    package_pool.submit(self._ingest_group, group, packages, results, question_pool, delete_removed)
+                    for group in groups
+                ]
+                for future in futures:
+                    future.result()
+
+        report = self._report(packages, results, time.perf_counter() - start)
+        logger.info(
+            f"Batch ingest complete in {report['elapsed_seconds']}s: "
+            f"{report['succeeded_packages']} succeeded, {report['failed_packages']} failed, "
+            f"{report['unchanged_packages']} unchanged"
+        )
+        return report
+
+    def _emit(self, event: str, data: Dict[str, Any]):
+        if self.progress:
+            self.progress(event, data)
+
+    def _ingest_group(
+        self,
+        indexes: List[int],
+        packages: List[PackageFile],
+        results: List[Optional[Dict[str, Any]]],
+        question_pool: Executor,
+        delete_removed: bool
+    ):
+        for index in indexes:
+            path, filename = packages[index]
+            results[index] = self._ingest_package(path, filename, question_pool, delete_removed)
+
+    def _ingest_package(
+        self,
+        path: str,
+        filename: str,
+        question_pool: Executor,
+        delete_removed: bool
+    ) -> Dict[str, Any]:
+        def progress(event: str, data: Dict[str, Any]):
+            self._emit(event, {"package": filename, **data})
+
+        db = self.session_factory()
+        try:
+            ingestor = ZipIngestor(
+                db, max_workers=self.max_workers, progress=progress,
+                executor=question_pool, normalize_images=self.normalize_images
+            )
+            result = ingestor.ingest_zip(path, original_filename=filename, delete_removed=delete_removed)
+        finally:
+            db.close()
+
+        if result['success']:
+            with self._lock:
+                self.stored_paths.extend(ingestor.stored_paths)
+        progress("package_finished", {
+            "success": result['success'],
+            "unchanged_package": result.get('unchanged_package', False),
+            **{field: result[field] for field in COUNT_FIELDS},
+        })
+        return result
+
+    @staticmethod
+    def _report(
+        packages: List[PackageFile],
+        results: List[Dict[str, Any]],
+        elapsed: float
+    ) -> Dict[str, Any]:
+        reports = [{"filename": filename, **result} for (_, filename), result in zip(packages, results)]
+        failed = sum(1 for result in results if not result['success'])
+        return {
+            "success": bool(results) and failed == 0,
+            "package_count": len(results),
+            "succeeded_packages": len(results) - failed,
+            "failed_packages": failed,
+            "unchanged_packages": sum(1 for result in results if result.get('unchanged_package')),
+            **{field: sum(result[field] for result in results) for field in COUNT_FIELDS},
+            "errors": [
+                {"package": report["filename"], **error}
+                for report in reports for error in report["errors"]
+            ],
+            "elapsed_seconds": round(elapsed, 2),
+            "packages": reports,
+        }
@@ -0,0 +1,231 @@
+# =============================================================================
+# Ingest Jobs - 后台 ZIP 导入任务
+# =============================================================================
+"""
+上传的 ZIP 包先写入 spool 目录并登记为任务，由单个后台线程依次导入
+(一次只导入一个包，避免同一题目包的台账并发写入)
+
+- 任务状态与最终结果保存在 ingest_jobs 表，可随时查询
+- 进度事件 (已校验题目、已存储图片、已写入行、错误) 保存在内存中，
+  由 SSE 接口 /api/ingest/jobs/{id}/events 推送
+- 批量任务: spool 路径是一个目录 (多个 ZIP / 包含多个 ZIP 的归档)，由 BatchIngestor
+  并发导入，结果为汇总报告
+- 服务重启时: spool 文件仍在的排队/运行中任务重新排队 (导入台账保证重复执行无副作用)，
+  其余标记为失败
+"""
+
+import json
+import os
+import shutil
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from .. import models
+from ..config import logger
+from ..database import SessionLocal
+from ..zip_ingest import ZipIngestor
+from .derivatives import get_derivative_worker
+from .ingest_batch import BatchIngestor, expand_packages, spooled_packages
+
+# 内存中保留事件日志的已完成任务数
+MAX_FINISHED_LOGS = 50
+
+# 任务结束事件 (SSE 收到后关闭连接)
+TERMINAL_EVENT = "finished"
+
+
+class JobEventLog:
+    """单个任务的进度事件 (后台线程追加，SSE 按序号读取)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._events: List[Dict[str, Any]] = []
+        self.finished = False
+
+    def append(self, event: str, data: Dict[str, Any]) -> None:
+        with self._lock:
+            self._events.append({"id": len(self._events), "event": event, "data": data})
+            if event == TERMINAL_EVENT:
+                self.finished = True
+
+    def since(self, index: int) -> List[Dict[str, Any]]:
+        """序号 >= index 的事件"""
+        with self._lock:
+            return self._events[index:]
+
+
+class IngestJobManager:
+    """导入任务队列 (单个工作线程)"""
+
+    def __init__(self):
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ingest-job")
+        self._lock = threading.Lock()
+        self._logs: "OrderedDict[int, JobEventLog]" = OrderedDict()
+
+    # -------------------------------------------------------------------------
+    # 提交 / 查询
+    # -------------------------------------------------------------------------
+    def submit(
+        self,
+        spool_path: str,
+        filename: str,
+        created_by: Optional[str] = None,
+        delete_removed: bool = False
+    ) -> Tuple[int, Future]:
+        """
+        登记任务并排队，返回 (任务 ID, 完成时返回导入结果的 Future)
+
+        spool_path 为目录时作为批量任务 (目录内容见 ingest_batch.spooled_packages)
+        """
+        db = SessionLocal()
+        try:
+            job = models.IngestJob(
+                filename=filename,
+                spool_path=spool_path,
+                delete_removed=delete_removed,
+                status="queued",
+                created_by=created_by,
+                created_at=datetime.utcnow(),
+            )
+            db.add(job)
+            db.commit()
+            job_id = job.id
+        finally:
+            db.close()
+        return job_id, self._enqueue(job_id, filename)
+
+    def events(self, job_id: int) -> Optional[JobEventLog]:
+        with self._lock:
+            return self._logs.get(job_id)
+
+    def recover(self) -> int:
+        """服务启动时处理上次未完成的任务，返回重新排队的数量"""
+        db = SessionLocal()
+        requeued = []
+        try:
+            jobs = db.query(models.IngestJob).filter(
+                models.IngestJob.status.in_(("queued", "running"))
+            ).order_by(models.IngestJob.id).all()
+            for job in jobs:
+                if job.spool_path and os.path.exists(job.spool_path):
+                    job.status = "queued"
+                    requeued.append((job.id, job.filename))
+                else:
+                    job.status = "failed"
+                    job.finished_at = datetime.utcnow()
+                    job.result = json.dumps(_failure("Interrupted by server restart"), ensure_ascii=False)
+            db.commit()
+        finally:
+            db.close()
+        for job_id, filename in requeued:
+            self._enqueue(job_id, filename)
+        return len(requeued)
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+    # -------------------------------------------------------------------------
+    # 执行
+    # -------------------------------------------------------------------------
+    def _enqueue(self, job_id: int, filename: str) -> Future:
+        log = JobEventLog()
+        log.append("queued", {"job_id": job_id, "filename": filename})
+        with self._lock:
+            self._logs[job_id] = log
+        return self._executor.submit(self._run, job_id, log)
+
+    def _run(self, job_id: int, log: JobEventLog) -> Dict[str, Any]:
+        db = SessionLocal()
+        job = db.get(models.IngestJob, job_id)
+        spool_path = job.spool_path
+        try:
+            job.status = "running"
+            job.started_at = datetime.utcnow()
+            db.commit()
+
+            if os.path.isdir(spool_path):
+                batch = BatchIngestor(progress=log.append)
+                result = batch.ingest(
+                    expand_packages(spooled_packages(spool_path), spool_path),
+                    delete_removed=bool(job.delete_removed)
+                )
+                stored_paths = batch.stored_paths
+            else:
+                ingestor = ZipIngestor(db=db, progress=log.append)
+                result = ingestor.ingest_zip(
+                    zip_file_path=spool_path,
+                    original_filename=job.filename,
+                    delete_removed=bool(job.delete_removed)
+                )
+                stored_paths = ingestor.stored_paths if result['success'] else []
+
+            # 后台生成图库缩略图
+            get_derivative_worker().submit(stored_paths)
+
+        except Exception as e:
+            logger.error(f"Ingest job {job_id} failed: {e}", exc_info=True)
+            db.rollback()
+            result = _failure(str(e))
+
+        status = "succeeded" if result['success'] else "failed"
+        try:
+            job.status = status
+            job.finished_at = datetime.utcnow()
+            job.result = json.dumps(result, ensure_ascii=False)
+            job.spool_path = None
+            db.commit()
+        finally:
+            db.close()
+            if spool_path and os.path.isdir(spool_path):
+                shutil.rmtree(spool_path, ignore_errors=True)
+            elif spool_path and os.path.exists(spool_path):
+                os.unlink(spool_path)
+
+        logger.info(f"Ingest job {job_id} {status}")
+        log.append(TERMINAL_EVENT, {"job_id": job_id, "status": status, "result": result})
+        self._trim_logs()
+        return result
+
+    def _trim_logs(self) -> None:
+        with self._lock:
+            finished = [job_id for job_id, log in self._logs.items() if log.finished]
+            for job_id in finished[:max(0, len(finished) - MAX_FINISHED_LOGS)]:
+                del self._logs[job_id]
+
+
+def _failure(reason: str) -> Dict[str, Any]:
+    return {
+        "success": False,
+        "processed_count": 0,
+        "skipped_count": 0,
+        "errors": [{"question": "GLOBAL", "reason": reason}],
+    }
+
+
+def job_to_dict(job: models.IngestJob) -> Dict[str, Any]:
+    """任务 -> API 响应"""
+    return {
+        "id": job.id,
+        "filename": job.filename,
+        "status": job.status,
+        "created_by": job.created_by,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+        "result": json.loads(job.result) if job.result else None,
+    }
+
+
+# 全局单例 (延迟初始化)
+_manager_instance: Optional[IngestJobManager] = None
+
+
+def get_ingest_job_manager() -> IngestJobManager:
+    """获取全局 IngestJobManager 单例"""
+    global _manager_instance
+    if _manager_instance is None:
+        _manager_instance = IngestJobManager()
+    return _manager_instance
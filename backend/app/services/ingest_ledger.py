@@ -0,0 +1,145 @@
+# =============================================================================
+# Ingest Ledger - 导入台账 (幂等重复导入)
+# =============================================================================
+"""
+记录每个题目包 (按 source_filename) 的内容哈希及包内各题目的内容哈希
+
+- 包哈希未变且台账中的题目行都还在: 整包跳过
+  (上次导入有题目失败时不记录包哈希，重新上传会再次处理失败的题目)
+- 包有变化: 哈希未变的题目跳过，变化的题目原地更新，新增的插入，
+  包中已删除的题目可选择一并删除
+- 台账出现之前导入的包: 按 source_filename + 题号匹配已有题目行 (原地更新，不再重复插入)
+- 删除题目时须在同一事务内调用 forget() 删除对应台账记录: SQLite 未启用外键约束，
+  ondelete 不会执行，而题目 ID 可能被复用；台账只匹配 source_filename 相同的题目行
+"""
+
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import func, insert
+from sqlalchemy.orm import Session
+
+from .. import models
+
+# 题号 -> (题目 ID, 内容哈希; 台账之前导入的行为 None)
+KnownQuestions = Dict[str, Tuple[int, Optional[str]]]
+
+
+class IngestLedger:
+    """导入台账读写 (在调用方的事务内执行，不提交)"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def lookup(self, source_filename: str, package_hash: str) -> Optional[models.IngestPackage]:
+        """按 source_filename 查找；找不到时按包哈希查找 (同一个包换了上传文件名)"""
+        package = self.db.query(models.IngestPackage).filter(
+            models.IngestPackage.source_filename == source_filename
+        ).first()
+        if package is None:
+            package = self.db.query(models.IngestPackage).filter(
+                models.IngestPackage.package_hash == package_hash
+            ).first()
+        return package
+
+    def is_unchanged(
+        self,
+        package: Optional[models.IngestPackage],
+        package_hash: str,
+        question_keys: Optional[Set[str]] = None
+    ) -> bool:
+        """
+        包内容未变，且台账记录的题目行没有被删除
+
+        question_keys: 给出时，台账中还有不在其中的题目 (包中已移除但保留的) 也视为有变化
+        """
+        if package is None or package.package_hash != package_hash:
+            return False
+        keys = [
+            key for (key,) in self.db.query(models.IngestQuestion.question_key).join(
+                models.Question, models.Question.id == models.IngestQuestion.question_id
+            ).filter(
+                models.IngestQuestion.package_id == package.id,
+                models.Question.source_filename == package.source_filename
+            )
+        ]
+        if question_keys is not None and not question_keys.issuperset(keys):
+            return False
+        return len(keys) == package.question_count
+
+    def known_questions(
+        self,
+        package: Optional[models.IngestPackage],
+        source_filename: str
+    ) -> Tuple[KnownQuestions, List[int]]:
+        """
+        已导入的题目
+
+        Returns:
+            (known, duplicate_ids)
+            - known: 题号 -> (题目 ID, 内容哈希)
+            - duplicate_ids: 台账之前重复导入产生的多余行 (同一题号保留 ID 最小的)
+        """
+        known: KnownQuestions = {}
+        if package is not None:
+            rows = self.db.query(
+                models.IngestQuestion.question_key,
+                models.IngestQuestion.question_id,
+                models.IngestQuestion.content_hash,
+            ).join(
+                models.Question, models.Question.id == models.IngestQuestion.question_id
+            ).filter(
+                models.IngestQuestion.package_id == package.id,
+                models.Question.source_filename == package.source_filename
+            )
+            for key, question_id, content_hash in rows:
+                known[key] = (question_id, content_hash)
+            return known, []
+
+        duplicates = []
+        rows = self.db.query(models.Question.id, models.Question.question_number).filter(
+            models.Question.source_filename == source_filename
+        ).order_by(models.Question.id)
+        for question_id, number in rows:
+            key = f"Q{number}"
+            if key in known:
+                duplicates.append(question_id)
+            else:
+                known[key] = (question_id, None)
+        return known, duplicates
+
+    def forget(self, question_ids: Iterable[int]) -> None:
+        """删除指向这些题目的台账记录 (与删除题目在同一事务内)"""
+        question_ids = list(question_ids)
+        if question_ids:
+            self.db.query(models.IngestQuestion).filter(
+                models.IngestQuestion.question_id.in_(question_ids)
+            ).delete(synchronize_session=False)
+
+    def record(
+        self,
+        package: Optional[models.IngestPackage],
+        source_filename: str,
+        package_hash: str,
+        entries: Dict[str, Tuple[int, str]]
+    ) -> models.IngestPackage:
+        """写入本次导入后的台账 (替换该包原有的题目记录)"""
+        if package is None:
+            package = models.IngestPackage(source_filename=source_filename)
+            self.db.add(package)
+        package.package_hash = package_hash
+        package.question_count = len(entries)
+        package.ingested_at = datetime.utcnow()
+        self.db.flush()
+
+        self.db.query(models.IngestQuestion).filter(
+            models.IngestQuestion.package_id == package.id
+        ).delete(synchronize_session=False)
+        if entries:
+            self.db.execute(insert(models.IngestQuestion.__table__), [
+                {"package_id": package.id, "question_key": key,
+                 "question_id": question_id, "content_hash": content_hash}
+                for key, (question_id, content_hash) in sorted(entries.items())
+            ])
+        self.db.expire(package, ["questions"])
+        return package
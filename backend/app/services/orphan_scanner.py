@@ -0,0 +1,212 @@
+# =============================================================================
+# Orphan Scanner - 孤儿文件 / 悬空引用扫描
+# =============================================================================
+"""
+对比数据库引用的图片路径与 static/ 下的实际文件
+
+- 孤儿文件: 磁盘上存在但没有题目引用 (Studio 上传后未建题、ZIP 导入中断等)
+- 悬空引用: 题目引用的文件已不存在 (PDF 中显示 "Image not found")
+
+数据库路径 (SQL ORDER BY) 与文件系统 (按同一字节序递归遍历) 都是有序流，
+归并一次即可得到两个差集，内存占用只与差异数量相关。
+"""
+
+import os
+import shutil
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from .. import models
+from ..config import logger, settings
+from .derivatives import remove_derivatives
+from .image_store import get_image_store
+
+# 参与扫描的图片扩展名 (生成文件、缩略图等目录不在扫描范围内)
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp", ".gif"}
+
+# static/ 下不属于题目图片的目录
+EXCLUDED_DIRS = {"worksheets", "downloads", "derivatives"}
+
+# 写入中断留下的临时文件前缀 (见 ImageStore.put_stream)
+TEMP_PREFIX = ".incoming_"
+
+REFERENCED_PATHS_SQL = (
+    "SELECT question_image_path AS path FROM questions "
+    "UNION SELECT answer_image_path FROM questions "
+    "ORDER BY path{collate}"
+)
+
+
+@dataclass
+class ScanReport:
+    """扫描结果"""
+    orphans: List[Dict] = field(default_factory=list)      # {"path", "size", "mtime"}
+    dangling: List[Dict] = field(default_factory=list)     # {"path", "question_ids"}
+    files_scanned: int = 0
+    references_scanned: int = 0
+    orphan_bytes: int = 0
+    skipped_recent: int = 0
+    actions: Dict[str, int] = field(default_factory=lambda: {"deleted": 0, "quarantined": 0, "kept": 0})
+    started_at: float = field(default_factory=time.time)
+    duration_seconds: float = 0.0
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+# =============================================================================
+# 有序流
+# =============================================================================
+def iter_referenced_paths(db: Session) -> Iterator[str]:
+    """数据库中引用的 static/ 路径 (去重、按字节序升序，流式读取)"""
+    # SQLite 默认 BINARY 排序即字节序；PostgreSQL 需显式使用 "C" 排序规则
+    collate = ' COLLATE "C"' if db.bind.dialect.name == "postgresql" else ""
+    query = text(REFERENCED_PATHS_SQL.format(collate=collate))
+    result = db.execute(query.execution_options(stream_results=True, yield_per=1000))
+    previous = ""
+    for (path,) in result:
+        if path and path.startswith("static/"):
+            if path < previous:
+                raise RuntimeError("Referenced paths are not in byte order; merge would be wrong")
+            previous = path
+            yield path
+
+
+def iter_static_files(root: Path = None, prefix: str = "static") -> Iterator[os.DirEntry]:
+    """
+    按路径字符串升序递归遍历 static/ 下的图片文件
+
+    目录按 "名称/" 参与排序，使遍历顺序与完整路径的字典序一致
+    ("a.jpg" < "a/..."，因为 '.' < '/')。
+    """
+    root = Path(root or settings.STATIC_DIR)
+
+    def walk(directory: str, rel: str, top: bool) -> Iterator[tuple]:
+        try:
+            entries = list(os.scandir(directory))
+        except FileNotFoundError:
+            return
+        keyed = []
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                if top and entry.name in EXCLUDED_DIRS:
+                    continue
+                keyed.append((entry.name + "/", entry, True))
+            elif entry.is_file(follow_symlinks=False):
+                ext = os.path.splitext(entry.name)[1].lower()
+                if ext in IMAGE_EXTENSIONS or entry.name.startswith(TEMP_PREFIX):
+                    keyed.append((entry.name, entry, False))
+        for key, entry, is_dir in sorted(keyed, key=lambda k: k[0]):
+            path = f"{rel}/{entry.name}"
+            if is_dir:
+                yield from walk(entry.path, path, False)
+            else:
+                yield path, entry
+
+    yield from walk(str(root), prefix, True)
+
+
+# =============================================================================
+# 扫描
+# =============================================================================
+def scan(db: Session, min_age_seconds: float = 24 * 3600) -> ScanReport:
+    """
+    归并两个有序流，得到孤儿文件与悬空引用
+
+    min_age_seconds: 比这更新的孤儿文件不报告 (Studio 先上传图片、稍后才建题)
+    """
+    report = ScanReport()
+    start = time.perf_counter()
+    now = time.time()
+
+    refs = iter_referenced_paths(db)
+    files = iter_static_files()
+    ref = next(refs, None)
+    item = next(files, None)
+
+    while ref is not None or item is not None:
+        if item is not None and (ref is None or item[0] < ref):
+            # 只在磁盘上: 孤儿
+            path, entry = item
+            report.files_scanned += 1
+            stat = entry.stat(follow_symlinks=False)
+            if now - stat.st_mtime < min_age_seconds:
+                report.skipped_recent += 1
+            else:
+                report.orphans.append({"path": path, "size": stat.st_size, "mtime": stat.st_mtime})
+                report.orphan_bytes += stat.st_size
+            item = next(files, None)
+        elif item is None or ref < item[0]:
+            # 只在数据库中: 悬空引用 (文件可能在排除目录或已被删除)
+            report.references_scanned += 1
+            if not (settings.BASE_DIR / ref).is_file():
+                report.dangling.append({"path": ref})
+            ref = next(refs, None)
+        else:
+            report.files_scanned += 1
+            report.references_scanned += 1
+            ref = next(refs, None)
+            item = next(files, None)
+
+    # 悬空引用通常很少，逐个查询对应题目
+    for entry in report.dangling:
+        rows = db.query(models.Question.id).filter(
+            (models.Question.question_image_path == entry["path"]) |
+            (models.Question.answer_image_path == entry["path"])
+        ).order_by(models.Question.id).all()
+        entry["question_ids"] = [row[0] for row in rows]
+
+    report.duration_seconds = round(time.perf_counter() - start, 3)
+    return report
+
+
+# =============================================================================
+# 处理孤儿文件
+# =============================================================================
+def resolve_orphans(db: Session, report: ScanReport, mode: str, quarantine_dir: Optional[Path] = None) -> ScanReport:
+    """
+    处理扫描出的孤儿文件
+
+    mode: "report" 不处理 / "delete" 删除 / "quarantine" 移动到隔离目录 (保留相对路径)
+    处理前重新检查引用，扫描之后新建的题目不会丢图。
+    """
+    if mode == "report":
+        return report
+    if mode not in ("delete", "quarantine"):
+        raise ValueError(f"Unknown mode: {mode}")
+
+    store = get_image_store()
+    quarantine_dir = Path(quarantine_dir or settings.BASE_DIR / "quarantine" / time.strftime("%Y%m%d_%H%M%S"))
+
+    for orphan in report.orphans:
+        path = orphan["path"]
+        if store.count_references(db, path) > 0:
+            report.actions["kept"] += 1
+            continue
+        full = settings.BASE_DIR / path
+        try:
+            if mode == "delete":
+                os.remove(full)
+                report.actions["deleted"] += 1
+            else:
+                dest = quarantine_dir / path
+                dest.parent.mkdir(parents=True, exist_ok=True)
+                shutil.move(str(full), str(dest))
+                report.actions["quarantined"] += 1
+        except FileNotFoundError:
+            continue
+        except OSError as e:
+            logger.warning(f"Orphan scan: could not {mode} {path}: {e}")
+            report.actions["kept"] += 1
+            continue
+
+        remove_derivatives(path)
+        if store.is_managed(path):
+            store.prune_empty_dirs(full.parent)
+
+    return report
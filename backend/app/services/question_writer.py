@@ -0,0 +1,57 @@
+# =============================================================================
+# Question Writer - 批量写入题目
+# =============================================================================
+"""
+导入用的批量写库操作 (替代逐题 db.add + flush)
+
+- insert_questions: 一条多行 INSERT ... RETURNING id，按传入顺序返回 ID
+- update_questions: 按 ID 批量更新 (executemany)，返回被替换的旧图片路径
+
+均在调用方的事务内执行，不提交。
+"""
+
+from typing import Any, Dict, List, Sequence, Tuple
+
+from sqlalchemy import bindparam, insert, select
+from sqlalchemy.orm import Session
+
+from .. import models
+
+questions_table = models.Question.__table__
+
+
+def insert_questions(db: Session, rows: Sequence[Dict[str, Any]]) -> List[int]:
+    """批量插入题目行，返回与 rows 一一对应的 ID"""
+    if not rows:
+        return []
+    stmt = insert(questions_table).returning(questions_table.c.id, sort_by_parameter_order=True)
+    return list(db.execute(stmt, list(rows)).scalars())
+
+
+def update_questions(db: Session, updates: Sequence[Tuple[int, Dict[str, Any]]]) -> List[str]:
+    """
+    按 ID 批量更新题目行 (各行字段相同)，返回不再使用的旧图片路径
+
+    旧图片须在提交后交给 ImageStore.release() 回收。
+    """
+    if not updates:
+        return []
+    ids = [question_id for question_id, _ in updates]
+    old = {
+        question_id: (q_path, a_path)
+        for question_id, q_path, a_path in db.execute(
+            select(questions_table.c.id, questions_table.c.question_image_path, questions_table.c.answer_image_path)
+            .where(questions_table.c.id.in_(ids))
+        )
+    }
+    stmt = questions_table.update().where(questions_table.c.id == bindparam("_id"))
+    db.execute(stmt, [{**row, "_id": question_id} for question_id, row in updates])
+
+    replaced = []
+    for question_id, row in updates:
+        q_path, a_path = old.get(question_id, (None, None))
+        if q_path != row.get("question_image_path"):
+            replaced.append(q_path)
+        if a_path != row.get("answer_image_path"):
+            replaced.append(a_path)
+    return [p for p in replaced if p]
@@ -8,11 +8,16 @@
 
 import json
 import re
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Set, Tuple
+from types import MappingProxyType
+from typing import Any, Dict, FrozenSet, Iterable, List, Mapping, NamedTuple, Optional, Set, Tuple
 
 from ..config import logger, settings
 
+# 名称前导编号 (如 "1. Quadratics" / "1.2 Polynomial Division" 中的 "1." / "1.")
+_LEADING_NUMBER = re.compile(r'^\d+\.?\s*')
+
 
 class ValidationError(Exception):
     """校验失败异常，包含详细的错误信息"""
@@ -31,6 +36,32 @@ class ValidationError(Exception):
         }
 
 
+@lru_cache(maxsize=8192)
+def _normalize(name: str) -> str:
+    """标准化名称 (同一个包中的 topic/subtopic 大量重复，结果缓存)"""
+    if not name:
+        return ""
+    # 去除前导数字和点号 (如 "1. Quadratics" -> "Quadratics")
+    name = _LEADING_NUMBER.sub('', name)
+    # 转小写，去除多余空格
+    return name.lower().strip()
+
+
+def _preview(names: Tuple[str, ...]) -> str:
+    """错误提示中的候选列表 (前 5 个)"""
+    return f"{list(names[:5])}{'...' if len(names) > 5 else ''}"
+
+
+class PaperLookup(NamedTuple):
+    """单个 (科目, Paper) 的只读查找结构，加载 Syllabus 时预计算"""
+    topics: FrozenSet[str]                 # 标准化 topic 名称
+    topic_originals: Tuple[str, ...]       # 原始 topic 名称
+    subtopics: FrozenSet[str]              # 该 Paper 下所有 topic 的标准化 subtopic 名称
+    subtopic_originals: Tuple[str, ...]    # 原始 subtopic 名称
+    topics_preview: str                    # 错误提示用
+    subtopics_preview: str
+
+
 class SyllabusValidator:
     """
     Syllabus 校验器
@@ -49,6 +80,9 @@ class SyllabusValidator:
         # subject_code -> {paper_code: {topic_name: {subtopic_names}}}
         self._index: Dict[str, Dict[str, Dict[str, Set[str]]]] = {}
 
+        # 校验用的只读查找结构: subject_code -> {paper_code: PaperLookup}
+        self._papers: Dict[str, Mapping[str, PaperLookup]] = {}
+
         # 科目名称到代码的映射
         self._subject_mapping = {
             'math': '9709',
@@ -116,14 +150,31 @@ class SyllabusValidator:
                     }
                 }
 
+        self._papers[subject_code] = MappingProxyType({
+            paper_code: self._build_paper_lookup(paper_data)
+            for paper_code, paper_data in self._index[subject_code].items()
+        })
+
+    @staticmethod
+    def _build_paper_lookup(paper_data: Dict[str, Dict]) -> PaperLookup:
+        topic_originals = tuple(data['original_name'] for data in paper_data.values())
+        subtopics: Set[str] = set()
+        subtopic_originals: List[str] = []
+        for topic_data in paper_data.values():
+            subtopics.update(topic_data['subtopics'])
+            subtopic_originals.extend(topic_data['subtopic_originals'].values())
+        return PaperLookup(
+            topics=frozenset(paper_data),
+            topic_originals=topic_originals,
+            subtopics=frozenset(subtopics),
+            subtopic_originals=tuple(subtopic_originals),
+            topics_preview=_preview(topic_originals),
+            subtopics_preview=_preview(tuple(subtopic_originals)),
+        )
+
     def _normalize_name(self, name: str) -> str:
         """标准化名称用于比较（去除前导数字、空格、标点、大小写）"""
-        if not name:
-            return ""
-        # 去除前导数字和点号 (如 "1. Quadratics" -> "Quadratics")
-        name = re.sub(r'^\d+\.?\s*', '', name)
-        # 转小写，去除多余空格
-        return name.lower().strip()
+        return _normalize(name)
 
     def get_subject_code(self, subject: str) -> Optional[str]:
         """
@@ -162,29 +213,27 @@ class SyllabusValidator:
             return []
         return list(topic_data.get('subtopic_originals', {}).values())
 
-    def get_all_subtopics_by_paper(self, subject_code: str, paper_code: str) -> Tuple[Set[str], List[str]]:
+    def get_all_subtopics_by_paper(
+        self,
+        subject_code: str,
+        paper_code: str
+    ) -> Tuple[FrozenSet[str], Tuple[str, ...]]:
         """
-        获取指定 Paper 下所有 Topic 的全部 Subtopic
+        获取指定 Paper 下所有 Topic 的全部 Subtopic (加载时预计算，只读)
 
         Returns:
-            (normalized_subtopics_set, original_subtopics_list)
+            (normalized_subtopics_set, original_subtopics)
             - normalized_subtopics_set: 用于快速校验的标准化名称集合
-            - original_subtopics_list: 原始名称列表，用于错误提示
+            - original_subtopics: 原始名称，用于错误提示
         """
-        if subject_code not in self._index:
-            return set(), []
-
-        paper_data = self._index[subject_code].get(paper_code.upper(), {})
-        normalized_set: Set[str] = set()
-        originals_list: List[str] = []
-
-        for topic_data in paper_data.values():
-            # 收集所有 subtopic 的标准化名称
-            normalized_set.update(topic_data.get('subtopics', set()))
-            # 收集所有 subtopic 的原始名称
-            originals_list.extend(topic_data.get('subtopic_originals', {}).values())
+        lookup = self.get_paper_lookup(subject_code, paper_code)
+        if lookup is None:
+            return frozenset(), ()
+        return lookup.subtopics, lookup.subtopic_originals
 
-        return normalized_set, originals_list
+    def get_paper_lookup(self, subject_code: str, paper_code: str) -> Optional[PaperLookup]:
+        """指定 (科目, Paper) 的预计算查找结构，不存在时返回 None"""
+        return self._papers.get(subject_code, {}).get(paper_code.upper())
 
     def validate_question_metadata(
         self,
@@ -208,38 +257,75 @@ class SyllabusValidator:
         """
         # 1. 确定科目代码
         subject = subject or question_data.get('subject', '')
+        subject_code, error = self._resolve_subject(subject)
+        if error:
+            return False, error
+
+        error = self._validate(question_data, subject_code, strict)
+        return error is None, error
+
+    def validate_many(
+        self,
+        questions: Iterable[Dict[str, Any]],
+        subject: str = None,
+        strict: bool = True
+    ) -> List[Optional[ValidationError]]:
+        """
+        批量校验 (如整个题目包)，返回与输入一一对应的错误 (通过为 None)
+
+        科目只解析一次 (subject 为空时按各题目的 subject 字段分别解析并缓存)，
+        各题目直接使用预计算的 PaperLookup。
+        """
+        resolved: Dict[str, Tuple[Optional[str], Optional[ValidationError]]] = {}
+        errors: List[Optional[ValidationError]] = []
+        for question_data in questions:
+            question_subject = subject or question_data.get('subject', '')
+            if question_subject not in resolved:
+                resolved[question_subject] = self._resolve_subject(question_subject)
+            subject_code, error = resolved[question_subject]
+            errors.append(error or self._validate(question_data, subject_code, strict))
+        return errors
+
+    def _resolve_subject(self, subject: str) -> Tuple[Optional[str], Optional[ValidationError]]:
+        """科目名称或代码 -> (科目代码, 错误)"""
         subject_code = self.get_subject_code(subject)
 
         if not subject_code:
-            return False, ValidationError(
+            return None, ValidationError(
                 f"Unknown subject: '{subject}'. Valid subjects: {list(self.syllabi.keys())}",
                 field="subject",
                 value=subject
             )
 
-        if subject_code not in self._index:
-            return False, ValidationError(
+        if subject_code not in self._papers:
+            return None, ValidationError(
                 f"No syllabus loaded for subject code: '{subject_code}'",
                 field="subject_code",
                 value=subject_code
             )
+        return subject_code, None
 
+    def _validate(
+        self,
+        question_data: Dict[str, Any],
+        subject_code: str,
+        strict: bool
+    ) -> Optional[ValidationError]:
+        """按预计算的 PaperLookup 校验 Paper / Topic / Subtopics，返回错误或 None"""
         # 2. 校验 Paper
         paper_code = question_data.get('paper_number', question_data.get('paper', ''))
         if not paper_code:
-            return False, ValidationError(
+            return ValidationError(
                 "Missing paper_number/paper field",
                 field="paper_number",
                 value=None
             )
 
-        paper_code_upper = paper_code.upper()
-        valid_papers = self.get_valid_papers(subject_code)
-
-        if paper_code_upper not in self._index[subject_code]:
-            return False, ValidationError(
+        lookup = self.get_paper_lookup(subject_code, paper_code)
+        if lookup is None:
+            return ValidationError(
                 f"Invalid paper '{paper_code}' for subject {subject_code}. "
-                f"Valid papers: {valid_papers}",
+                f"Valid papers: {self.get_valid_papers(subject_code)}",
                 field="paper_number",
                 value=paper_code
             )
@@ -248,16 +334,12 @@ class SyllabusValidator:
         topic = question_data.get('topic', '')
         if not topic:
             # Topic 为空时跳过校验 (允许空 topic)
-            return True, None
+            return None
 
-        topic_normalized = self._normalize_name(topic)
-        paper_data = self._index[subject_code][paper_code_upper]
-
-        if topic_normalized not in paper_data:
-            valid_topics = self.get_valid_topics(subject_code, paper_code_upper)
-            return False, ValidationError(
+        if _normalize(topic) not in lookup.topics:
+            return ValidationError(
                 f"Invalid topic '{topic}' for paper {paper_code}. "
-                f"Valid topics: {valid_topics[:5]}{'...' if len(valid_topics) > 5 else ''}",
+                f"Valid topics: {lookup.topics_preview}",
                 field="topic",
                 value=topic
             )
@@ -271,27 +353,22 @@ class SyllabusValidator:
 
         if not subtopics_list or not strict:
             # 无 subtopic 或非严格模式，跳过校验
-            return True, None
+            return None
 
         # 注意: subtopic 可能来自同一 Paper 下的任意 Topic，不仅仅是主 topic
-        # 因此需要获取该 Paper 下所有 Topic 的全部 subtopics
-        valid_subtopics_normalized, valid_subtopics_originals = self.get_all_subtopics_by_paper(
-            subject_code, paper_code_upper
-        )
-
+        # 因此使用该 Paper 下所有 Topic 的全部 subtopics
         for subtopic in subtopics_list:
             if not subtopic:
                 continue
-            subtopic_normalized = self._normalize_name(subtopic)
-            if subtopic_normalized not in valid_subtopics_normalized:
-                return False, ValidationError(
+            if _normalize(subtopic) not in lookup.subtopics:
+                return ValidationError(
                     f"Invalid subtopic '{subtopic}' for paper {paper_code}. "
-                    f"Valid subtopics: {valid_subtopics_originals[:5]}{'...' if len(valid_subtopics_originals) > 5 else ''}",
+                    f"Valid subtopics: {lookup.subtopics_preview}",
                     field="subtopic",
                     value=subtopic
                 )
 
-        return True, None
+        return None
 
     def validate_question_metadata_or_raise(
         self,
@@ -0,0 +1,67 @@
+import os
+from pathlib import Path
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+
+from .config import settings
+from .services.image_store import get_image_store
+
+# Content-addressed files never change under the same URL
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Derivatives can be regenerated (backfill --overwrite) under the same URL
+DERIVATIVE_CACHE_CONTROL = "public, max-age=86400"
+# Everything else (legacy flat uploads, generated files): revalidate via ETag
+DEFAULT_CACHE_CONTROL = "no-cache"
+
+
+class CachedStaticFiles(StaticFiles):
+    """
+    StaticFiles with cache headers for question images.
+
+    - static/uploads/<ab>/<cd>/<sha256>.<ext>: immutable for a year, with the
+      content hash as a strong ETag
+    - static/derivatives/**.jpg: served as the .webp sibling when the client
+      accepts WebP (Vary: Accept)
+    - If-None-Match / If-Modified-Since answered with 304 (StaticFiles logic)
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._root = Path(self.directory).resolve()
+
+    def file_response(
+        self,
+        full_path,
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        request_headers = Headers(scope=scope)
+        relative = Path(os.path.realpath(full_path)).relative_to(self._root).as_posix()
+        db_path = f"{settings.STATIC_DIR.name}/{relative}"
+
+        vary = None
+        if relative.startswith("derivatives/") and relative.endswith(".jpg"):
+            vary = "Accept"
+            webp_path = str(full_path)[:-len(".jpg")] + ".webp"
+            if "image/webp" in request_headers.get("accept", "") and os.path.isfile(webp_path):
+                full_path, stat_result = webp_path, os.stat(webp_path)
+
+        response = FileResponse(full_path, status_code=status_code, stat_result=stat_result)
+
+        if get_image_store().is_managed(db_path):
+            response.headers["etag"] = f'"{Path(relative).stem}"'
+            response.headers["cache-control"] = IMMUTABLE_CACHE_CONTROL
+        elif relative.startswith("derivatives/"):
+            response.headers["cache-control"] = DERIVATIVE_CACHE_CONTROL
+        else:
+            response.headers["cache-control"] = DEFAULT_CACHE_CONTROL
+        if vary:
+            response.headers["vary"] = vary
+
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
@@ -1,8 +1,27 @@
-from PIL import Image
-from typing import List, Union
-from fastapi import UploadFile
+from PIL import Image, ImageOps
+from typing import List, Optional
 import io
 
+from .config import settings
+from .services.image_store import get_image_store
+
+
+# Magic bytes -> MIME type (the client-supplied content type is not trusted)
+IMAGE_SIGNATURES = (
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+)
+
+
+def sniff_image_type(header: bytes) -> Optional[str]:
+    """Detect the real image format from the first bytes of a file."""
+    for signature, mime in IMAGE_SIGNATURES:
+        if header.startswith(signature):
+            return mime
+    if len(header) >= 12 and header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
 
 def _convert_to_rgb(img: Image.Image) -> Image.Image:
     """Convert image to RGB mode for JPEG compatibility."""
@@ -20,71 +39,188 @@ def _convert_to_rgb(img: Image.Image) -> Image.Image:
     return img
 
 
-def stitch_images(upload_files: List[UploadFile]) -> Image.Image:
-    """
-    Stitches a list of UploadFiles vertically into a single image.
-    Images are right-aligned.
-    """
-    if not upload_files:
-        return None
+class ImageTooLarge(ValueError):
+    """Pixel count above MAX_IMAGE_PIXELS (decompression-bomb guard)."""
+    pass
 
-    images = []
-    for file in upload_files:
-        content = file.file.read()
-        file.file.seek(0)
-        img = Image.open(io.BytesIO(content))
-        img = _convert_to_rgb(img)
-        images.append(img)
 
-    if not images:
-        return None
-
-    # Calculate total width and height
-    max_width = max(img.width for img in images)
-    total_height = sum(img.height for img in images)
-
-    # Create new blank image with white background
-    new_im = Image.new('RGB', (max_width, total_height), (255, 255, 255))
+def _open_checked(content: bytes) -> Image.Image:
+    """Open an image lazily (header only) and enforce the pixel cap."""
+    try:
+        img = Image.open(io.BytesIO(content))
+    except Image.DecompressionBombError as e:
+        # Pillow's own guard (above 2x Image.MAX_IMAGE_PIXELS) fires before ours
+        raise ImageTooLarge(str(e)) from e
+    if img.width * img.height > settings.MAX_IMAGE_PIXELS:
+        raise ImageTooLarge(f"Image too large: {img.width}x{img.height} pixels")
+    return img
 
-    y_offset = 0
-    for img in images:
-        # Right align the image
-        x_offset = max_width - img.width
-        new_im.paste(img, (x_offset, y_offset))
-        y_offset += img.height
 
-    return new_im
+def _paste_on_white(canvas: Image.Image, img: Image.Image, box: tuple) -> None:
+    """Paste onto the white canvas, compositing alpha (same result as _convert_to_rgb)."""
+    if img.mode == 'P':
+        img = img.convert('RGBA')
+    if img.mode in ('RGBA', 'LA'):
+        canvas.paste(img, box, mask=img.split()[-1])
+    else:
+        canvas.paste(img if img.mode == 'RGB' else img.convert('RGB'), box)
 
 
-def stitch_images_from_bytes(image_bytes_list: List[bytes]) -> Image.Image:
+def stitch_images_from_bytes(image_bytes_list: List[bytes], max_width: int = None) -> Image.Image:
     """
     Stitches a list of image bytes vertically into a single image.
-    Images are right-aligned. Used for multi-image upload in Studio.
+    Images are right-aligned on a white background. Used for multi-image upload in Studio.
+
+    Peak memory is the output canvas plus one decoded input: sizes come from
+    the headers, then each image is decoded, pasted and released in turn.
+    If the widest image exceeds max_width (default STITCH_MAX_WIDTH, 0 = off),
+    all images are scaled by the same factor, JPEGs via reduced (draft) decoding.
+    Raises ImageTooLarge if an input or the canvas exceeds MAX_IMAGE_PIXELS.
     """
     if not image_bytes_list:
         return None
 
-    images = []
+    # 1. Header pass: sizes only, nothing decoded yet
+    sizes = []
     for content in image_bytes_list:
-        img = Image.open(io.BytesIO(content))
-        img = _convert_to_rgb(img)
-        images.append(img)
+        with _open_checked(content) as img:
+            sizes.append(img.size)
 
-    if not images:
-        return None
+    widest = max(w for w, _ in sizes)
+    if max_width is None:
+        max_width = settings.STITCH_MAX_WIDTH
+    scale = max_width / widest if max_width and widest > max_width else 1.0
+    scaled = [(max(1, round(w * scale)), max(1, round(h * scale))) for w, h in sizes]
 
     # Calculate total width and height
-    max_width = max(img.width for img in images)
-    total_height = sum(img.height for img in images)
+    canvas_width = max(w for w, _ in scaled)
+    total_height = sum(h for _, h in scaled)
+    if canvas_width * total_height > settings.MAX_IMAGE_PIXELS:
+        raise ImageTooLarge(f"Stitched image too large: {canvas_width}x{total_height} pixels")
 
     # Create new blank image with white background
-    new_im = Image.new('RGB', (max_width, total_height), (255, 255, 255))
+    new_im = Image.new('RGB', (canvas_width, total_height), (255, 255, 255))
 
+    # 2. Paste pass: one decoded image alive at a time
     y_offset = 0
-    for img in images:
-        # Right align the image
-        x_offset = max_width - img.width
-        new_im.paste(img, (x_offset, y_offset))
-        y_offset += img.height
+    for content, (width, height) in zip(image_bytes_list, scaled):
+        with _open_checked(content) as img:
+            if scale < 1.0:
+                img.draft('RGB', (width, height))  # JPEG only; no-op for other formats
+                img = img.resize((width, height), Image.BICUBIC)
+            # Right align the image
+            _paste_on_white(new_im, img, (canvas_width - width, y_offset))
+        y_offset += height
 
     return new_im
+
+
+# =============================================================================
+# JPEG 直通 (已符合要求的 JPEG 不重新编码)
+# =============================================================================
+# Segments dropped by strip_jpeg_metadata: APP1 (EXIF/XMP), APP13 (IPTC), COM.
+# APP0 (JFIF), APP2 (ICC profile) and APP14 (Adobe color transform) are kept.
+_STRIPPED_JPEG_MARKERS = {0xE1, 0xED, 0xFE}
+_EXIF_ORIENTATION = 0x0112
+
+
+def strip_jpeg_metadata(data: bytes) -> bytes:
+    """
+    Losslessly remove metadata segments from a JPEG (header rewrite only,
+    the entropy-coded data is copied verbatim). Returns the input unchanged
+    if the marker structure is not understood.
+    """
+    if data[:2] != b"\xff\xd8":
+        return bytes(data)
+    out = bytearray(b"\xff\xd8")
+    i, n = 2, len(data)
+    while i + 4 <= n:
+        if data[i] != 0xFF:
+            return bytes(data)
+        marker = data[i + 1]
+        if marker == 0xFF:
+            i += 1  # fill byte
+            continue
+        if marker in (0xDA, 0xD9):
+            # Start of scan / end of image: everything from here is image data
+            out += data[i:]
+            return bytes(out)
+        length = int.from_bytes(data[i + 2:i + 4], "big")
+        end = i + 2 + length
+        if length < 2 or end > n:
+            return bytes(data)
+        if marker not in _STRIPPED_JPEG_MARKERS:
+            out += data[i:end]
+        i = end
+    return bytes(data)
+
+
+def _is_passthrough_jpeg(img: Image.Image) -> bool:
+    """Baseline RGB/grayscale JPEG, upright, that decodes cleanly."""
+    if img.format != "JPEG" or img.mode not in ("RGB", "L"):
+        return False
+    if img.info.get("progressive") or img.info.get("progression"):
+        return False
+    # Re-encoding drops EXIF, so a rotated upload must be re-encoded to look the same
+    if img.getexif().get(_EXIF_ORIENTATION, 1) != 1:
+        return False
+    try:
+        # Full entropy decode at 1/8 scale: catches truncated/corrupt data cheaply
+        img.draft(img.mode, (max(1, img.width // 8), max(1, img.height // 8)))
+        img.load()
+    except (OSError, SyntaxError):
+        return False
+    return True
+
+
+# =============================================================================
+# 导入图片规范化
+# =============================================================================
+def normalize_image(content: bytes, max_dimension: int, quality: int) -> bytes:
+    """
+    Normalize one ingested image to an upright, metadata-free RGB JPEG.
+
+    Conforming JPEGs within max_dimension keep their pixels (metadata
+    stripped losslessly). Everything else is EXIF-transposed, converted to
+    RGB, downscaled so the longer side is at most max_dimension (0 = no
+    limit) and re-encoded with optimized Huffman tables.
+    """
+    with _open_checked(content) as img:
+        if max(img.size) <= (max_dimension or max(img.size)) and _is_passthrough_jpeg(img):
+            return strip_jpeg_metadata(content)
+
+    with _open_checked(content) as img:
+        img = _convert_to_rgb(ImageOps.exif_transpose(img))
+        if max_dimension and max(img.size) > max_dimension:
+            img.thumbnail((max_dimension, max_dimension), Image.LANCZOS)
+        buffer = io.BytesIO()
+        img.save(buffer, format="JPEG", quality=quality, optimize=True)
+    return buffer.getvalue()
+
+
+# =============================================================================
+# 图片执行器任务 (模块级函数 + bytes 参数，可在进程池中运行)
+# =============================================================================
+def convert_and_store(content: bytes) -> str:
+    """
+    Store one upload as JPEG; returns the DB path.
+
+    Conforming JPEGs keep their original bytes (metadata stripped losslessly
+    if STRIP_JPEG_METADATA); PNG/WebP/CMYK/alpha/progressive inputs are
+    decoded, converted to RGB and re-encoded.
+    """
+    with _open_checked(content) as img:
+        if _is_passthrough_jpeg(img):
+            data = strip_jpeg_metadata(content) if settings.STRIP_JPEG_METADATA else bytes(content)
+            return get_image_store().put_bytes(data, ".jpg")
+
+    img = _convert_to_rgb(_open_checked(content))
+    return get_image_store().put_image(img, format="JPEG", quality=92)
+
+
+def stitch_and_store(image_bytes_list: List[bytes]) -> Optional[str]:
+    """Stitch uploads, store as JPEG; returns the DB path or None."""
+    stitched_img = stitch_images_from_bytes(image_bytes_list)
+    if not stitched_img:
+        return None
+    return get_image_store().put_image(stitched_img, format="JPEG", quality=92)
@@ -6,21 +6,160 @@
 使用 SyllabusValidator 进行严格的元数据校验
 """
 
+import hashlib
 import json
 import os
+import posixpath
 import re
-import shutil
-import tempfile
+import threading
+import time
 import zipfile
+from concurrent.futures import Executor, ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime
-from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import IO, Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.orm import Session
 
 from . import models
 from .config import logger, settings
+from .services.image_store import get_image_store
+from .services.ingest_ledger import IngestLedger
+from .services.question_writer import insert_questions, update_questions
 from .services.validator import SyllabusValidator, ValidationError, get_validator
+from .utils import normalize_image
+
+# 写入阶段遇到 SQLite 锁 (busy timeout 后仍被占用) 时的最多尝试次数
+WRITE_ATTEMPTS = 3
+
+
+# =============================================================================
+# 题目包 (直接读取 ZIP 成员，不解压到临时目录)
+# =============================================================================
+class ZipPackage:
+    """
+    已打开的 ZIP 题目包
+
+    成员按 ZIP 内路径 (如 "questions/Q1.json") 索引；JSON 直接在内存中解析，
+    图片以流的形式读出，由调用方写入最终存储位置。
+    """
+
+    def __init__(self, zip_path: Union[str, IO[bytes]]):
+        self._zf = zipfile.ZipFile(zip_path, 'r')
+        self._members = {
+            posixpath.normpath(info.filename): info
+            for info in self._zf.infolist()
+            if not info.is_dir()
+        }
+
+    def exists(self, name: str) -> bool:
+        return name in self._members
+
+    def has_dir(self, directory: str) -> bool:
+        prefix = directory.rstrip('/') + '/'
+        return any(name.startswith(prefix) for name in self._members)
+
+    def list_dir(self, directory: str) -> List[str]:
+        """目录下的文件名 (不含子目录)"""
+        prefix = directory.rstrip('/') + '/'
+        return [
+            name[len(prefix):] for name in self._members
+            if name.startswith(prefix) and '/' not in name[len(prefix):]
+        ]
+
+    def read_json(self, name: str) -> Any:
+        with self._zf.open(self._members[name]) as f:
+            return json.load(f)
+
+    def open(self, name: str) -> IO[bytes]:
+        return self._zf.open(self._members[name])
+
+    def member_size(self, name: str) -> int:
+        """成员解压后的字节数"""
+        return self._members[name].file_size
+
+    def content_hash(self, names: Optional[Iterable[str]] = None) -> str:
+        """
+        成员内容哈希 (默认整包)
+
+        只使用中央目录中的成员名 / CRC32 / 大小，不解压任何成员；
+        不存在的成员也参与计算 (图片新增/删除同样视为变化)。
+        """
+        hasher = hashlib.sha256()
+        for name in sorted(self._members if names is None else names):
+            info = self._members.get(name)
+            entry = f"{name}:{info.CRC:08x}:{info.file_size}" if info else f"{name}:-"
+            hasher.update(entry.encode('utf-8') + b"\n")
+        return hasher.hexdigest()
+
+    def close(self):
+        self._zf.close()
+
+
+class DirectoryPackage:
+    """
+    已解压的题目包目录 (结构同 ZIP: config.json、questions/、answers/)
+
+    接口与 ZipPackage 相同；内容哈希使用文件大小和修改时间 (不读取文件内容)。
+    """
+
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+        self._members: Dict[str, os.stat_result] = {}
+        for dirpath, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                full_path = os.path.join(dirpath, filename)
+                name = os.path.relpath(full_path, self.root).replace(os.sep, '/')
+                self._members[name] = os.stat(full_path)
+
+    def exists(self, name: str) -> bool:
+        return name in self._members
+
+    def has_dir(self, directory: str) -> bool:
+        prefix = directory.rstrip('/') + '/'
+        return any(name.startswith(prefix) for name in self._members)
+
+    def list_dir(self, directory: str) -> List[str]:
+        """目录下的文件名 (不含子目录)"""
+        prefix = directory.rstrip('/') + '/'
+        return [
+            name[len(prefix):] for name in self._members
+            if name.startswith(prefix) and '/' not in name[len(prefix):]
+        ]
+
+    def read_json(self, name: str) -> Any:
+        with self.open(name) as f:
+            return json.load(f)
+
+    def open(self, name: str) -> IO[bytes]:
+        if name not in self._members:
+            raise KeyError(name)
+        return open(os.path.join(self.root, *name.split('/')), 'rb')
+
+    def member_size(self, name: str) -> int:
+        return self._members[name].st_size
+
+    def content_hash(self, names: Optional[Iterable[str]] = None) -> str:
+        """成员内容哈希 (默认整包)，由成员名 / 修改时间 / 大小计算"""
+        hasher = hashlib.sha256()
+        for name in sorted(self._members if names is None else names):
+            st = self._members.get(name)
+            entry = f"{name}:{st.st_mtime_ns:x}:{st.st_size}" if st else f"{name}:-"
+            hasher.update(entry.encode('utf-8') + b"\n")
+        return hasher.hexdigest()
+
+    def size(self) -> int:
+        """所有成员的字节数"""
+        return sum(st.st_size for st in self._members.values())
+
+    def close(self):
+        pass
+
+
+def open_package(path: str):
+    """打开题目包: 目录为已解压的包，否则为 ZIP 文件"""
+    return DirectoryPackage(path) if os.path.isdir(path) else ZipPackage(path)
 
 
 # =============================================================================
@@ -31,44 +170,81 @@ class ZipIngestor:
     处理 ZIP 文件导入
 
     工作流程:
-    1. 解压 ZIP 到临时目录
+    1. 打开 ZIP (或已解压的题目包目录)，按成员路径建立索引 (不解压)
     2. 读取 config.json 获取元数据
-    3. 遍历题目 JSON，使用 SyllabusValidator 严格校验
-    4. 保存图片到 static 目录
-    5. 写入数据库
+    3. 查导入台账: 包内容未变则整包跳过
+    4. 线程池并发处理各题目: 读取 JSON、内容未变的题目跳过、SyllabusValidator 严格校验、
+       图片从 ZIP 成员直接流式写入内容寻址存储 (static/uploads/<sha 分片>/)
+    5. 按题号顺序批量写入数据库 (新题目单条多行 INSERT，已有题目原地更新)，
+       并更新台账，同一事务
     6. 返回处理结果
     """
 
-    def __init__(self, db: Session):
+    def __init__(
+        self,
+        db: Optional[Session],
+        max_workers: Optional[int] = None,
+        progress: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+        executor: Optional[Executor] = None,
+        normalize_images: Optional[bool] = None
+    ):
         self.db = db
+        self.max_workers = max_workers or settings.INGEST_WORKERS
+        self.executor = executor  # 共享的题目处理线程池 (批量导入时多个包共用)，默认每个包单独创建
+        # 存储前规范化图片 (在题目处理线程池中执行，PIL 解码/编码期间释放 GIL)
+        self.normalize_images = settings.INGEST_NORMALIZE_IMAGES if normalize_images is None else normalize_images
+        self.progress = progress  # 进度回调 (事件名, 数据)，在调用 ingest_zip 的线程中执行
         self.validator = get_validator()  # 使用新的 SyllabusValidator
-        self.temp_dir: Optional[str] = None
+        self.image_store = get_image_store()  # 内容寻址存储 (自动去重)
+        self.package: Optional[ZipPackage] = None
 
         # 处理统计
-        self.processed_count = 0
-        self.skipped_count = 0
+        self.processed_count = 0   # 写入的题目数 (新增 + 更新)
+        self.skipped_count = 0     # 出错跳过的题目数
+        self.inserted_count = 0
+        self.updated_count = 0
+        self.unchanged_count = 0   # 内容未变而跳过的题目数
+        self.deleted_count = 0     # 包中已移除而删除的题目数
         self.errors: List[Dict[str, str]] = []
+        self.stored_paths: List[str] = []  # 本次写入的图片 (用于生成缩略图)
+
+        # 图片字节数 (规范化前 / 后)，由处理线程累加
+        self.image_bytes_before = 0
+        self.image_bytes_after = 0
+        self.images_normalized = 0  # 规范化后内容有变化的图片数
+        self._image_stats_lock = threading.Lock()
 
-    def ingest_zip(self, zip_file_path: str, original_filename: str = None) -> Dict[str, Any]:
+    def ingest_zip(
+        self,
+        zip_file_path: str,
+        original_filename: str = None,
+        delete_removed: bool = False
+    ) -> Dict[str, Any]:
         """
         主入口：处理 ZIP 文件
 
         Args:
-            zip_file_path: ZIP 文件的临时路径
+            zip_file_path: ZIP 文件的临时路径 (也可以是已解压的题目包目录)
             original_filename: 原始上传的文件名
+            delete_removed: 重新导入时，删除包中已不存在的题目
 
         Returns:
             {
                 "success": True/False,
                 "processed_count": 15,
                 "skipped_count": 2,
-                "errors": [{"question": "Q3", "reason": "..."}]
+                "errors": [{"question": "Q3", "reason": "..."}],
+                "unchanged_package": False,
+                "inserted_count": 10, "updated_count": 5,
+                "unchanged_count": 3, "deleted_count": 0,
+                "image_bytes_before": 5242880, "image_bytes_after": 1835008,
+                "images_normalized": 24
             }
         """
         try:
-            # 1. 解压 ZIP
-            logger.info(f"Extracting ZIP: {original_filename or zip_file_path}")
-            self.temp_dir = self._extract_zip(zip_file_path)
+            # 1. 打开 ZIP
+            logger.info(f"Reading ZIP: {original_filename or zip_file_path}")
+            self.package = open_package(zip_file_path)
 
             # 2. 读取 config.json
             config = self._read_config()
@@ -83,102 +259,354 @@ class ZipIngestor:
             # 4. 确定 source_filename
             source_filename = self._determine_source_filename(config, original_filename)
 
-            # 5. 遍历并处理每个题目
-            questions_dir = os.path.join(self.temp_dir, 'questions')
-            answers_dir = os.path.join(self.temp_dir, 'answers')
+            # 5. 题目列表 + 导入台账
+            questions_dir = 'questions'
+            answers_dir = 'answers'
 
-            if not os.path.exists(questions_dir):
-                raise ValueError("ZIP does not contain 'questions' directory")
-
-            # 收集所有题目 JSON 文件
-            question_jsons = sorted([
-                f for f in os.listdir(questions_dir)
-                if f.endswith('.json')
-            ], key=self._sort_question_key)
+            question_jsons = self._list_questions(questions_dir)
 
             logger.info(f"Found {len(question_jsons)} question(s) to process")
-
-            # 6. 处理每个题目
-            for idx, json_filename in enumerate(question_jsons, start=1):
-                question_id = json_filename.replace('.json', '')  # Q1, Q2, ...
-
-                try:
-                    self._process_question(
+            present = {name.replace('.json', '') for name in question_jsons}
+
+            # 查导入台账 (要求删除已移除题目时，台账中还留有已移除的题目也不跳过)
+            ledger = IngestLedger(self.db)
+            package_hash = self.package.content_hash()
+            ledger_package = ledger.lookup(source_filename, package_hash)
+            if ledger.is_unchanged(ledger_package, package_hash, present if delete_removed else None):
+                logger.info(f"Package unchanged since {ledger_package.ingested_at}, skipped: {source_filename}")
+                return self._result(success=True, unchanged_package=True)
+            if ledger_package:
+                source_filename = ledger_package.source_filename
+            known, duplicate_ids = ledger.known_questions(ledger_package, source_filename)
+            self._emit("started", {"source_filename": source_filename, "total": len(question_jsons)})
+
+            # 6. 并发准备每个题目 (读取 / 校验 / 存储图片)，按题号顺序收集数据库行
+            inserts: List[Tuple[str, str, Dict[str, Any]]] = []   # (题号, 内容哈希, 行)
+            updates: List[Tuple[int, Dict[str, Any]]] = []        # (题目 ID, 行)
+            entries: Dict[str, Tuple[int, str]] = {}              # 台账: 题号 -> (题目 ID, 内容哈希)
+            with self._question_pool() as pool:
+                futures = []
+                for idx, json_filename in enumerate(question_jsons, start=1):
+                    question_id = json_filename.replace('.json', '')  # Q1, Q2, ...
+                    futures.append((question_id, pool.submit(
+                        self._prepare_question,
                         question_id=question_id,
                         question_index=idx,
                         questions_dir=questions_dir,
                         answers_dir=answers_dir,
                         config=config,
                         subject_code=subject_code,
-                        source_filename=source_filename
+                        source_filename=source_filename,
+                        known_hash=known.get(question_id, (None, None))[1]
+                    )))
+
+                for done, (question_id, future) in enumerate(futures, start=1):
+                    existing_id = known.get(question_id, (None, None))[0]
+                    try:
+                        content_hash, row = future.result()
+                        if row is None:
+                            self.unchanged_count += 1
+                            entries[question_id] = (existing_id, content_hash)
+                            continue
+                        self._collect_row(row)
+                        if existing_id:
+                            updates.append((existing_id, row))
+                            entries[question_id] = (existing_id, content_hash)
+                        else:
+                            inserts.append((question_id, content_hash, row))
+                        self.processed_count += 1
+
+                    except ValidationError as e:
+                        self._keep_entry(entries, known, question_id)
+                        # 校验失败 - 记录详细错误
+                        logger.error(f"Validation failed for {question_id}: {e.message}")
+                        self.errors.append(self._question_error(question_id, e))
+                        self.skipped_count += 1
+                        self._emit("error", self.errors[-1])
+
+                    except Exception as e:
+                        self._keep_entry(entries, known, question_id)
+                        logger.error(f"Error processing {question_id}: {e}")
+                        self.errors.append(self._question_error(question_id, e))
+                        self.skipped_count += 1
+                        self._emit("error", self.errors[-1])
+
+                    finally:
+                        self._emit("progress", {
+                            "question": question_id,
+                            "done": done,
+                            "total": len(futures),
+                            "validated": self.processed_count,
+                            "unchanged": self.unchanged_count,
+                            "errors": self.skipped_count,
+                            "images_stored": len(self.stored_paths),
+                        })
+
+            # 7. 批量写入 (新增 / 更新 / 删除)、更新台账，提交数据库事务
+            # SQLite 被并发导入锁住超时: 回滚后整段重试 (准备好的行仍在内存中)
+            removed = {key: known[key] for key in known if key not in present}
+            for attempt in range(1, WRITE_ATTEMPTS + 1):
+                try:
+                    ids, released = self._write_rows(
+                        ledger, ledger_package, source_filename, package_hash,
+                        inserts, updates, dict(entries), removed, duplicate_ids, delete_removed
                     )
-                    self.processed_count += 1
+                    self.db.commit()
+                    break
+                except OperationalError as e:
+                    self.db.rollback()
+                    if attempt == WRITE_ATTEMPTS or "database is locked" not in str(e.orig):
+                        raise
+                    logger.warning(
+                        f"Database locked, retrying write of {source_filename} ({attempt}/{WRITE_ATTEMPTS - 1})"
+                    )
+                    time.sleep(attempt)
+            self._emit("rows_written", {
+                "inserted": self.inserted_count,
+                "updated": self.updated_count,
+                "deleted": self.deleted_count,
+            })
+
+            # 更新/删除后不再被引用的旧图片
+            self.image_store.release(self.db, released)
+
+            if ids:
+                logger.debug(f"Inserted questions {ids[0]}..{ids[-1]}")
+            logger.info(
+                f"Ingestion complete: {self.inserted_count} inserted, {self.updated_count} updated, "
+                f"{self.unchanged_count} unchanged, {self.deleted_count} deleted, {self.skipped_count} skipped; "
+                f"images {self.image_bytes_before / 1024:.0f}KB -> {self.image_bytes_after / 1024:.0f}KB"
+            )
 
-                except ValidationError as e:
-                    # 校验失败 - 记录详细错误
-                    logger.error(f"Validation failed for {question_id}: {e.message}")
-                    self.errors.append({
-                        "question": question_id,
-                        "reason": e.message,
-                        "field": e.field,
-                        "value": str(e.value) if e.value else None
-                    })
-                    self.skipped_count += 1
+            return self._result(success=True)
 
-                except Exception as e:
-                    logger.error(f"Error processing {question_id}: {e}")
-                    self.errors.append({
-                        "question": question_id,
-                        "reason": str(e)
-                    })
-                    self.skipped_count += 1
+        except Exception as e:
+            logger.error(f"ZIP ingestion failed: {e}", exc_info=True)
+            self.db.rollback()
+            result = self._result(success=False)
+            result["errors"] = self.errors + [{"question": "GLOBAL", "reason": str(e)}]
+            return result
 
-            # 7. 提交数据库事务
-            self.db.commit()
-            logger.info(f"Ingestion complete: {self.processed_count} processed, {self.skipped_count} skipped")
+        finally:
+            # 关闭 ZIP
+            if self.package:
+                self.package.close()
+                self.package = None
 
-            return {
-                "success": True,
-                "processed_count": self.processed_count,
-                "skipped_count": self.skipped_count,
-                "errors": self.errors
+    def validate_zip(
+        self,
+        zip_file: Union[str, IO[bytes]],
+        original_filename: str = None
+    ) -> Dict[str, Any]:
+        """
+        只校验不导入 (dry run)
+
+        只读取 config.json 和 questions/*.json，图片是否存在只查 ZIP 中央目录；
+        不解压图片，不访问数据库和 static/ (db 可为 None)。
+
+        Returns:
+            与 ingest_zip 相同的错误报告 (processed_count 为校验通过的题目数)，另加
+            {
+                "dry_run": True,
+                "valid": True/False (所有题目都通过),
+                "question_count": 15,
+                "source_filename": "9709_s24_qp_12.pdf",
+                "warnings": ["No syllabus found for subject: ..."],
+                "elapsed_ms": 4.2
             }
+        """
+        start = time.perf_counter()
+        question_count = 0
+        source_filename = None
+        warnings: List[str] = []
+        try:
+            self.package = ZipPackage(zip_file)
+            config = self._read_config()
+
+            subject = config.get('subject', '')
+            subject_code = self.validator.get_subject_code(subject)
+            if not subject_code:
+                warnings.append(f"No syllabus found for subject: {subject or '(none)'}; metadata not validated")
+            source_filename = self._determine_source_filename(config, original_filename)
+
+            question_jsons = self._list_questions('questions')
+            question_count = len(question_jsons)
+
+            # 1. 读取题目并检查图片 (元数据留到第 2 步整包校验)
+            checked: List[Tuple[str, Optional[Dict[str, Any]], Optional[Exception]]] = []
+            for json_filename in question_jsons:
+                question_id = json_filename.replace('.json', '')
+                try:
+                    _, question_data, merged_data, question_image_src, answer_image_src = self._read_question(
+                        question_id, 'questions', 'answers', config
+                    )
+                    self._check_question(
+                        question_data, merged_data, question_image_src, answer_image_src, subject_code=None
+                    )
+                    checked.append((question_id, self._validation_data(merged_data), None))
+                except Exception as e:
+                    checked.append((question_id, None, e))
+
+            # 2. SyllabusValidator 批量严格校验 (错误按题目顺序合并)
+            validation_errors = iter(self.validator.validate_many(
+                [data for _, data, _ in checked if data is not None],
+                subject=subject_code,
+                strict=True
+            ) if subject_code else [])
+            for question_id, data, error in checked:
+                if data is not None and subject_code:
+                    error = next(validation_errors)
+                if error is not None:
+                    self.errors.append(self._question_error(question_id, error))
+                    self.skipped_count += 1
+                else:
+                    self.processed_count += 1
+
+            result = self._result(success=True)
 
         except Exception as e:
-            logger.error(f"ZIP ingestion failed: {e}", exc_info=True)
-            self.db.rollback()
-            return {
-                "success": False,
-                "processed_count": self.processed_count,
-                "skipped_count": self.skipped_count,
-                "errors": self.errors + [{"question": "GLOBAL", "reason": str(e)}]
-            }
+            logger.warning(f"ZIP validation failed: {e}")
+            result = self._result(success=False)
+            result["errors"] = self.errors + [{"question": "GLOBAL", "reason": str(e)}]
 
         finally:
-            # 清理临时目录
-            self._cleanup()
+            if self.package:
+                self.package.close()
+                self.package = None
+
+        result.update({
+            "dry_run": True,
+            "valid": result["success"] and not result["errors"],
+            "question_count": question_count,
+            "source_filename": source_filename,
+            "warnings": warnings,
+            "elapsed_ms": round((time.perf_counter() - start) * 1000, 1),
+        })
+        return result
+
+    @classmethod
+    def package_identity(cls, zip_file_path: str, original_filename: str = None) -> Tuple[str, str]:
+        """
+        (source_filename, 包内容哈希)，与 ingest_zip 查导入台账时使用的相同
 
-    def _extract_zip(self, zip_path: str) -> str:
-        """解压 ZIP 文件到临时目录"""
-        temp_dir = tempfile.mkdtemp(prefix="haoexam_upload_")
+        只读取中央目录和 config.json，用于导入前判断哪些包对应同一份试卷。
+        """
+        package = open_package(zip_file_path)
+        try:
+            config = package.read_json('config.json') if package.exists('config.json') else {}
+            return cls._determine_source_filename(config, original_filename), package.content_hash()
+        finally:
+            package.close()
+
+    @contextmanager
+    def _question_pool(self) -> Iterator[Executor]:
+        """题目处理线程池: 使用共享的 executor，或为本包创建 (结束时关闭)"""
+        if self.executor is not None:
+            yield self.executor
+            return
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="ingest") as pool:
+            yield pool
+
+    def _emit(self, event: str, data: Dict[str, Any]):
+        if self.progress:
+            self.progress(event, data)
+
+    def _result(self, success: bool, unchanged_package: bool = False) -> Dict[str, Any]:
+        return {
+            "success": success,
+            "processed_count": self.processed_count,
+            "skipped_count": self.skipped_count,
+            "errors": self.errors,
+            "unchanged_package": unchanged_package,
+            "inserted_count": self.inserted_count,
+            "updated_count": self.updated_count,
+            "unchanged_count": self.unchanged_count,
+            "deleted_count": self.deleted_count,
+            "image_bytes_before": self.image_bytes_before,
+            "image_bytes_after": self.image_bytes_after,
+            "images_normalized": self.images_normalized,
+        }
 
-        with zipfile.ZipFile(zip_path, 'r') as zf:
-            zf.extractall(temp_dir)
+    @staticmethod
+    def _question_error(question_id: str, e: Exception) -> Dict[str, Any]:
+        """题目处理失败 -> 错误报告条目"""
+        if isinstance(e, ValidationError):
+            return {
+                "question": question_id,
+                "reason": e.message,
+                "field": e.field,
+                "value": str(e.value) if e.value else None
+            }
+        return {"question": question_id, "reason": str(e)}
 
-        return temp_dir
+    def _write_rows(
+        self,
+        ledger: IngestLedger,
+        ledger_package: Optional[models.IngestPackage],
+        source_filename: str,
+        package_hash: str,
+        inserts: List[Tuple[str, str, Dict[str, Any]]],
+        updates: List[Tuple[int, Dict[str, Any]]],
+        entries: Dict[str, Tuple[int, str]],
+        removed: Dict[str, Tuple[int, Optional[str]]],
+        duplicate_ids: List[int],
+        delete_removed: bool
+    ) -> Tuple[List[int], List[str]]:
+        """写入题目行和台账 (不提交)，返回 (新增的题目 ID, 提交后回收的旧图片路径)"""
+        ids = insert_questions(self.db, [row for _, _, row in inserts])
+        for (question_id, content_hash, _), new_id in zip(inserts, ids):
+            entries[question_id] = (new_id, content_hash)
+        self.inserted_count = len(ids)
+
+        released = update_questions(self.db, updates)
+        self.updated_count = len(updates)
+
+        # 包中已移除的题目: 删除，或保留在台账中 (之后仍可用 delete_removed 删除)
+        self.deleted_count = 0
+        if delete_removed:
+            removed_ids = [question_id for question_id, _ in removed.values()] + duplicate_ids
+            released += self._delete_questions(removed_ids)
+        else:
+            entries.update({key: (question_id, content_hash or "")
+                            for key, (question_id, content_hash) in removed.items()})
+
+        # 有题目失败时不记录包哈希: 重新上传同一个包时不会整包跳过，失败的题目会重试
+        ledger.record(ledger_package, source_filename, package_hash if not self.errors else "", entries)
+        return ids, released
+
+    @staticmethod
+    def _keep_entry(entries: Dict[str, Tuple[int, str]], known: Dict, question_id: str):
+        """
+        题目本次处理失败: 已有的题目行保持不变，台账保留旧记录
+        (旧记录没有哈希时留空，下次重新处理)
+        """
+        if question_id in known:
+            existing_id, content_hash = known[question_id]
+            entries[question_id] = (existing_id, content_hash or "")
+
+    def _delete_questions(self, question_ids: List[int]) -> List[str]:
+        """删除题目 (包中已移除的 / 台账之前重复导入的)，返回其图片路径 (提交后回收)"""
+        paths = []
+        if not question_ids:
+            return paths
+        IngestLedger(self.db).forget(question_ids)
+        for question in self.db.query(models.Question).filter(models.Question.id.in_(question_ids)):
+            paths.extend([question.question_image_path, question.answer_image_path])
+            self.db.delete(question)
+            self.deleted_count += 1
+        self.db.flush()
+        return paths
 
     def _read_config(self) -> Dict[str, Any]:
         """读取 config.json"""
-        config_path = os.path.join(self.temp_dir, 'config.json')
-
-        if not os.path.exists(config_path):
+        if not self.package.exists('config.json'):
             logger.warning("config.json not found, using empty config")
             return {}
 
-        with open(config_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        return self.package.read_json('config.json')
 
-    def _determine_source_filename(self, config: Dict, original_filename: str) -> str:
+    @staticmethod
+    def _determine_source_filename(config: Dict, original_filename: str) -> str:
         """
         确定 source_filename
         优先使用 config 中的信息构建标准文件名
@@ -207,28 +635,34 @@ class ZipIngestor:
         # 最后回退
         return f"unknown_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
 
+    def _list_questions(self, questions_dir: str) -> List[str]:
+        """包内所有题目 JSON 文件名 (按题号排序)"""
+        if not self.package.has_dir(questions_dir):
+            raise ValueError("ZIP does not contain 'questions' directory")
+
+        return sorted([
+            f for f in self.package.list_dir(questions_dir)
+            if f.endswith('.json')
+        ], key=self._sort_question_key)
+
     def _sort_question_key(self, filename: str) -> int:
         """用于排序题目文件的 key 函数"""
         # Q1.json -> 1, Q10.json -> 10
         match = re.search(r'Q(\d+)', filename)
         return int(match.group(1)) if match else 0
 
-    def _process_question(
+    def _read_question(
         self,
         question_id: str,
-        question_index: int,
         questions_dir: str,
         answers_dir: str,
-        config: Dict,
-        subject_code: Optional[str],
-        source_filename: str
-    ):
-        """处理单个题目"""
+        config: Dict
+    ) -> Tuple[str, Dict[str, Any], Dict[str, Any], str, str]:
+        """读取题目 JSON，返回 (JSON 成员名, 题目数据, 合并 config 后的数据, 题目图片成员名, 答案图片成员名)"""
+        json_name = f"{questions_dir}/{question_id}.json"
 
         # 1. 读取题目 JSON
-        json_path = os.path.join(questions_dir, f"{question_id}.json")
-        with open(json_path, 'r', encoding='utf-8') as f:
-            question_data = json.load(f)
+        question_data = self.package.read_json(json_name)
 
         # 2. 合并 config 和题目数据
         merged_data = {**config, **question_data}
@@ -238,71 +672,112 @@ class ZipIngestor:
         question_image_name = images.get('question', f"{question_id}.jpg")
         answer_image_name = images.get('answer', f"{question_id}_ans.jpg")
 
-        question_image_src = os.path.join(questions_dir, question_image_name)
-        answer_image_src = os.path.join(answers_dir, answer_image_name)
+        question_image_src = f"{questions_dir}/{question_image_name}"
+        answer_image_src = f"{answers_dir}/{answer_image_name}"
+        return json_name, question_data, merged_data, question_image_src, answer_image_src
 
-        # 3.5 检查是否有文本答案 (选择题)
-        text_answer = question_data.get('answer')  # 例如: "A", "B", "C", "D"
-
-        # 4. 验证图片存在
-        if not os.path.exists(question_image_src):
-            raise FileNotFoundError(f"Question image not found: {question_image_name}")
-
-        # 答案图片: 如果有文本答案则可选，否则必须存在
-        has_answer_image = os.path.exists(answer_image_src)
-        if not has_answer_image and not text_answer:
-            raise FileNotFoundError(f"Answer image not found: {answer_image_name}")
-
-        # 5. 使用 SyllabusValidator 严格校验元数据
-        paper_code = merged_data.get('paper_number', 'P1')
-        topic = merged_data.get('topic', '')
-
-        # 兼容新旧格式: subtopics (数组) 或 subtopic (字符串)
+    @staticmethod
+    def _subtopics(merged_data: Dict[str, Any]) -> List[str]:
+        """兼容新旧格式: subtopics (数组) 或 subtopic (字符串)"""
         subtopics_list = merged_data.get('subtopics', [])
         if not subtopics_list:
             # 旧格式: 单个 subtopic 字符串
             old_subtopic = merged_data.get('subtopic', '')
             subtopics_list = [old_subtopic] if old_subtopic else []
+        return subtopics_list
 
-        # 取第一个作为主 subtopic (用于 Syllabus 校验)
-        subtopic = subtopics_list[0] if subtopics_list else ''
+    def _check_question(
+        self,
+        question_data: Dict[str, Any],
+        merged_data: Dict[str, Any],
+        question_image_src: str,
+        answer_image_src: str,
+        subject_code: Optional[str]
+    ) -> bool:
+        """
+        校验单个题目 (只查中央目录，不读取图片内容)，返回是否有答案图片
 
-        if subject_code:
-            # 构建校验数据
-            validation_data = {
-                'paper_number': paper_code,
-                'topic': topic,
-                'subtopics': subtopics_list,
-            }
+        图片缺失抛出 FileNotFoundError，元数据不符合 Syllabus 抛出 ValidationError
+        """
+        # 检查是否有文本答案 (选择题)
+        text_answer = question_data.get('answer')  # 例如: "A", "B", "C", "D"
+
+        # 验证图片存在
+        if not self.package.exists(question_image_src):
+            raise FileNotFoundError(f"Question image not found: {posixpath.basename(question_image_src)}")
 
-            # 调用 validator 进行严格校验
+        # 答案图片: 如果有文本答案则可选，否则必须存在
+        has_answer_image = self.package.exists(answer_image_src)
+        if not has_answer_image and not text_answer:
+            raise FileNotFoundError(f"Answer image not found: {posixpath.basename(answer_image_src)}")
+
+        if subject_code:
+            # 使用 SyllabusValidator 严格校验元数据
             # 校验失败时会抛出 ValidationError
             self.validator.validate_question_metadata_or_raise(
-                validation_data,
+                self._validation_data(merged_data),
                 subject=subject_code,
                 strict=True  # 严格模式：subtopic 也必须匹配
             )
+        return has_answer_image
+
+    @classmethod
+    def _validation_data(cls, merged_data: Dict[str, Any]) -> Dict[str, Any]:
+        """SyllabusValidator 校验的字段"""
+        return {
+            'paper_number': merged_data.get('paper_number', 'P1'),
+            'topic': merged_data.get('topic', ''),
+            'subtopics': cls._subtopics(merged_data),
+        }
+
+    def _prepare_question(
+        self,
+        question_id: str,
+        question_index: int,
+        questions_dir: str,
+        answers_dir: str,
+        config: Dict,
+        subject_code: Optional[str],
+        source_filename: str,
+        known_hash: Optional[str] = None
+    ) -> Tuple[str, Optional[Dict[str, Any]]]:
+        """
+        处理单个题目 (在线程池中执行，不访问数据库会话)
+
+        返回 (内容哈希, models.Question 的字段)；内容与台账记录一致时字段为 None，
+        否则校验通过后存储图片。
+        """
+        # 1-3. 读取题目 JSON，合并 config，确定图片成员
+        json_name, question_data, merged_data, question_image_src, answer_image_src = self._read_question(
+            question_id, questions_dir, answers_dir, config
+        )
 
-        # 6. 保存图片到 static 目录
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        # 3.2 内容未变 (config.json、题目 JSON、图片均相同) 则跳过
+        content_hash = self.package.content_hash(
+            ['config.json', json_name, question_image_src, answer_image_src]
+        )
+        if content_hash == known_hash:
+            return content_hash, None
 
-        q_filename = f"{source_filename.replace('.pdf', '')}_{question_id}_q_{timestamp}.jpg"
+        # 4-5. 图片存在性 + SyllabusValidator 严格校验
+        has_answer_image = self._check_question(
+            question_data, merged_data, question_image_src, answer_image_src, subject_code
+        )
 
-        uploads_dir = settings.UPLOADS_DIR
-        uploads_dir.mkdir(parents=True, exist_ok=True)
+        paper_code = merged_data.get('paper_number', 'P1')
+        topic = merged_data.get('topic', '')
+        subtopics_list = self._subtopics(merged_data)
 
-        q_dest = uploads_dir / q_filename
-        shutil.copy2(question_image_src, q_dest)
+        # 取第一个作为主 subtopic
+        subtopic = subtopics_list[0] if subtopics_list else ''
 
-        # 相对路径 (用于数据库存储)
-        q_relative_path = f"static/uploads/{q_filename}"
+        # 6. 从 ZIP 成员流式写入内容寻址存储 (相同内容只存一份)
+        # 返回相对路径 (用于数据库存储)
+        q_relative_path = self._store_member(question_image_src)
 
-        # 答案图片: 如果存在则复制，否则使用占位符 (文本答案场景)
+        # 答案图片: 如果存在则存储，否则使用占位符 (文本答案场景)
         if has_answer_image:
-            a_filename = f"{source_filename.replace('.pdf', '')}_{question_id}_a_{timestamp}.jpg"
-            a_dest = uploads_dir / a_filename
-            shutil.copy2(answer_image_src, a_dest)
-            a_relative_path = f"static/uploads/{a_filename}"
+            a_relative_path = self._store_member(answer_image_src)
         else:
             # 文本答案场景: 使用占位符路径
             a_relative_path = "text_answer"
@@ -349,12 +824,12 @@ class ZipIngestor:
         # 提取 subject_code (从参数或 merged_data)
         db_subject_code = subject_code or merged_data.get('subject_code', '')
 
-        # 8. 创建数据库记录
+        # 8. 数据库字段
         # 标准化 subject 名称 (首字母大写)
         subject_raw = merged_data.get('subject', '')
         subject_normalized = self._normalize_subject(subject_raw)
 
-        db_question = models.Question(
+        return content_hash, dict(
             # 图片路径
             question_image_path=q_relative_path,
             answer_image_path=a_relative_path,
@@ -385,19 +860,33 @@ class ZipIngestor:
             answer_text=answer_text,
         )
 
-        self.db.add(db_question)
-        self.db.flush()  # 获取 ID
-
-        logger.debug(f"Created question {question_id} (DB ID: {db_question.id})")
-
-    def _cleanup(self):
-        """清理临时目录"""
-        if self.temp_dir and os.path.exists(self.temp_dir):
-            try:
-                shutil.rmtree(self.temp_dir)
-                self.temp_dir = None
-            except Exception as e:
-                logger.warning(f"Failed to cleanup temp dir: {e}")
+    def _collect_row(self, fields: Dict[str, Any]):
+        """记录已存储的图片 (主线程，按题号顺序调用)"""
+        self.stored_paths.append(fields['question_image_path'])
+        if fields['answer_image_path'] != "text_answer":
+            self.stored_paths.append(fields['answer_image_path'])
+
+    def _store_member(self, name: str) -> str:
+        """ZIP 成员 -> 内容寻址存储 (可选先规范化为 JPEG)，返回相对路径"""
+        if not self.normalize_images:
+            ext = os.path.splitext(name)[1] or ".jpg"
+            with self.package.open(name) as stream:
+                relative = self.image_store.put_stream(stream, ext)
+            size = self.package.member_size(name)
+            self._count_image(size, size, changed=False)
+            return relative
+
+        with self.package.open(name) as stream:
+            original = stream.read()
+        data = normalize_image(original, settings.INGEST_MAX_IMAGE_DIMENSION, settings.INGEST_JPEG_QUALITY)
+        self._count_image(len(original), len(data), changed=data != original)
+        return self.image_store.put_bytes(data, ".jpg")
+
+    def _count_image(self, before: int, after: int, changed: bool):
+        with self._image_stats_lock:
+            self.image_bytes_before += before
+            self.image_bytes_after += after
+            self.images_normalized += int(changed)
 
     def _normalize_subject(self, subject: str) -> str:
         """
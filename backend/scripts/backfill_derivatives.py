@@ -0,0 +1,71 @@
+"""
+Backfill gallery thumbnails (small/medium WebP + JPEG) for existing questions.
+
+Usage (from backend/):
+    python scripts/backfill_derivatives.py [--workers 4] [--overwrite]
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import union  # noqa: E402
+
+from app import models  # noqa: E402
+from app.database import SessionLocal  # noqa: E402
+from app.services.derivatives import generate_derivatives  # noqa: E402
+
+
+def collect_image_paths(db) -> list:
+    """All distinct image paths referenced by questions (placeholders excluded)."""
+    query = union(
+        db.query(models.Question.question_image_path),
+        db.query(models.Question.answer_image_path),
+    )
+    return sorted(row[0] for row in db.execute(query) if row[0] and row[0].startswith("static/"))
+
+
+def backfill(workers: int, overwrite: bool):
+    db = SessionLocal()
+    try:
+        paths = collect_image_paths(db)
+    finally:
+        db.close()
+
+    print(f"🔄 Generating derivatives for {len(paths)} image(s) with {workers} worker(s)")
+    start = time.perf_counter()
+    written_bytes = 0
+    generated = 0
+    failed = 0
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(generate_derivatives, p, overwrite): p for p in paths}
+        for done, future in enumerate(as_completed(futures), start=1):
+            try:
+                written = future.result()
+                written_bytes += written
+                generated += 1 if written else 0
+            except Exception as e:
+                failed += 1
+                print(f"❌ {futures[future]}: {e}")
+            if done % 100 == 0:
+                print(f"   {done}/{len(paths)}")
+
+    elapsed = time.perf_counter() - start
+    print(
+        f"✅ Done in {elapsed:.1f}s: {generated} generated, "
+        f"{len(paths) - generated - failed} up to date, {failed} failed, "
+        f"{written_bytes / 1024 / 1024:.1f} MB written"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill gallery thumbnails")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--overwrite", action="store_true", help="Regenerate existing derivatives")
+    args = parser.parse_args()
+    backfill(args.workers, args.overwrite)
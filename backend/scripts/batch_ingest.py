@@ -0,0 +1,128 @@
+"""
+Ingest many ExamSlicer ZIP packages at once (e.g. a whole exam season).
+
+Accepts ZIP packages, archives of ZIP packages, and directories (every *.zip
+directly inside). Packages are ingested concurrently (--packages at a time),
+each in its own transaction, sharing one question-preparation thread pool and
+the syllabus validator; packages for the same paper are ingested in order.
+Re-running is cheap: unchanged packages are skipped by the ingest ledger.
+
+Prints a per-package report; --report writes the full JSON report.
+
+Usage (from backend/):
+    python scripts/batch_ingest.py season_s24/ [more.zip ...] [--packages 3] [--workers 8]
+                                   [--delete-removed] [--normalize-images] [--report report.json]
+                                   [--no-derivatives]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import models  # noqa: E402
+from app.config import settings  # noqa: E402
+from app.database import engine, ensure_indexes  # noqa: E402
+from app.services.derivatives import get_derivative_worker  # noqa: E402
+from app.services.ingest_batch import BatchIngestor, expand_packages  # noqa: E402
+
+
+def collect_inputs(paths):
+    """(path, filename) for every ZIP given directly or found in a directory."""
+    packages = []
+    for path in paths:
+        if os.path.isdir(path):
+            names = sorted(n for n in os.listdir(path) if n.lower().endswith(".zip"))
+            packages.extend((os.path.join(path, n), n) for n in names)
+        elif os.path.isfile(path):
+            packages.append((path, os.path.basename(path)))
+        else:
+            sys.exit(f"❌ Not found: {path}")
+    return packages
+
+
+class ProgressPrinter:
+    """One line per finished package (called from several ingest threads)."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.total = 0
+        self.done = 0
+
+    def __call__(self, event, data):
+        if event == "batch_started":
+            self.total = data["total"]
+        elif event == "package_finished":
+            with self.lock:
+                self.done += 1
+                status = "⏭️ " if data["unchanged_package"] else ("✅" if data["success"] else "❌")
+                print(f"   [{self.done}/{self.total}] {status} {data['package']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch ingest ExamSlicer ZIP packages")
+    parser.add_argument("paths", nargs="+", help="ZIP packages, archives of ZIPs, or directories")
+    parser.add_argument("--packages", type=int, default=settings.INGEST_BATCH_PACKAGES,
+                        help="Packages ingested at the same time")
+    parser.add_argument("--workers", type=int, default=settings.INGEST_WORKERS,
+                        help="Shared question-preparation threads")
+    parser.add_argument("--delete-removed", action="store_true",
+                        help="Delete questions no longer present in a re-ingested package")
+    parser.add_argument("--normalize-images", action="store_true", default=None,
+                        help="Normalize images before storing (default: INGEST_NORMALIZE_IMAGES)")
+    parser.add_argument("--report", help="Write the full JSON report to this file")
+    parser.add_argument("--no-derivatives", action="store_true",
+                        help="Skip gallery thumbnails (backfill later with backfill_derivatives.py)")
+    args = parser.parse_args()
+
+    # Ingest ledger/job tables and newer indexes may not exist yet in a database created by an older version
+    models.Base.metadata.create_all(bind=engine)
+    ensure_indexes()
+
+    with tempfile.TemporaryDirectory(prefix="batch_ingest_") as work_dir:
+        packages = expand_packages(collect_inputs(args.paths), work_dir)
+        print(f"📦 {len(packages)} package(s), {args.packages} at a time, {args.workers} shared worker(s)")
+
+        batch = BatchIngestor(max_packages=args.packages, max_workers=args.workers, progress=ProgressPrinter(),
+                              normalize_images=args.normalize_images)
+        report = batch.ingest(packages, delete_removed=args.delete_removed)
+
+    print(f"\n{'Package':<36}{'Inserted':>10}{'Updated':>9}{'Same':>6}{'Deleted':>9}{'Errors':>8}")
+    for package in report["packages"]:
+        name = package["filename"]
+        if package.get("unchanged_package"):
+            print(f"{name:<36}{'(unchanged package)':>42}")
+            continue
+        print(f"{name:<36}{package['inserted_count']:>10}{package['updated_count']:>9}"
+              f"{package['unchanged_count']:>6}{package['deleted_count']:>9}{len(package['errors']):>8}")
+    print(f"{'Total':<36}{report['inserted_count']:>10}{report['updated_count']:>9}"
+          f"{report['unchanged_count']:>6}{report['deleted_count']:>9}{len(report['errors']):>8}")
+
+    print(f"\n🖼️  Images: {report['image_bytes_before'] / 1024 / 1024:.1f} MB -> "
+          f"{report['image_bytes_after'] / 1024 / 1024:.1f} MB ({report['images_normalized']} normalized)")
+
+    for error in report["errors"]:
+        print(f"   ⚠️  {error.get('package', '-')} {error['question']}: {error['reason']}")
+
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n📝 Report written to {args.report}")
+
+    if batch.stored_paths and not args.no_derivatives:
+        print(f"\n🖼️  Generating thumbnails for {len(batch.stored_paths)} image(s)...")
+        worker = get_derivative_worker()
+        worker.submit(batch.stored_paths)
+        worker.shutdown(wait=True)
+
+    print(f"\n{'✅' if report['success'] else '❌'} {report['succeeded_packages']}/{report['package_count']} "
+          f"package(s) ingested in {report['elapsed_seconds']}s ({report['unchanged_packages']} unchanged)")
+    sys.exit(0 if report["success"] else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Memory benchmark: vertical stitching of large multi-image uploads.
+
+Compares the previous implementation (decode + RGB-convert every input, then
+paste onto one canvas) with utils.stitch_images_from_bytes. Each run happens in
+a fresh subprocess and reports its peak RSS, because Pillow allocates pixel
+buffers outside the Python heap (tracemalloc does not see them).
+
+Usage (from backend/):
+    python scripts/bench_stitch_memory.py [--images 6] [--width 2400] [--height 3200]
+"""
+
+import argparse
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def make_inputs(count: int, width: int, height: int) -> list:
+    """Mixed JPEG/PNG (with alpha) inputs of similar size to phone scans."""
+    from PIL import Image, ImageDraw
+
+    inputs = []
+    for i in range(count):
+        mode = "RGBA" if i % 3 == 2 else "RGB"
+        img = Image.new(mode, (width - i * 40, height), "white")
+        draw = ImageDraw.Draw(img)
+        for y in range(0, img.height, 40):
+            draw.line([(0, y), (img.width, y + 20)], fill=(i * 30 % 255, 0, 0), width=3)
+        buf = io.BytesIO()
+        img.save(buf, format="PNG" if mode == "RGBA" else "JPEG", quality=90)
+        inputs.append(buf.getvalue())
+    return inputs
+
+
+def legacy_stitch(image_bytes_list):
+    """The implementation before bounded-memory stitching (kept here for comparison)."""
+    from PIL import Image
+    from app.utils import _convert_to_rgb
+
+    images = [_convert_to_rgb(Image.open(io.BytesIO(c))) for c in image_bytes_list]
+    max_width = max(img.width for img in images)
+    total_height = sum(img.height for img in images)
+    new_im = Image.new("RGB", (max_width, total_height), (255, 255, 255))
+    y_offset = 0
+    for img in images:
+        new_im.paste(img, (max_width - img.width, y_offset))
+        y_offset += img.height
+    return new_im
+
+
+def run_child(impl: str, count: int, width: int, height: int):
+    from app import utils
+
+    inputs = make_inputs(count, width, height)
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    if impl == "legacy":
+        result = legacy_stitch(inputs)
+    elif impl == "bounded":
+        result = utils.stitch_images_from_bytes(inputs, max_width=0)
+    else:  # bounded + downscale to STITCH_MAX_WIDTH
+        result = utils.stitch_images_from_bytes(inputs)
+    elapsed = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({
+        "impl": impl,
+        "size": list(result.size),
+        "seconds": round(elapsed, 3),
+        "peak_delta_mb": round((peak - baseline) / 1024, 1),  # ru_maxrss is KB on Linux
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stitching peak-memory benchmark")
+    parser.add_argument("--images", type=int, default=6)
+    parser.add_argument("--width", type=int, default=2400)
+    parser.add_argument("--height", type=int, default=3200)
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.images, args.width, args.height)
+        return
+
+    print(f"{args.images} inputs of ~{args.width}x{args.height}\n")
+    for impl in ("legacy", "bounded", "downscale"):
+        out = subprocess.run(
+            [sys.executable, __file__, "--child", impl,
+             "--images", str(args.images), "--width", str(args.width), "--height", str(args.height)],
+            capture_output=True, text=True, check=True,
+        )
+        r = json.loads(out.stdout.strip().splitlines()[-1])
+        print(f"{r['impl']:>10}: {r['size'][0]}x{r['size'][1]}  {r['seconds']:6.2f}s  peak +{r['peak_delta_mb']:7.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Benchmark: SyllabusValidator per-question vs batch validation.
+
+Builds question metadata for every paper of the shipped syllabi (one valid
+question per subtopic plus a share of invalid topics/subtopics), then times:
+
+  legacy   per-question validation that rebuilds the paper's subtopic set and
+           originals list on every call (the validator before PaperLookup)
+  single   validate_question_metadata (precomputed PaperLookup)
+  batch    validate_many over each paper's questions (one package per paper)
+
+Errors (message, field, value) are checked to be identical across the three.
+
+Usage (from backend/):
+    python scripts/bench_validator.py [--repeat 20] [--invalid 0.1]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.validator import ValidationError, get_validator  # noqa: E402
+
+
+def legacy_validate(validator, question_data: dict, subject: str, strict: bool = True):
+    """Per-call lookups as before PaperLookup (same checks and messages)."""
+    subject_code = validator.get_subject_code(subject)
+    paper_code = question_data["paper_number"].upper()
+    paper_data = validator._index[subject_code].get(paper_code)
+    if paper_data is None:
+        return ValidationError(
+            f"Invalid paper '{paper_code}' for subject {subject_code}. "
+            f"Valid papers: {validator.get_valid_papers(subject_code)}",
+            field="paper_number", value=paper_code
+        )
+
+    topic = question_data.get("topic", "")
+    if not topic:
+        return None
+    if validator._normalize_name(topic) not in paper_data:
+        valid_topics = validator.get_valid_topics(subject_code, paper_code)
+        return ValidationError(
+            f"Invalid topic '{topic}' for paper {paper_code}. "
+            f"Valid topics: {valid_topics[:5]}{'...' if len(valid_topics) > 5 else ''}",
+            field="topic", value=topic
+        )
+
+    subtopics_list = question_data.get("subtopics", [])
+    if not subtopics_list or not strict:
+        return None
+    normalized, originals = set(), []
+    for topic_data in paper_data.values():
+        normalized.update(topic_data["subtopics"])
+        originals.extend(topic_data["subtopic_originals"].values())
+    for subtopic in subtopics_list:
+        if subtopic and validator._normalize_name(subtopic) not in normalized:
+            return ValidationError(
+                f"Invalid subtopic '{subtopic}' for paper {paper_code}. "
+                f"Valid subtopics: {originals[:5]}{'...' if len(originals) > 5 else ''}",
+                field="subtopic", value=subtopic
+            )
+    return None
+
+
+def build_packages(validator, invalid: float) -> list:
+    """(subject_code, paper, [question metadata]) for every syllabus paper."""
+    rng = random.Random(0)
+    packages = []
+    for subject_code in sorted(validator.syllabi):
+        for paper in validator.get_valid_papers(subject_code):
+            questions = []
+            for topic in validator.get_valid_topics(subject_code, paper):
+                for subtopic in validator.get_valid_subtopics(subject_code, paper, topic) or [""]:
+                    question = {"paper_number": paper, "topic": topic, "subtopics": [subtopic] if subtopic else []}
+                    roll = rng.random()
+                    if roll < invalid / 2:
+                        question["topic"] = "Not In Syllabus"
+                    elif roll < invalid:
+                        question["subtopics"] = [subtopic, "Not In Syllabus"]
+                    questions.append(question)
+            packages.append((subject_code, paper, questions))
+    return packages
+
+
+def as_tuple(error):
+    return None if error is None else (error.message, error.field, error.value)
+
+
+def timed(label: str, run, repeat: int, count: int) -> list:
+    results = run()  # warm-up (and normalization cache)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        run()
+    elapsed = time.perf_counter() - start
+    per_question = elapsed / (repeat * count) * 1e6
+    print(f"   {label:<8} {elapsed * 1000:>9.1f} ms   {per_question:>6.2f} µs/question")
+    return [as_tuple(e) for e in results]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark SyllabusValidator")
+    parser.add_argument("--repeat", type=int, default=20, help="Timed passes over all packages")
+    parser.add_argument("--invalid", type=float, default=0.1, help="Share of questions with invalid metadata")
+    args = parser.parse_args()
+
+    validator = get_validator()
+    packages = build_packages(validator, args.invalid)
+    if not packages:
+        sys.exit("❌ No syllabus found (backend/syllabus/)")
+    count = sum(len(questions) for _, _, questions in packages)
+    print(f"📚 {len(validator.syllabi)} syllabus file(s), {len(packages)} paper(s), {count} question(s), "
+          f"{args.repeat} pass(es)")
+    for subject_code in sorted(validator.syllabi):
+        papers = [(paper, len(questions)) for code, paper, questions in packages if code == subject_code]
+        print(f"   {subject_code}: " + ", ".join(f"{paper}={n}" for paper, n in papers))
+    print()
+
+    def legacy():
+        return [legacy_validate(validator, q, code) for code, _, questions in packages for q in questions]
+
+    def single():
+        return [validator.validate_question_metadata(q, subject=code)[1]
+                for code, _, questions in packages for q in questions]
+
+    def batch():
+        return [e for code, _, questions in packages for e in validator.validate_many(questions, subject=code)]
+
+    baseline = timed("legacy", legacy, args.repeat, count)
+    results = {"single": timed("single", single, args.repeat, count),
+               "batch": timed("batch", batch, args.repeat, count)}
+
+    invalid = sum(1 for e in baseline if e is not None)
+    mismatched = [label for label, errors in results.items() if errors != baseline]
+    if mismatched:
+        sys.exit(f"❌ Results differ from legacy: {', '.join(mismatched)}")
+    print(f"\n✅ Identical results ({invalid} invalid question(s))")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+Benchmark: ZIP package ingestion with 1 vs N preparation workers.
+
+Builds a synthetic ExamSlicer-style package (config.json, questions/Q*.json,
+question and answer JPEGs, topics taken from the syllabus), then ingests it
+into a throwaway SQLite database and image store for each worker count.
+Every run starts from an empty store so deduplication does not skew timings,
+and the results (question order, stored paths, per-question errors) are
+checked to be identical across runs.
+
+--io-delay-ms adds a fixed delay to every image write, to emulate slower
+storage (network volumes) than the local page cache; workers overlap that
+wait even on a single CPU.
+
+Usage (from backend/):
+    python scripts/bench_zip_ingest.py [--questions 200] [--workers 1 4 8] [--invalid 5] [--io-delay-ms 0]
+"""
+
+import argparse
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image, ImageDraw  # noqa: E402
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app import models  # noqa: E402
+from app.services.image_store import ImageStore  # noqa: E402
+from app.services.validator import get_validator  # noqa: E402
+from app.zip_ingest import ZipIngestor  # noqa: E402
+
+
+def make_jpeg(seed: int, width: int, height: int) -> bytes:
+    """A scan-like page: white background, text-ish strokes."""
+    rng = random.Random(seed)
+    img = Image.new("RGB", (width, height), "white")
+    draw = ImageDraw.Draw(img)
+    for y in range(20, height - 20, 28):
+        x = 20
+        while x < width - 60:
+            w = rng.randint(8, 40)
+            draw.rectangle([x, y, x + w, y + 14], fill=(rng.randint(0, 60),) * 3)
+            x += w + rng.randint(6, 14)
+    buf = io.BytesIO()
+    img.save(buf, format="JPEG", quality=85)
+    return buf.getvalue()
+
+
+def build_package(path: str, count: int, invalid: int, width: int, height: int):
+    validator = get_validator()
+    paper = "P1"
+    subtopics = [
+        (topic, subtopic)
+        for topic in validator.get_valid_topics("9709", paper)
+        for subtopic in validator.get_valid_subtopics("9709", paper, topic)
+    ]
+    if not subtopics:
+        sys.exit("❌ No 9709 syllabus found (backend/syllabus/)")
+
+    invalid_ids = set(random.Random(0).sample(range(1, count + 1), min(invalid, count)))
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("config.json", json.dumps({
+            "curriculum": "ALEVEL-CIE", "subject": "math", "paper_number": paper, "year": "2024", "month": "6",
+        }))
+        for n in range(1, count + 1):
+            topic, subtopic = subtopics[n % len(subtopics)]
+            if n in invalid_ids:
+                subtopic = "Not In Syllabus"
+            zf.writestr(f"questions/Q{n}.json", json.dumps({
+                "topic": topic,
+                "subtopic": subtopic,
+                "question_type": "Calculation",
+                "difficulty": "Medium",
+                "images": {"question": f"Q{n}.jpg", "answer": f"Q{n}_ans.jpg"},
+            }))
+            zf.writestr(f"questions/Q{n}.jpg", make_jpeg(n, width, height))
+            zf.writestr(f"answers/Q{n}_ans.jpg", make_jpeg(-n, width, height // 2))
+
+
+class SlowImageStore(ImageStore):
+    def __init__(self, *args, delay: float = 0.0, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.delay = delay
+
+    def put_stream(self, stream, ext=".jpg"):
+        time.sleep(self.delay)
+        return super().put_stream(stream, ext)
+
+
+def run(package: str, workers: int, io_delay: float) -> tuple:
+    with tempfile.TemporaryDirectory(prefix="bench_ingest_") as tmp:
+        engine = create_engine(f"sqlite:///{tmp}/bench.db")
+        models.Base.metadata.create_all(engine)
+        db = sessionmaker(bind=engine)()
+        try:
+            ingestor = ZipIngestor(db, max_workers=workers)
+            ingestor.image_store = SlowImageStore(
+                root=Path(tmp) / "static" / "uploads", base_dir=Path(tmp), delay=io_delay)
+            start = time.perf_counter()
+            result = ingestor.ingest_zip(package, "bench.zip")
+            elapsed = time.perf_counter() - start
+            rows = db.query(
+                models.Question.question_index, models.Question.question_number, models.Question.question_image_path
+            ).order_by(models.Question.id).all()
+        finally:
+            db.close()
+            engine.dispose()
+    return elapsed, result, [tuple(r) for r in rows]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ZIP ingestion benchmark")
+    parser.add_argument("--questions", type=int, default=200)
+    parser.add_argument("--invalid", type=int, default=5, help="Questions with an unknown subtopic")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--width", type=int, default=1600)
+    parser.add_argument("--height", type=int, default=900)
+    parser.add_argument("--io-delay-ms", type=float, default=0.0, help="Extra latency per image write")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per worker count (best is reported)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="bench_pkg_") as tmp:
+        package = os.path.join(tmp, "package.zip")
+        build_package(package, args.questions, args.invalid, args.width, args.height)
+        size_mb = os.path.getsize(package) / 1024 / 1024
+        print(f"📦 {args.questions} questions, {size_mb:.1f} MB package, {os.cpu_count()} CPU(s), "
+              f"{args.io_delay_ms:g} ms extra per image write\n")
+
+        reference = None
+        baseline = None
+        for workers in args.workers:
+            timings = []
+            for _ in range(args.repeat):
+                elapsed, result, rows = run(package, workers, args.io_delay_ms / 1000)
+                timings.append(elapsed)
+                outcome = (result["processed_count"], result["skipped_count"], result["errors"], rows)
+                if reference is None:
+                    reference = outcome
+                elif outcome != reference:
+                    sys.exit(f"❌ Results with {workers} worker(s) differ from the first run")
+            best = min(timings)
+            baseline = baseline or best
+            print(f"{workers:>3} worker(s): {best:6.2f}s  ({args.questions / best:6.1f} q/s, "
+                  f"x{baseline / best:.2f})  processed={result['processed_count']} skipped={result['skipped_count']}")
+
+    print("\n✅ Identical question order, stored paths and errors across runs")
+
+
+if __name__ == "__main__":
+    main()
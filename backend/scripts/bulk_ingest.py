@@ -1,305 +1,257 @@
 """
-Bulk ingestion script for ExamSlicer output.
-Processes folders containing Qx.jpg, Qx.json, and Qx_ans.jpg files.
+Bulk-ingest a directory tree of unpacked ExamSlicer exports.
+
+Every directory containing a questions/ folder (the unpacked layout of an
+upload ZIP: config.json, questions/, answers/) is one package; *.zip packages
+found in the tree are ingested too. Packages go through the same pipeline as
+uploads (ZipIngestor: syllabus validation, content-addressed images, bulk
+writes, ingest ledger), spread over a process pool. Packages for the same
+paper are ingested in order by one worker.
+
+Resumable: every successfully ingested package is appended to a checkpoint
+file with its fingerprint (file names, sizes and modification times) and
+skipped on the next run until its files change. --watch keeps polling the
+root for a drop folder; a package is picked up once its fingerprint has been
+stable for one polling interval (copy finished).
+
+Usage (from backend/):
+    python scripts/bulk_ingest.py exports/ [--processes 4] [--threads 4] [--delete-removed] [--normalize-images]
+                                  [--watch [--interval 10]] [--list] [--no-derivatives]
 """
 
+import argparse
+import json
 import os
+import signal
 import sys
-import json
-import shutil
-import argparse
-from datetime import datetime
-from pathlib import Path
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
-# Add parent directory to import app modules
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from app.database import SessionLocal
-from app import models, schemas
-
-class BulkIngestor:
-    def __init__(self, dry_run=False):
-        self.dry_run = dry_run
-        self.db = SessionLocal() if not dry_run else None
-        self.stats = {
-            "total_questions": 0,
-            "created": 0,
-            "skipped": 0,
-            "errors": 0,
-            "tags_created": 0
-        }
-    
-    def __del__(self):
-        if self.db:
-            self.db.close()
-    
-    def find_or_create_tag(self, name, category, paper=None, subject=None):
-        """Find existing tag or create new one"""
-        if self.dry_run:
-            print(f"      [DRY-RUN] Would find/create tag: {name} ({category})")
-            return None
-        
-        # Query for existing tag
-        tag = self.db.query(models.Tag).filter(
-            models.Tag.name == name,
-            models.Tag.category == category,
-            models.Tag.paper == paper,
-            models.Tag.subject == subject
-        ).first()
-        
-        if not tag:
-            tag = models.Tag(
-                name=name,
-                category=category,
-                paper=paper,
-                subject=subject
-            )
-            self.db.add(tag)
-            self.db.flush()
-            self.stats["tags_created"] += 1
-            print(f"      ✅ Created new tag: {name} ({category})")
-        
-        return tag
-    
-    def copy_image_to_static(self, source_path, question_id,  image_type="question"):
-        """Copy image file to static directory with unique name"""
-        if not os.path.exists(source_path):
-            print(f"      ⚠️  Warning: Image not found: {source_path}")
-            return None
-        
-        # Create static directory if it doesn't exist
-        static_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), "static")
-        os.makedirs(static_dir, exist_ok=True)
-        
-        # Generate unique filename
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        ext = os.path.splitext(source_path)[1]
-        filename = f"q{question_id}_{image_type}_{timestamp}{ext}"
-        dest_path = os.path.join(static_dir, filename)
-        relative_path = f"static/{filename}"
-        
-        if self.dry_run:
-            print(f"      [DRY-RUN] Would copy {os.path.basename(source_path)} -> {relative_path}")
-            return relative_path
-        
-        shutil.copy2(source_path, dest_path)
-        return relative_path
-    
-    def ingest_question(self, json_path, question_dir, answer_dir, default_metadata=None):
-        """Ingest a single question from JSON and images"""
+from app import models  # noqa: E402
+from app.config import settings  # noqa: E402
+from app.database import SessionLocal, engine, ensure_indexes  # noqa: E402
+from app.services.derivatives import get_derivative_worker  # noqa: E402
+from app.services.ingest_batch import group_packages, package_identity  # noqa: E402
+from app.zip_ingest import ZipIngestor  # noqa: E402
+
+DEFAULT_STATE = settings.BASE_DIR / "bulk_ingest_state.jsonl"
+
+
+# =============================================================================
+# Worker (runs in a child process)
+# =============================================================================
+def init_worker():
+    # Ctrl-C is handled by the coordinator (workers finish their current package)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    # Connections inherited from the parent must not be reused after fork
+    engine.dispose(close=False)
+
+
+def ingest_group(packages: list, delete_removed: bool, threads: int, normalize_images) -> list:
+    """Ingest one paper's packages in order; one session and transaction per package."""
+    outcomes = []
+    for path, name in packages:
+        start = time.perf_counter()
+        db = SessionLocal()
         try:
-            # Read JSON metadata
-            with open(json_path, 'r', encoding='utf-8') as f:
-                metadata = json.load(f)
-            
-            question_num = os.path.basename(json_path).replace('.json', '')
-            print(f"\n  📝 Processing {question_num}...")
-            
-            # Get image paths from JSON or construct them
-            if "images" in metadata:
-                question_image_name = metadata["images"].get("question", f"{question_num}.jpg")
-                answer_image_name = metadata["images"].get("answer", f"{question_num}_ans.jpg")
+            ingestor = ZipIngestor(db, max_workers=threads, normalize_images=normalize_images)
+            result = ingestor.ingest_zip(path, original_filename=name, delete_removed=delete_removed)
+        finally:
+            db.close()
+        outcomes.append({
+            "path": path,
+            "result": result,
+            "stored_paths": ingestor.stored_paths if result["success"] else [],
+            "seconds": time.perf_counter() - start,
+        })
+    return outcomes
+
+
+# =============================================================================
+# Coordinator
+# =============================================================================
+def find_packages(root: str) -> list:
+    """(path, upload-style filename) for every package under root, in path order."""
+    packages = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        if "questions" in dirnames:
+            # Same fallback source name as uploading this directory zipped
+            packages.append((dirpath, os.path.basename(os.path.normpath(dirpath)) + ".zip"))
+            dirnames.clear()
+            continue
+        packages.extend(
+            (os.path.join(dirpath, f), f) for f in sorted(filenames) if f.lower().endswith(".zip")
+        )
+    return packages
+
+
+def package_size(path: str) -> int:
+    if not os.path.isdir(path):
+        return os.path.getsize(path)
+    return sum(
+        os.path.getsize(os.path.join(dirpath, f))
+        for dirpath, _, filenames in os.walk(path) for f in filenames
+    )
+
+
+def load_state(state_path) -> dict:
+    """{package path: fingerprint} of packages ingested by earlier runs."""
+    if not os.path.exists(state_path):
+        return {}
+    with open(state_path) as f:
+        entries = [json.loads(line) for line in f if line.strip()]
+    return {entry["path"]: entry["fingerprint"] for entry in entries}
+
+
+class Totals:
+    """Counters across cycles; rates use time spent ingesting (not idle --watch polling)."""
+
+    def __init__(self):
+        self.seconds = 0.0
+        self.packages = 0
+        self.failed = 0
+        self.questions = 0
+        self.bytes = 0
+        self.counts = {"inserted_count": 0, "updated_count": 0, "unchanged_count": 0,
+                       "deleted_count": 0, "skipped_count": 0,
+                       "image_bytes_before": 0, "image_bytes_after": 0, "images_normalized": 0}
+
+    def add(self, result: dict, size: int):
+        self.packages += 1
+        self.failed += 0 if result["success"] else 1
+        self.bytes += size
+        for field in self.counts:
+            self.counts[field] += result.get(field, 0)
+        self.questions += (result["processed_count"] + result["skipped_count"] + result["unchanged_count"])
+
+    def rate(self) -> str:
+        elapsed = max(self.seconds, 1e-9)
+        return (f"{self.questions / elapsed:.1f} questions/s, "
+                f"{self.bytes / 1024 / 1024 / elapsed:.1f} MB/s")
+
+
+def run_cycle(pool, packages: list, fingerprints: dict, args, state, done: dict, failed: dict,
+              totals: Totals) -> list:
+    """Ingest the given packages; return the image paths stored (for thumbnails)."""
+    start = time.perf_counter()
+    identities = [fingerprints[path] for path, _ in packages]
+    groups = group_packages(identities)
+    sizes = {path: package_size(path) for path, _ in packages}
+    print(f"📦 {len(packages)} package(s) in {len(groups)} paper group(s)")
+
+    futures = [
+        pool.submit(ingest_group, [packages[i] for i in group], args.delete_removed, args.threads,
+                    args.normalize_images)
+        for group in groups
+    ]
+    stored = []
+    for future in as_completed(futures):
+        for outcome in future.result():
+            path, result = outcome["path"], outcome["result"]
+            size = sizes[path]
+            totals.add(result, size)
+            stored.extend(outcome["stored_paths"])
+
+            name = os.path.relpath(path, args.root)
+            if result["success"]:
+                if result.get("unchanged_package"):
+                    print(f"   ⏭️  {name}: unchanged")
+                else:
+                    print(f"   ✅ {name}: {result['inserted_count']} inserted, {result['updated_count']} updated, "
+                          f"{result['unchanged_count']} unchanged, {result['skipped_count']} skipped "
+                          f"({size / 1024 / 1024:.1f} MB in {outcome['seconds']:.1f}s)")
+                identity = fingerprints[path]
+                done[path] = identity and identity[1]
+                state.write(json.dumps({"path": path, "fingerprint": done[path],
+                                        "result": {k: v for k, v in result.items() if k != "errors"}}) + "\n")
+                state.flush()
             else:
-                question_image_name = f"{question_num}.jpg"
-                answer_image_name = f"{question_num}_ans.jpg"
-            
-            question_image_path = os.path.join(question_dir, question_image_name)
-            answer_image_path = os.path.join(answer_dir, answer_image_name)
-            
-            # Check if images exist
-            if not os.path.exists(question_image_path):
-                print(f"    ❌ Error: Question image not found: {question_image_path}")
-                self.stats["errors"] += 1
-                return
-            
-            if not os.path.exists(answer_image_path):
-                print(f"    ⚠️  Warning: Answer image not found: {answer_image_path}")
-                # Continue anyway, answer might be optional
-            
-            # Merge default metadata with question metadata
-            full_metadata = {**(default_metadata or {}), **metadata}
-            
-            # Create temporary question ID for file naming (use timestamp)
-            temp_id = int(datetime.now().timestamp() * 1000) % 100000
-            
-            # Copy images to static directory
-            q_img_path = self.copy_image_to_static(question_image_path, temp_id, "question")
-            a_img_path = self.copy_image_to_static(answer_image_path, temp_id, "answer") if os.path.exists(answer_image_path) else None
-            
-            if self.dry_run:
-                print(f"    [DRY-RUN] Would create question with:")
-                print(f"      - topic: {full_metadata.get('topic')}")
-                print(f"      - subtopic: {full_metadata.get('subtopic')}")
-                print(f"      - difficulty: {full_metadata.get('difficulty')}")
-                print(f"      - paper_number: {full_metadata.get('paper_number')}")
-                self.stats["total_questions"] += 1
-                return
-            
-            # Create Question object
-            db_question = models.Question(
-                question_image_path=q_img_path,
-                answer_image_path=a_img_path or "",  # Use empty string if no answer
-                curriculum=full_metadata.get("curriculum"),
-                subject=full_metadata.get("subject"),
-                year=full_metadata.get("year"),
-                month=full_metadata.get("month"),
-                season=full_metadata.get("season"),
-                question_number=question_num,
-                difficulty=models.DifficultyLevel[full_metadata.get("difficulty", "Medium")],
-                # ExamSlicer fields
-                paper_number=full_metadata.get("paper_number"),
-                question_type=full_metadata.get("question_type"),
-                topic=full_metadata.get("topic"),
-                subtopic=full_metadata.get("subtopic")
-            )
-            
-            # Create tags from topic and subtopic
-            if full_metadata.get("topic"):
-                topic_tag = self.find_or_create_tag(
-                    name=full_metadata["topic"],
-                    category="Topic",
-                    paper=full_metadata.get("paper_number"),
-                    subject=full_metadata.get("subject")
-                )
-                if topic_tag:
-                    db_question.tags.append(topic_tag)
-            
-            if full_metadata.get("subtopic"):
-                subtopic_tag = self.find_or_create_tag(
-                    name=full_metadata["subtopic"],
-                    category="Subtopic",
-                    paper=full_metadata.get("paper_number"),
-                    subject=full_metadata.get("subject")
-                )
-                if subtopic_tag:
-                    db_question.tags.append(subtopic_tag)
-            
-            # Add to database
-            self.db.add(db_question)
-            self.db.flush()
-            
-            # Rename image files with actual database ID
-            if q_img_path:
-                new_q_path = q_img_path.replace(f"q{temp_id}_", f"q{db_question.id}_")
-                old_full_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), q_img_path)
-                new_full_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), new_q_path)
-                if os.path.exists(old_full_path):
-                    os.rename(old_full_path, new_full_path)
-                    db_question.question_image_path = new_q_path
-            
-            if a_img_path:
-                new_a_path = a_img_path.replace(f"q{temp_id}_", f"q{db_question.id}_")
-                old_full_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), a_img_path)
-                new_full_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), new_a_path)
-                if os.path.exists(old_full_path):
-                    os.rename(old_full_path, new_full_path)
-                    db_question.answer_image_path = new_a_path
-            
-            self.stats["created"] += 1
-            self.stats["total_questions"] += 1
-            print(f"    ✅ Created question ID: {db_question.id}")
-            
-        except Exception as e:
-            print(f"    ❌ Error processing {json_path}: {e}")
-            import traceback
-            traceback.print_exc()
-            self.stats["errors"] += 1
-    
-    def ingest_folder(self, question_dir, answer_dir, default_metadata=None):
-        """Ingest all questions from a folder"""
-        print(f"\n📂 Scanning directories:")
-        print(f"  Questions: {question_dir}")
-        print(f"  Answers:   {answer_dir}")
-        
-        # Find all JSON files
-        json_files = sorted([f for f in os.listdir(question_dir) if f.endswith('.json')])
-        
-        if not json_files:
-            print("  ❌ No JSON files found!")
-            return
-        
-        print(f"\n  Found {len(json_files)} question(s) to process")
-        
-        for json_file in json_files:
-            json_path = os.path.join(question_dir, json_file)
-            self.ingest_question(json_path, question_dir, answer_dir, default_metadata)
-        
-        # Commit all changes
-        if not self.dry_run:
-            try:
-                self.db.commit()
-                print("\n  💾 Changes committed to database")
-            except Exception as e:
-                print(f"\n  ❌ Error committing to database: {e}")
-                self.db.rollback()
-                raise
-    
-    def print_stats(self):
-        """Print ingestion statistics"""
-        print("\n" + "="*60)
-        print("📊 INGESTION SUMMARY")
-        print("="*60)
-        print(f"Total questions processed: {self.stats['total_questions']}")
-        print(f"✅ Successfully created:    {self.stats['created']}")
-        print(f"⏭️  Skipped:                {self.stats['skipped']}")
-        print(f"❌ Errors:                 {self.stats['errors']}")
-        print(f"🏷️  New tags created:       {self.stats['tags_created']}")
-        print("="*60 + "\n")
+                failed[path] = fingerprints[path]
+                print(f"   ❌ {name}: retried on the next run (or once it changes, with --watch)")
+            for error in result["errors"]:
+                print(f"      ⚠️  {error['question']}: {error['reason']}")
+    totals.seconds += time.perf_counter() - start
+    print(f"   {totals.packages} package(s) so far, {totals.rate()}")
+    return stored
 
 
 def main():
-    parser = argparse.ArgumentParser(description='Bulk ingest ExamSlicer output into HaoExam database')
-    parser.add_argument('--question-dir', required=True, help='Directory containing question images and JSON files')
-    parser.add_argument('--answer-dir', required=True, help='Directory containing answer images')
-    parser.add_argument('--subject', default='Mathematics', help='Subject name (default: Mathematics)')
-    parser.add_argument('--curriculum', default='Cambridge International AS & A Level', help='Curriculum name')
-    parser.add_argument('--year', type=int, help='Exam year')
-    parser.add_argument('--month', help='Exam month')
-    parser.add_argument('--dry-run', action='store_true', help='Run without making database changes')
-    
+    parser = argparse.ArgumentParser(description="Bulk ingest unpacked ExamSlicer exports")
+    parser.add_argument("root", help="Directory tree containing package folders (and/or ZIPs)")
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 2, help="Worker processes")
+    parser.add_argument("--threads", type=int, default=4, help="Question-preparation threads per process")
+    parser.add_argument("--delete-removed", action="store_true",
+                        help="Delete questions no longer present in a re-ingested package")
+    parser.add_argument("--normalize-images", action="store_true", default=None,
+                        help="Normalize images before storing (default: INGEST_NORMALIZE_IMAGES)")
+    parser.add_argument("--state", default=str(DEFAULT_STATE), help="Checkpoint file")
+    parser.add_argument("--watch", action="store_true", help="Keep polling root for new or changed packages")
+    parser.add_argument("--interval", type=float, default=10.0, help="Polling interval in seconds (--watch)")
+    parser.add_argument("--list", action="store_true", help="Only list packages that would be ingested")
+    parser.add_argument("--no-derivatives", action="store_true",
+                        help="Skip gallery thumbnails (backfill later with backfill_derivatives.py)")
     args = parser.parse_args()
-    
-    # Validate directories
-    if not os.path.isdir(args.question_dir):
-        print(f"❌ Error: Question directory not found: {args.question_dir}")
-        sys.exit(1)
-    
-    if not os.path.isdir(args.answer_dir):
-        print(f"❌ Error: Answer directory not found: {args.answer_dir}")
-        sys.exit(1)
-    
-    # Prepare default metadata
-    default_metadata = {
-        "subject": args.subject,
-        "curriculum": args.curriculum,
-        "year": args.year,
-        "month": args.month
-    }
-    
-    print("="*60)
-    print("🚀 ExamSlicer Bulk Ingestion")
-    print("="*60)
-    if args.dry_run:
-        print("⚠️  DRY RUN MODE - No changes will be made")
-        print("="*60)
-    
-    # Create ingestor and run
-    ingestor = BulkIngestor(dry_run=args.dry_run)
-    
+
+    if not os.path.isdir(args.root):
+        sys.exit(f"❌ Not a directory: {args.root}")
+    args.root = os.path.abspath(args.root)
+
+    # Ingest ledger/job tables and newer indexes may not exist yet in a database created by an older version
+    models.Base.metadata.create_all(bind=engine)
+    ensure_indexes()
+
+    done = load_state(args.state)
+    print(f"🚀 Ingesting {args.root}: {args.processes} process(es) x {args.threads} thread(s), "
+          f"{len(done)} package(s) in checkpoint")
+
+    totals = Totals()
+    previous = {}  # watch mode: fingerprints seen by the previous scan
+    failed = {}    # watch mode: failed packages are not retried until they change
+    derivatives = None if args.no_derivatives else get_derivative_worker()
+    state = open(args.state, "a")
     try:
-        ingestor.ingest_folder(args.question_dir, args.answer_dir, default_metadata)
-        ingestor.print_stats()
-        
-        if args.dry_run:
-            print("✅ Dry run completed. Use without --dry-run to apply changes.\n")
-        else:
-            print("✅ Ingestion completed successfully!\n")
-        
-    except Exception as e:
-        print(f"\n❌ Fatal error during ingestion: {e}")
-        import traceback
-        traceback.print_exc()
-        sys.exit(1)
+        with ProcessPoolExecutor(max_workers=args.processes, initializer=init_worker) as pool:
+            while True:
+                found = find_packages(args.root)
+                fingerprints = {path: package_identity(path, name) for path, name in found}
+                packages = []
+                for path, name in found:
+                    identity = fingerprints[path]
+                    if identity is not None and done.get(path) == identity[1]:
+                        continue  # ingested by an earlier run, unchanged since
+                    if args.watch and not args.list and (
+                            previous.get(path) != identity or failed.get(path, False) == identity):
+                        continue  # still being copied, or failed and not changed since
+                    packages.append((path, name))
+                previous = fingerprints
+
+                if args.list:
+                    for path, _ in packages:
+                        print(f"   {os.path.relpath(path, args.root)}")
+                    print(f"📋 {len(packages)} package(s) to ingest")
+                    return
+
+                if packages:
+                    stored = run_cycle(pool, packages, fingerprints, args, state, done, failed, totals)
+                    if derivatives:
+                        derivatives.submit(stored)
+                if not args.watch:
+                    break
+                time.sleep(args.interval)
+    except KeyboardInterrupt:
+        print("\n⏹️  Stopped")
+    finally:
+        state.close()
+        if derivatives:
+            derivatives.shutdown(wait=True)
+
+    print(f"\n{'✅' if not totals.failed else '⚠️ '} {totals.packages} package(s), {totals.failed} failed, "
+          f"{totals.questions} question(s): {totals.rate()}")
+    print(f"   {totals.counts}")
+    sys.exit(1 if totals.failed else 0)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,158 @@
+"""
+Load test: gallery latency while image uploads are in flight.
+
+Measures GET /questions/ latency twice against a running server:
+  1. baseline (gallery requests only)
+  2. under load (N concurrent uploaders posting large images to /api/upload/images)
+
+With image work on the event loop the second run's p95/max grows with upload
+size; with the image executor it should stay close to the baseline.
+
+Usage (server running, e.g. `uvicorn app.main:app`):
+    python scripts/load_test_uploads.py --base-url http://localhost:8000 \\
+        --duration 20 --uploaders 4
+"""
+
+import argparse
+import io
+import json
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import uuid
+
+from PIL import Image, ImageDraw
+
+
+def make_test_image(max_bytes: int) -> bytes:
+    """A large, detailed PNG (expensive to decode/stitch/encode) under the upload limit."""
+    width, height = 2400, 3200
+    while True:
+        img = Image.new("RGB", (width, height), "white")
+        draw = ImageDraw.Draw(img)
+        for y in range(0, height, 24):
+            for x in range(0, width, 60):
+                draw.text((x, y), f"{(x * 7 + y) % 997}", fill=(0, 0, 0))
+        buf = io.BytesIO()
+        img.save(buf, format="PNG")
+        if buf.tell() <= max_bytes or width <= 600:
+            return buf.getvalue()
+        width, height = int(width * 0.8), int(height * 0.8)
+
+
+def login(base_url: str, username: str, password: str) -> str:
+    data = urllib.parse.urlencode({"username": username, "password": password}).encode()
+    with urllib.request.urlopen(f"{base_url}/token", data=data) as resp:
+        return json.load(resp)["access_token"]
+
+
+def multipart_body(files: list) -> tuple:
+    boundary = uuid.uuid4().hex
+    parts = []
+    for name, filename, content in files:
+        parts.append(
+            f"--{boundary}\r\n"
+            f'Content-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+            f"Content-Type: image/png\r\n\r\n".encode()
+        )
+        parts.append(content)
+        parts.append(b"\r\n")
+    parts.append(f"--{boundary}--\r\n".encode())
+    return b"".join(parts), f"multipart/form-data; boundary={boundary}"
+
+
+def measure_gallery(base_url: str, stop: threading.Event, latencies: list):
+    while not stop.is_set():
+        start = time.perf_counter()
+        try:
+            with urllib.request.urlopen(f"{base_url}/questions/?limit=20") as resp:
+                resp.read()
+            latencies.append((time.perf_counter() - start) * 1000)
+        except urllib.error.URLError as e:
+            print(f"gallery request failed: {e}")
+        time.sleep(0.05)
+
+
+def upload_loop(base_url: str, token: str, image: bytes, stop: threading.Event, counts: dict, lock: threading.Lock):
+    # Distinct bytes per request so content-addressed dedupe does not short-circuit
+    while not stop.is_set():
+        salt = uuid.uuid4().bytes
+        body, content_type = multipart_body([
+            ("files", "part1.png", image + salt),
+            ("files", "part2.png", image),
+        ])
+        req = urllib.request.Request(
+            f"{base_url}/api/upload/images",
+            data=body,
+            headers={"Content-Type": content_type, "Authorization": f"Bearer {token}"},
+        )
+        key = "ok"
+        try:
+            with urllib.request.urlopen(req) as resp:
+                resp.read()
+        except urllib.error.HTTPError as e:
+            key = "busy" if e.code == 503 else f"http_{e.code}"
+        except urllib.error.URLError:
+            key = "error"
+        with lock:
+            counts[key] = counts.get(key, 0) + 1
+
+
+def summarize(name: str, latencies: list):
+    if not latencies:
+        print(f"{name:>12}: no samples")
+        return
+    ordered = sorted(latencies)
+    p95 = ordered[int(len(ordered) * 0.95) - 1] if len(ordered) >= 20 else ordered[-1]
+    print(
+        f"{name:>12}: n={len(ordered):4d}  p50={statistics.median(ordered):7.1f} ms  "
+        f"p95={p95:7.1f} ms  max={ordered[-1]:7.1f} ms"
+    )
+
+
+def run_phase(base_url: str, duration: float, uploaders: int, token: str = None, image: bytes = None):
+    stop = threading.Event()
+    latencies: list = []
+    counts: dict = {}
+    lock = threading.Lock()
+
+    threads = [threading.Thread(target=measure_gallery, args=(base_url, stop, latencies))]
+    for _ in range(uploaders):
+        threads.append(threading.Thread(target=upload_loop, args=(base_url, token, image, stop, counts, lock)))
+    for t in threads:
+        t.start()
+    time.sleep(duration)
+    stop.set()
+    for t in threads:
+        t.join()
+    return latencies, counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gallery latency under upload load")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--username", default="admin")
+    parser.add_argument("--password", default="admin123")
+    parser.add_argument("--duration", type=float, default=20, help="Seconds per phase")
+    parser.add_argument("--uploaders", type=int, default=4, help="Concurrent upload clients")
+    parser.add_argument("--max-image-mb", type=float, default=1.9, help="Keep test images under MAX_IMAGE_SIZE_MB")
+    args = parser.parse_args()
+
+    base_url = args.base_url.rstrip("/")
+    token = login(base_url, args.username, args.password)
+    image = make_test_image(int(args.max_image_mb * 1024 * 1024))
+    print(f"Test image: {len(image) / 1024:.0f} KB, {args.uploaders} uploader(s), {args.duration:.0f}s per phase\n")
+
+    baseline, _ = run_phase(base_url, args.duration, 0)
+    loaded, counts = run_phase(base_url, args.duration, args.uploaders, token, image)
+
+    summarize("baseline", baseline)
+    summarize("under load", loaded)
+    print(f"\nUploads: {counts}")
+
+
+if __name__ == "__main__":
+    main()
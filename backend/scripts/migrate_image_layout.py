@@ -0,0 +1,165 @@
+"""
+Migrate images from the flat layout (static/uploads/*.jpg, older static/*.jpg)
+into the content-addressed sharded layout (static/uploads/<ab>/<cd>/<sha256>.<ext>)
+and rewrite questions.question_image_path / answer_image_path.
+
+- Files are hard-linked into place (copied if linking fails), so old URLs keep
+  working until the batch that rewrites their paths is committed.
+- Paths are rewritten in batched transactions; the old files (and their
+  thumbnails) are deleted only after the batch commits.
+- Resumable: the database is the source of truth (already migrated paths are
+  skipped), and a journal records each committed batch so an interrupted run
+  finishes deleting the old files on restart.
+
+Usage (from backend/):
+    python scripts/migrate_image_layout.py [--batch-size 500] [--dry-run] [--keep-originals]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import bindparam, func, union  # noqa: E402
+
+from app import models  # noqa: E402
+from app.config import settings  # noqa: E402
+from app.database import SessionLocal, ensure_indexes  # noqa: E402
+from app.services.derivatives import link_derivatives, remove_derivatives  # noqa: E402
+from app.services.image_store import get_image_store  # noqa: E402
+
+DEFAULT_JOURNAL = settings.BASE_DIR / "image_layout_migration.jsonl"
+
+questions = models.Question.__table__
+
+
+def pending_paths(db, store) -> list:
+    """Distinct referenced image paths not yet in the content-addressed layout."""
+    query = union(
+        db.query(models.Question.question_image_path),
+        db.query(models.Question.answer_image_path),
+    )
+    paths = (row[0] for row in db.execute(query))
+    return sorted(p for p in paths if p and p.startswith("static/") and not store.is_managed(p))
+
+
+def remove_originals(db, store, mapping: dict, keep_originals: bool) -> int:
+    """Delete migrated source files that are no longer referenced."""
+    removed = 0
+    for old_path in mapping:
+        if store.count_references(db, old_path):
+            continue
+        remove_derivatives(old_path)
+        if keep_originals:
+            continue
+        try:
+            os.remove(store.full_path(old_path))
+            removed += 1
+        except FileNotFoundError:
+            pass
+    return removed
+
+
+def replay_journal(db, store, journal_path, keep_originals: bool):
+    """Finish batches that committed but did not get to delete their old files."""
+    if not os.path.exists(journal_path):
+        return
+    pending = {}
+    with open(journal_path) as f:
+        for line in f:
+            entry = json.loads(line)
+            if entry["status"] == "committed":
+                pending[entry["batch"]] = entry["mapping"]
+            elif entry["status"] == "cleaned":
+                pending.pop(entry["batch"], None)
+    for batch, mapping in pending.items():
+        removed = remove_originals(db, store, mapping, keep_originals)
+        print(f"♻️  Resumed cleanup of batch {batch}: {removed} old file(s) removed")
+    os.remove(journal_path)
+
+
+def migrate(batch_size: int, dry_run: bool, keep_originals: bool, journal_path):
+    store = get_image_store()
+    db = SessionLocal()
+    try:
+        if not dry_run:
+            ensure_indexes()  # path lookups below (and image refcounts)
+            replay_journal(db, store, journal_path, keep_originals)
+
+        paths = pending_paths(db, store)
+        total_rows = db.query(func.count(models.Question.id)).scalar()
+        print(f"📋 {len(paths)} image path(s) to migrate ({total_rows} question rows)")
+        if dry_run or not paths:
+            return True
+
+        start = time.perf_counter()
+        migrated = missing = removed = 0
+        update_q = questions.update().where(questions.c.question_image_path == bindparam("old")).values(
+            question_image_path=bindparam("new"))
+        update_a = questions.update().where(questions.c.answer_image_path == bindparam("old")).values(
+            answer_image_path=bindparam("new"))
+
+        with open(journal_path, "a") as journal:
+            for batch_no, offset in enumerate(range(0, len(paths), batch_size), start=1):
+                mapping = {}
+                for old_path in paths[offset:offset + batch_size]:
+                    source = store.full_path(old_path)
+                    if not source.is_file():
+                        print(f"⚠️  Missing file, left as is: {old_path}")
+                        missing += 1
+                        continue
+                    new_path = store.adopt_file(str(source))
+                    link_derivatives(old_path, new_path)
+                    mapping[old_path] = new_path
+
+                if not mapping:
+                    continue
+
+                params = [{"old": old, "new": new} for old, new in mapping.items()]
+                db.execute(update_q, params)
+                db.execute(update_a, params)
+                db.commit()
+                journal.write(json.dumps({"batch": batch_no, "status": "committed", "mapping": mapping}) + "\n")
+                journal.flush()
+                os.fsync(journal.fileno())
+
+                removed += remove_originals(db, store, mapping, keep_originals)
+                journal.write(json.dumps({"batch": batch_no, "status": "cleaned"}) + "\n")
+                journal.flush()
+
+                migrated += len(mapping)
+                print(f"   batch {batch_no}: {migrated}/{len(paths)} path(s) migrated")
+
+        os.remove(journal_path)
+        elapsed = time.perf_counter() - start
+        print(f"\n✅ Migrated {migrated} path(s) in {elapsed:.1f}s "
+              f"({removed} old file(s) removed, {missing} missing)")
+        return True
+
+    except Exception as e:
+        db.rollback()
+        print(f"\n❌ Migration stopped: {e}")
+        print("   Re-run the command to resume.")
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Migrate images into the sharded content-addressed layout")
+    parser.add_argument("--batch-size", type=int, default=500, help="Paths rewritten per transaction")
+    parser.add_argument("--dry-run", action="store_true", help="Only count pending paths")
+    parser.add_argument("--keep-originals", action="store_true", help="Do not delete the old files")
+    parser.add_argument("--journal", default=str(DEFAULT_JOURNAL), help="Resume journal location")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("🔄 Image Layout Migration")
+    print("=" * 60)
+    success = migrate(args.batch_size, args.dry_run, args.keep_originals, args.journal)
+    sys.exit(0 if success else 1)
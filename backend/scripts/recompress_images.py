@@ -0,0 +1,263 @@
+"""
+Recompress every referenced question/answer image in the library.
+
+For each image (JPEG or PNG) a worker process:
+  - optionally converts near-monochrome scans to grayscale (--grayscale)
+  - binary-searches the lowest JPEG quality (optimized Huffman tables,
+    progressive) whose PSNR against the original stays >= --min-psnr
+  - keeps the result only if it is at least --min-saving smaller
+
+Accepted results are written into the content-addressed store (atomic
+rename), question paths are rewritten in batched transactions, and the old
+files are released once no question references them. Thumbnails are carried
+over (the picture is visually unchanged).
+
+Resumable: every processed source path is appended to a state file and
+skipped on the next run.
+
+Usage (from backend/):
+    python scripts/recompress_images.py [--workers 4] [--min-psnr 40] [--grayscale] [--dry-run]
+"""
+
+import argparse
+import io
+import json
+import math
+import os
+import sys
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image, ImageChops  # noqa: E402
+from sqlalchemy import bindparam  # noqa: E402
+
+from app import models  # noqa: E402
+from app.config import settings  # noqa: E402
+from app.database import SessionLocal  # noqa: E402
+from app.services.derivatives import link_derivatives  # noqa: E402
+from app.services.image_store import get_image_store  # noqa: E402
+from app.utils import _convert_to_rgb  # noqa: E402
+
+DEFAULT_STATE = settings.BASE_DIR / "image_recompress_state.jsonl"
+EXIF_ORIENTATION = 0x0112
+
+questions = models.Question.__table__
+
+
+# =============================================================================
+# Worker (runs in a child process)
+# =============================================================================
+def psnr(a: Image.Image, b: Image.Image) -> float:
+    """Peak signal-to-noise ratio over all bands, from the difference histogram."""
+    hist = ImageChops.difference(a, b).histogram()
+    bands = len(hist) // 256
+    squared = sum(count * (i % 256) ** 2 for i, count in enumerate(hist))
+    mse = squared / (a.width * a.height * bands)
+    return float("inf") if mse == 0 else 10 * math.log10(255 ** 2 / mse)
+
+
+def is_monochrome(img: Image.Image, tolerance: int) -> bool:
+    r, g, b = img.split()
+    return max(ImageChops.difference(r, g).getextrema()[1], ImageChops.difference(g, b).getextrema()[1]) <= tolerance
+
+
+def encode(img: Image.Image, quality: int) -> bytes:
+    buf = io.BytesIO()
+    img.save(buf, format="JPEG", quality=quality, optimize=True, progressive=True)
+    return buf.getvalue()
+
+
+def recompress_one(full_path: str, options: dict) -> dict:
+    """Find the smallest acceptable encoding; store it if it saves enough."""
+    original_size = os.path.getsize(full_path)
+    with Image.open(full_path) as img:
+        if img.format not in ("JPEG", "PNG"):
+            return {"status": "skipped", "reason": f"format {img.format}"}
+        if img.getexif().get(EXIF_ORIENTATION, 1) != 1:
+            return {"status": "skipped", "reason": "EXIF rotation"}
+        reference = _convert_to_rgb(img)
+        reference.load()
+
+    candidate = reference
+    if options["grayscale"] and is_monochrome(reference, options["mono_tolerance"]):
+        candidate = reference.convert("L")
+
+    def acceptable(data: bytes) -> bool:
+        with Image.open(io.BytesIO(data)) as decoded:
+            return psnr(reference, decoded.convert("RGB")) >= options["min_psnr"]
+
+    # Binary search: lowest quality that still meets the PSNR threshold
+    best = None
+    low, high = options["min_quality"], options["max_quality"]
+    while low <= high:
+        quality = (low + high) // 2
+        data = encode(candidate, quality)
+        if acceptable(data):
+            best = (quality, data)
+            high = quality - 1
+        else:
+            low = quality + 1
+
+    if best is None:
+        return {"status": "kept", "reason": "no quality meets PSNR", "old_size": original_size}
+    quality, data = best
+    if len(data) > original_size * (1 - options["min_saving"]):
+        return {"status": "kept", "reason": "not smaller enough", "old_size": original_size}
+    if options["dry_run"]:
+        return {"status": "would_replace", "old_size": original_size, "new_size": len(data), "quality": quality}
+
+    new_path = get_image_store().put_bytes(data, ".jpg")
+    return {
+        "status": "replaced",
+        "new_path": new_path,
+        "old_size": original_size,
+        "new_size": len(data),
+        "quality": quality,
+        "grayscale": candidate.mode == "L",
+    }
+
+
+# =============================================================================
+# Coordinator
+# =============================================================================
+def load_state(state_path) -> set:
+    if not os.path.exists(state_path):
+        return set()
+    with open(state_path) as f:
+        return {json.loads(line)["path"] for line in f if line.strip()}
+
+
+def referenced_images(db) -> dict:
+    """{image path: subject} for every image path referenced by a question."""
+    subjects = {}
+    rows = db.query(models.Question.question_image_path, models.Question.answer_image_path, models.Question.subject)
+    for q_path, a_path, subject in rows:
+        for path in (q_path, a_path):
+            if path and path.startswith("static/"):
+                subjects.setdefault(path, subject or "(none)")
+    return subjects
+
+
+def apply_batch(db, store, mapping: dict) -> int:
+    """Point questions at the recompressed files, then release the old ones."""
+    params = [{"old": old, "new": new} for old, new in mapping.items()]
+    db.execute(
+        questions.update().where(questions.c.question_image_path == bindparam("old")).values(
+            question_image_path=bindparam("new")),
+        params,
+    )
+    db.execute(
+        questions.update().where(questions.c.answer_image_path == bindparam("old")).values(
+            answer_image_path=bindparam("new")),
+        params,
+    )
+    db.commit()
+    return len(store.release(db, mapping.keys()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recompress library images")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--batch-size", type=int, default=200, help="Path rewrites per transaction")
+    parser.add_argument("--min-quality", type=int, default=60)
+    parser.add_argument("--max-quality", type=int, default=90)
+    parser.add_argument("--min-psnr", type=float, default=40.0, help="Visual threshold in dB")
+    parser.add_argument("--min-saving", type=float, default=0.05, help="Required size reduction (fraction)")
+    parser.add_argument("--grayscale", action="store_true", help="Store near-monochrome scans as grayscale")
+    parser.add_argument("--mono-tolerance", type=int, default=12, help="Max channel difference for grayscale")
+    parser.add_argument("--limit", type=int, default=0, help="Process at most N images (0 = all)")
+    parser.add_argument("--dry-run", action="store_true", help="Report savings without replacing files")
+    parser.add_argument("--state", default=str(DEFAULT_STATE), help="Resume state file")
+    args = parser.parse_args()
+
+    options = {
+        "min_quality": args.min_quality,
+        "max_quality": args.max_quality,
+        "min_psnr": args.min_psnr,
+        "min_saving": args.min_saving,
+        "grayscale": args.grayscale,
+        "mono_tolerance": args.mono_tolerance,
+        "dry_run": args.dry_run,
+    }
+
+    store = get_image_store()
+    db = SessionLocal()
+    done = load_state(args.state)
+    subjects = referenced_images(db)
+    todo = sorted(p for p in subjects if p not in done and store.full_path(p).is_file())
+    if args.limit:
+        todo = todo[:args.limit]
+    print(f"🔄 {len(todo)} image(s) to process ({len(done)} already done), {args.workers} worker(s)")
+
+    saved_by_subject = defaultdict(lambda: [0, 0, 0])  # [images replaced, bytes before, bytes after]
+    counts = defaultdict(int)
+    mapping = {}
+    pending_state = []
+    start = time.perf_counter()
+
+    state = None if args.dry_run else open(args.state, "a")
+    try:
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            futures = {pool.submit(recompress_one, str(store.full_path(p)), options): p for p in todo}
+            for n, future in enumerate(as_completed(futures), start=1):
+                path = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = {"status": "failed", "reason": str(e)}
+                counts[result["status"]] += 1
+
+                if result["status"] in ("replaced", "would_replace"):
+                    stats = saved_by_subject[subjects[path]]
+                    stats[0] += 1
+                    stats[1] += result["old_size"]
+                    stats[2] += result["new_size"]
+                if result["status"] == "replaced":
+                    link_derivatives(path, result["new_path"])
+                    mapping[path] = result["new_path"]
+
+                if state:
+                    entry = json.dumps({"path": path, **result}) + "\n"
+                    if result["status"] == "replaced":
+                        # Recorded only once the path rewrite commits; the output
+                        # itself must not be recompressed again on a later run
+                        pending_state.append(entry)
+                        pending_state.append(json.dumps({"path": result["new_path"], "status": "output"}) + "\n")
+                    else:
+                        state.write(entry)
+                if len(mapping) >= args.batch_size:
+                    counts["old_removed"] += apply_batch(db, store, mapping)
+                    state.writelines(pending_state)
+                    state.flush()
+                    mapping, pending_state = {}, []
+                if n % 100 == 0:
+                    print(f"   {n}/{len(todo)}")
+
+        if mapping:
+            counts["old_removed"] += apply_batch(db, store, mapping)
+            state.writelines(pending_state)
+    finally:
+        if state:
+            state.close()
+        db.close()
+
+    elapsed = time.perf_counter() - start
+    print(f"\n✅ Done in {elapsed:.1f}s: {dict(counts)}")
+    deferred = counts["replaced"] - counts["old_removed"]
+    if deferred > 0:
+        print(f"   {deferred} old file(s) still in the GC grace period or shared; left for the orphan scan")
+    print(f"\n{'Subject':<24}{'Images':>8}{'Before':>12}{'After':>12}{'Saved':>12}")
+    total_before = total_after = 0
+    for subject, (images, before, after) in sorted(saved_by_subject.items()):
+        total_before += before
+        total_after += after
+        print(f"{subject:<24}{images:>8}{before / 1024:>10.0f}KB{after / 1024:>10.0f}KB{(before - after) / 1024:>10.0f}KB")
+    print(f"{'Total':<24}{'':>8}{total_before / 1024:>10.0f}KB{total_after / 1024:>10.0f}KB"
+          f"{(total_before - total_after) / 1024:>10.0f}KB")
+
+
+if __name__ == "__main__":
+    main()
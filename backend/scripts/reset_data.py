@@ -6,7 +6,9 @@ from app import models
 # 1. Clear Database
 db = SessionLocal()
 try:
-    # Delete all rows
+    # Delete all rows (ingest ledger first: it points at question ids)
+    db.query(models.IngestQuestion).delete()
+    db.query(models.IngestPackage).delete()
     num_questions = db.query(models.Question).delete()
     num_tags = db.query(models.Tag).delete()
     db.commit()
@@ -0,0 +1,63 @@
+"""
+Scan static/ for orphaned image files and questions with dangling image paths.
+
+Usage (from backend/):
+    python scripts/scan_orphans.py                          # report only
+    python scripts/scan_orphans.py --report orphans.json    # + JSON report
+    python scripts/scan_orphans.py --mode quarantine        # move orphans to backend/quarantine/<timestamp>/
+    python scripts/scan_orphans.py --mode delete --min-age-hours 48
+"""
+
+import argparse
+import json
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import SessionLocal  # noqa: E402
+from app.services.orphan_scanner import resolve_orphans, scan  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Orphaned file / dangling reference scanner")
+    parser.add_argument("--mode", choices=("report", "quarantine", "delete"), default="report")
+    parser.add_argument("--min-age-hours", type=float, default=24,
+                        help="Ignore unreferenced files newer than this (pending Studio uploads)")
+    parser.add_argument("--quarantine-dir", help="Destination for --mode quarantine")
+    parser.add_argument("--report", help="Write a JSON report to this file")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        report = scan(db, min_age_seconds=args.min_age_hours * 3600)
+        report = resolve_orphans(db, report, args.mode, args.quarantine_dir)
+    finally:
+        db.close()
+
+    print(f"📋 Scanned {report.files_scanned} file(s), {report.references_scanned} reference(s) "
+          f"in {report.duration_seconds:.2f}s")
+    print(f"🗑️  Orphaned files: {len(report.orphans)} ({report.orphan_bytes / 1024 / 1024:.1f} MB), "
+          f"{report.skipped_recent} recent file(s) ignored")
+    for orphan in report.orphans[:20]:
+        print(f"   {orphan['path']}")
+    if len(report.orphans) > 20:
+        print(f"   ... {len(report.orphans) - 20} more")
+
+    print(f"⚠️  Dangling references: {len(report.dangling)}")
+    for entry in report.dangling[:20]:
+        print(f"   {entry['path']}  (questions {entry['question_ids']})")
+    if len(report.dangling) > 20:
+        print(f"   ... {len(report.dangling) - 20} more")
+
+    if args.mode != "report":
+        print(f"✅ {args.mode}: {report.actions}")
+
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump({"mode": args.mode, **report.to_dict()}, f, indent=2)
+        print(f"📝 Report written to {args.report}")
+
+
+if __name__ == "__main__":
+    main()
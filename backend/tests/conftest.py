@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Same as scripts/: import the app package from backend/
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
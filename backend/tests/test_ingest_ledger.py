@@ -0,0 +1,81 @@
+"""
+Ingest ledger: re-uploading a package skips it only if its last run had no failures.
+
+Uses the sample package in tests/data (metadata set to a topic/subtopic of the
+current 9709 syllabus) with one question image removed, against a throwaway
+SQLite database and image store.
+"""
+
+import json
+import zipfile
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import models
+from app.services.image_store import ImageStore
+from app.services.validator import get_validator
+from app.zip_ingest import ZipIngestor
+
+SAMPLE = Path(__file__).parent / "data" / "ExamPackage_20251217_004610.zip"
+BROKEN = "questions/Q3.jpg"
+
+
+def copy_package(dest: Path, drop: str = None) -> str:
+    validator = get_validator()
+    topic = validator.get_valid_topics("9709", "P3")[0]
+    subtopic = validator.get_valid_subtopics("9709", "P3", topic)[0]
+    with zipfile.ZipFile(SAMPLE) as src, zipfile.ZipFile(dest, "w") as out:
+        for info in src.infolist():
+            if info.filename == drop:
+                continue
+            data = src.read(info)
+            if info.filename.startswith("questions/") and info.filename.endswith(".json"):
+                question = json.loads(data)
+                question.update({"topic": topic, "subtopic": subtopic})
+                data = json.dumps(question).encode()
+            out.writestr(info, data)
+    return str(dest)
+
+
+@pytest.fixture
+def ingest(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/test.db")
+    models.Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+
+    def run(package: str) -> dict:
+        db = Session()
+        try:
+            ingestor = ZipIngestor(db, max_workers=2)
+            ingestor.image_store = ImageStore(root=tmp_path / "static" / "uploads", base_dir=tmp_path)
+            return ingestor.ingest_zip(package, original_filename="package.zip")
+        finally:
+            db.close()
+
+    yield run
+    engine.dispose()
+
+
+def test_reupload_of_partially_failed_package_retries_failures(tmp_path, ingest):
+    broken = copy_package(tmp_path / "broken.zip", drop=BROKEN)
+
+    first = ingest(broken)
+    assert first["success"]
+    assert [e["question"] for e in first["errors"]] == ["Q3"]
+    inserted = first["inserted_count"]
+
+    # Same bytes again: not skipped as unchanged, Q3 is reported again
+    second = ingest(broken)
+    assert not second["unchanged_package"]
+    assert [e["question"] for e in second["errors"]] == ["Q3"]
+    assert second["inserted_count"] == 0
+    assert second["unchanged_count"] == inserted
+
+    # Image fixed: only Q3 is inserted, then the package is complete
+    fixed = ingest(copy_package(tmp_path / "fixed.zip"))
+    assert fixed["errors"] == []
+    assert fixed["inserted_count"] == 1
+    assert ingest(str(tmp_path / "fixed.zip"))["unchanged_package"]
@@ -12,6 +12,19 @@ interface QuestionCardProps {
 export default function QuestionCard({ question, onClick }: QuestionCardProps) {
   const [showAnswer, setShowAnswer] = useState(false)
   const [imageError, setImageError] = useState(false)
+  const [thumbnailError, setThumbnailError] = useState(false)
+
+  // 图库缩略图 srcset (非图片路径时为 null；缩略图尚未生成 (404) 时回退到原图)
+  const derivatives = question.question_image_derivatives
+  const thumbnails = derivatives?.small?.jpeg && derivatives?.medium?.jpeg
+    ? {
+        webp: derivatives.small.webp && derivatives.medium.webp
+          ? `${derivatives.small.webp} 320w, ${derivatives.medium.webp} 800w`
+          : undefined,
+        jpeg: derivatives.small.jpeg,
+        jpegSrcSet: `${derivatives.small.jpeg} 320w, ${derivatives.medium.jpeg} 800w`,
+      }
+    : null
 
   // Lightbox 全屏预览状态
   const [previewImage, setPreviewImage] = useState<string | null>(null)
@@ -164,6 +177,21 @@ export default function QuestionCard({ question, onClick }: QuestionCardProps) {
                 </span>
               </div>
             </div>
+          ) : !imageError && !thumbnailError && !showAnswer && thumbnails ? (
+            // 题目缩略图 (WebP 优先，JPEG 兜底)；点击预览仍加载原图
+            <picture>
+              {thumbnails.webp && <source type="image/webp" srcSet={thumbnails.webp} sizes="(max-width: 640px) 100vw, 320px" />}
+              <img
+                src={thumbnails.jpeg}
+                srcSet={thumbnails.jpegSrcSet}
+                sizes="(max-width: 640px) 100vw, 320px"
+                alt="题目"
+                loading="lazy"
+                className="w-full h-full object-contain cursor-zoom-in hover:opacity-90 transition-opacity"
+                onError={() => setThumbnailError(true)}
+                onClick={(e) => handlePreview(getImageUrl(question.question_image_path), e)}
+              />
+            </picture>
           ) : !imageError ? (
             // 显示图片 (题目或答案图片)
             <img
@@ -1,13 +1,21 @@
 import { useState, useRef, useCallback } from 'react'
 import { Link } from 'react-router-dom'
-import { uploadZip, type UploadResult, type UploadError } from '../services/api'
+import {
+  createIngestJob,
+  validateZip,
+  watchIngestJob,
+  type IngestProgress,
+  type UploadResult,
+  type UploadError,
+  type ValidationResult,
+} from '../services/api'
 import { useAuthStore } from '../store/authStore'
 import Navbar from '../components/Navbar'
 
 // ============================================================================
 // 类型定义
 // ============================================================================
-type UploadStatus = 'idle' | 'uploading' | 'success' | 'error'
+type UploadStatus = 'idle' | 'validating' | 'uploading' | 'processing' | 'success' | 'error'
 
 // ============================================================================
 // AdminUploadPage 组件 - 像素风格
@@ -21,6 +29,9 @@ export default function AdminUploadPage() {
   const [selectedFile, setSelectedFile] = useState<File | null>(null)
   const [uploadResult, setUploadResult] = useState<UploadResult | null>(null)
   const [uploadProgress, setUploadProgress] = useState<number>(0)
+  const [ingestProgress, setIngestProgress] = useState<IngestProgress | null>(null)
+  const [rowsWritten, setRowsWritten] = useState<number | null>(null)
+  const [validation, setValidation] = useState<ValidationResult | null>(null)
   const [dragActive, setDragActive] = useState(false)
 
   const fileInputRef = useRef<HTMLInputElement>(null)
@@ -74,11 +85,25 @@ export default function AdminUploadPage() {
     setUploadStatus('uploading')
     setUploadResult(null)
     setUploadProgress(0)
+    setIngestProgress(null)
+    setRowsWritten(null)
+    setValidation(null)
 
     try {
-      const result = await uploadZip(selectedFile, token, (progress) => {
+      // 1. 上传文件，创建后台导入任务
+      const job = await createIngestJob(selectedFile, token, (progress) => {
         setUploadProgress(progress)
       })
+
+      // 2. 订阅导入进度
+      setUploadStatus('processing')
+      const result = await watchIngestJob(job.id, token, (event, data) => {
+        if (event === 'progress') {
+          setIngestProgress(data as unknown as IngestProgress)
+        } else if (event === 'rows_written') {
+          setRowsWritten(Number(data.inserted ?? 0) + Number(data.updated ?? 0))
+        }
+      })
       setUploadResult(result)
       setUploadStatus(result.success ? 'success' : 'error')
     } catch (error) {
@@ -93,10 +118,43 @@ export default function AdminUploadPage() {
     }
   }
 
+  // 预检 (dry run): 只校验元数据，不导入
+  const handleValidate = async () => {
+    if (!selectedFile || !token) return
+
+    setUploadStatus('validating')
+    setUploadResult(null)
+    setValidation(null)
+
+    try {
+      const result = await validateZip(selectedFile, token)
+      setValidation(result)
+      setUploadResult(result)
+      setUploadStatus(result.valid ? 'success' : 'error')
+    } catch (error) {
+      console.error('Validation failed:', error)
+      setUploadResult({
+        success: false,
+        processed_count: 0,
+        skipped_count: 0,
+        errors: [{ question: 'GLOBAL', reason: String(error) }],
+      })
+      setUploadStatus('error')
+    }
+  }
+
+  const isBusy = uploadStatus === 'validating' || uploadStatus === 'uploading' || uploadStatus === 'processing'
+  const ingestPercent = ingestProgress && ingestProgress.total > 0
+    ? Math.round((ingestProgress.done * 100) / ingestProgress.total)
+    : 0
+
   const handleReset = () => {
     setSelectedFile(null)
     setUploadResult(null)
     setUploadStatus('idle')
+    setIngestProgress(null)
+    setRowsWritten(null)
+    setValidation(null)
     if (fileInputRef.current) {
       fileInputRef.current.value = ''
     }
@@ -134,7 +192,7 @@ export default function AdminUploadPage() {
                   ? 'border-pixel-primary bg-blue-50'
                   : 'border-pixel-dark hover:border-pixel-primary hover:bg-pixel-gray-100'
                 }
-                ${uploadStatus === 'uploading' ? 'pointer-events-none opacity-50' : ''}
+                ${isBusy ? 'pointer-events-none opacity-50' : ''}
               `}
             >
               <input
@@ -170,15 +228,19 @@ export default function AdminUploadPage() {
             <div className="mt-4 flex gap-3">
               <button
                 onClick={handleUpload}
-                disabled={!selectedFile || uploadStatus === 'uploading'}
+                disabled={!selectedFile || isBusy}
                 className={`flex-1 py-3 font-pixel text-lg border-4 border-pixel-dark transition-all flex items-center justify-center gap-2 ${
-                  selectedFile && uploadStatus !== 'uploading'
+                  selectedFile && !isBusy
                     ? 'bg-pixel-primary text-white shadow-pixel hover:translate-x-1 hover:translate-y-1 hover:shadow-none'
                     : 'bg-pixel-gray-200 text-pixel-gray-400 cursor-not-allowed'
                 }`}
               >
-                {uploadStatus === 'uploading' ? (
-                  <span className="animate-blink">UPLOADING...</span>
+                {isBusy ? (
+                  <span className="animate-blink">
+                    {uploadStatus === 'validating'
+                      ? 'CHECKING...'
+                      : uploadStatus === 'uploading' ? 'UPLOADING...' : 'PROCESSING...'}
+                  </span>
                 ) : (
                   <>
                     <i className="fa-solid fa-upload"></i>
@@ -187,7 +249,17 @@ export default function AdminUploadPage() {
                 )}
               </button>
 
-              {selectedFile && uploadStatus !== 'uploading' && (
+              {selectedFile && !isBusy && (
+                <button
+                  onClick={handleValidate}
+                  className="pixel-btn"
+                  title="Check metadata against the syllabus without importing"
+                >
+                  [ VALIDATE ]
+                </button>
+              )}
+
+              {selectedFile && !isBusy && (
                 <button
                   onClick={handleReset}
                   className="pixel-btn"
@@ -210,10 +282,30 @@ export default function AdminUploadPage() {
                     style={{ width: `${uploadProgress}%` }}
                   />
                 </div>
-                {uploadProgress === 100 && (
-                  <p className="font-pixel text-sm text-pixel-gray-500 mt-2 text-center animate-blink">
-                    PROCESSING...
-                  </p>
+              </div>
+            )}
+
+            {/* 导入进度 (SSE) */}
+            {uploadStatus === 'processing' && (
+              <div className="mt-4">
+                <div className="flex justify-between font-pixel text-sm text-pixel-dark mb-1">
+                  <span>{ingestProgress ? `QUESTIONS (${ingestProgress.question})` : 'QUEUED...'}</span>
+                  <span>{ingestProgress ? `${ingestProgress.done}/${ingestProgress.total}` : ''}</span>
+                </div>
+                <div className="w-full bg-pixel-gray-200 border-2 border-pixel-dark h-6 overflow-hidden">
+                  <div
+                    className="bg-pixel-green h-full transition-all duration-300 ease-out"
+                    style={{ width: `${ingestPercent}%` }}
+                  />
+                </div>
+                {ingestProgress && (
+                  <div className="flex justify-between font-pixel text-xs text-pixel-gray-500 mt-2">
+                    <span>VALIDATED: {ingestProgress.validated}</span>
+                    <span>UNCHANGED: {ingestProgress.unchanged}</span>
+                    <span>IMAGES: {ingestProgress.images_stored}</span>
+                    <span>ERRORS: {ingestProgress.errors}</span>
+                    <span>ROWS: {rowsWritten ?? '-'}</span>
+                  </div>
                 )}
               </div>
             )}
@@ -245,8 +337,33 @@ export default function AdminUploadPage() {
               />
             </div>
 
+            {/* 预检结果 */}
+            {validation && (
+              <div className={`pixel-card ${validation.valid ? 'border-pixel-green' : ''}`}>
+                <div className={`p-4 ${validation.valid ? 'bg-green-50' : 'bg-yellow-50'}`}>
+                  <div className={`flex items-center gap-2 font-pixel text-lg ${validation.valid ? 'text-pixel-green' : 'text-pixel-dark'}`}>
+                    <i className={`fa-solid ${validation.valid ? 'fa-clipboard-check' : 'fa-clipboard-list'}`}></i>
+                    <span>
+                      {validation.valid
+                        ? `VALID! ${validation.question_count} QUESTIONS READY TO IMPORT`
+                        : `${validation.processed_count}/${validation.question_count} QUESTIONS VALID`}
+                    </span>
+                  </div>
+                  <p className="font-pixel text-sm text-pixel-gray-500 mt-1">
+                    DRY RUN ({validation.elapsed_ms} MS) - NOTHING WAS IMPORTED
+                    {validation.source_filename ? ` - ${validation.source_filename}` : ''}
+                  </p>
+                  {validation.warnings.map((warning, index) => (
+                    <p key={index} className="font-pixel text-sm text-yellow-700 mt-1">
+                      <i className="fa-solid fa-triangle-exclamation mr-1"></i>{warning}
+                    </p>
+                  ))}
+                </div>
+              </div>
+            )}
+
             {/* 成功提示 */}
-            {uploadResult.success && uploadResult.processed_count > 0 && (
+            {!validation && uploadResult.success && uploadResult.processed_count > 0 && (
               <div className="pixel-card border-pixel-green">
                 <div className="p-4 bg-green-50">
                   <div className="flex items-center gap-2 font-pixel text-pixel-green text-lg">
@@ -256,6 +373,12 @@ export default function AdminUploadPage() {
                   <p className="font-pixel text-sm text-green-600 mt-1">
                     DATA SAVED TO DATABASE
                   </p>
+                  {!!uploadResult.images_normalized && (
+                    <p className="font-pixel text-sm text-green-600 mt-1">
+                      IMAGES: {formatMB(uploadResult.image_bytes_before ?? 0)} → {formatMB(uploadResult.image_bytes_after ?? 0)}
+                      {' '}({uploadResult.images_normalized} NORMALIZED)
+                    </p>
+                  )}
                 </div>
               </div>
             )}
@@ -312,6 +435,10 @@ export default function AdminUploadPage() {
   )
 }
 
+function formatMB(bytes: number): string {
+  return `${(bytes / 1024 / 1024).toFixed(1)} MB`
+}
+
 // ============================================================================
 // 子组件 - 像素风格
 // ============================================================================
@@ -232,6 +232,16 @@ export interface UploadResult {
   processed_count: number
   skipped_count: number
   errors: UploadError[]
+  // 导入台账 (重复上传同一个包)
+  unchanged_package?: boolean
+  inserted_count?: number
+  updated_count?: number
+  unchanged_count?: number
+  deleted_count?: number
+  // 图片规范化 (存储前 / 后字节数)
+  image_bytes_before?: number
+  image_bytes_after?: number
+  images_normalized?: number
 }
 
 /**
@@ -272,6 +282,143 @@ export async function uploadZip(
   return response.data
 }
 
+/**
+ * 预检结果 (dry run): 与导入结果格式相同，processed_count 为校验通过的题目数
+ */
+export interface ValidationResult extends UploadResult {
+  dry_run: true
+  valid: boolean
+  question_count: number
+  source_filename: string | null
+  warnings: string[]
+  elapsed_ms: number
+}
+
+/**
+ * 预检 ZIP 包: 只读取元数据并执行 Syllabus 校验，不导入
+ * @param file ZIP 文件
+ * @param token 认证令牌
+ */
+export async function validateZip(file: File, token: string): Promise<ValidationResult> {
+  const formData = new FormData()
+  formData.append('file', file)
+
+  const response = await api.post<ValidationResult>('/api/upload/validate', formData, {
+    headers: {
+      'Authorization': `Bearer ${token}`,
+      'Content-Type': undefined,
+    },
+    timeout: 120000,  // 上传本身可能较慢，校验只需毫秒级
+  })
+  return response.data
+}
+
+// ============================================================================
+// 后台导入任务 (上传后立即返回，通过 SSE 获取进度)
+// ============================================================================
+export type IngestJobStatus = 'queued' | 'running' | 'succeeded' | 'failed'
+
+export interface IngestJob {
+  id: number
+  filename: string
+  status: IngestJobStatus
+  result?: UploadResult | null
+}
+
+export interface IngestProgress {
+  question: string
+  done: number
+  total: number
+  validated: number
+  unchanged: number
+  errors: number
+  images_stored: number
+}
+
+export type IngestEventCallback = (event: string, data: Record<string, unknown>) => void
+
+/**
+ * 上传 ZIP 文件并创建后台导入任务
+ * @param onProgress 上传进度回调 (0-100)
+ */
+export async function createIngestJob(
+  file: File,
+  token: string,
+  onProgress?: UploadProgressCallback
+): Promise<IngestJob> {
+  const formData = new FormData()
+  formData.append('file', file)
+
+  const response = await api.post<IngestJob>('/api/ingest/jobs', formData, {
+    headers: {
+      'Authorization': `Bearer ${token}`,
+      'Content-Type': undefined,
+    },
+    timeout: 0,  // 只包含上传时间，导入在后台进行
+    onUploadProgress: onProgress
+      ? (progressEvent) => {
+          const total = progressEvent.total || file.size
+          onProgress(Math.round((progressEvent.loaded * 100) / total))
+        }
+      : undefined,
+  })
+  return response.data
+}
+
+/**
+ * 订阅导入任务进度 (Server-Sent Events)，任务结束时返回最终结果
+ *
+ * EventSource 不能携带 Authorization 头，这里用 fetch 读取事件流。
+ */
+export async function watchIngestJob(
+  jobId: number,
+  token: string,
+  onEvent: IngestEventCallback,
+  signal?: AbortSignal
+): Promise<UploadResult> {
+  const response = await fetch(`/api/ingest/jobs/${jobId}/events`, {
+    headers: { 'Authorization': `Bearer ${token}`, 'Accept': 'text/event-stream' },
+    signal,
+  })
+  if (!response.ok || !response.body) {
+    throw new Error(`Failed to subscribe to ingest job ${jobId}: HTTP ${response.status}`)
+  }
+
+  const reader = response.body.getReader()
+  const decoder = new TextDecoder()
+  let buffer = ''
+
+  while (true) {
+    const { done, value } = await reader.read()
+    if (done) break
+    buffer += decoder.decode(value, { stream: true })
+
+    // 事件之间以空行分隔
+    let boundary = buffer.indexOf('\n\n')
+    while (boundary !== -1) {
+      const block = buffer.slice(0, boundary)
+      buffer = buffer.slice(boundary + 2)
+      boundary = buffer.indexOf('\n\n')
+
+      let event = 'message'
+      const dataLines: string[] = []
+      for (const line of block.split('\n')) {
+        if (line.startsWith('event:')) event = line.slice(6).trim()
+        else if (line.startsWith('data:')) dataLines.push(line.slice(5).trim())
+      }
+      if (dataLines.length === 0) continue  // 心跳注释
+
+      const data = JSON.parse(dataLines.join('\n'))
+      onEvent(event, data)
+      if (event === 'finished') {
+        reader.cancel()
+        return data.result as UploadResult
+      }
+    }
+  }
+  throw new Error(`Ingest job ${jobId} event stream ended unexpectedly`)
+}
+
 
 // ============================================================================
 // Question Studio API - 题目工坊
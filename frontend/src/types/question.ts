@@ -5,6 +5,9 @@ export interface Tag {
   name: string
 }
 
+// 图库缩略图 URL: { small: { webp, jpeg }, medium: { webp, jpeg } }
+export type ImageDerivatives = Partial<Record<'small' | 'medium', Partial<Record<'webp' | 'jpeg', string>>>>
+
 // 题目接口 - 对应后端 schemas.Question
 export interface Question {
   id: number
@@ -24,6 +27,7 @@ export interface Question {
   subtopic_details: string | null // 子主题详情
   tags: Tag[]               // 关联标签
   answer_text?: string | null  // 选择题文本答案: "A", "B", "C", "D"
+  question_image_derivatives?: ImageDerivatives  // 图库缩略图 URL (可能尚未生成，404 时回退原图)
 }
 
 // API 查询参数接口